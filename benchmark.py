@@ -0,0 +1,162 @@
+"""
+Scraping throughput benchmark against the local mock platform (mock_platform.py), so
+concurrency / ordering / page-pool changes can be measured without the live site.
+Needs Playwright and Chromium (playwright install chromium).
+
+Examples:
+    python benchmark.py --tickers 30 --models "Gamma,TV Code" --modes sequential,parallel
+    python benchmark.py --tickers 50 --models all --modes parallel-2pages --ordering ticker --lean
+    python benchmark.py --failure-rate 0.2 --output bench.json
+    python benchmark.py --replay sessions/lieta.har --tickers SPX,QQQ,IWM --models all
+
+--replay serves a recorded HAR archive (see replay.py) instead of the mock: real payloads,
+DOM sizes and asset weights, fully offline. --tickers then also accepts a ticker list.
+
+Each mode runs the same job on a fresh mock server and browser, then prints one row:
+elapsed time, successes / failures, tickers per minute, per-item latency percentiles
+(first attempt to success) and retries.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from metrics import percentile
+from mock_platform import MockPlatform
+from replay import TrafficArchive
+from scraper import LietaScraper, STD_MODELS, ORDERINGS
+
+# Mode name -> (parallel model queues, pages per model)
+MODES = {
+    "sequential": (False, 1),
+    "parallel": (True, 1),
+    "parallel-2pages": (True, 2),
+}
+
+
+def parse_range(value):
+    low, _, high = value.partition("-")
+    return (float(low), float(high or low))
+
+
+def run_mode(mode, tickers, models, args):
+    """Runs one job in `mode` against a fresh mock platform and returns its result row."""
+    parallel, pages_per_model = MODES[mode]
+    if args.replay:
+        mock = None
+        archive = TrafficArchive(args.replay, latency_scale=args.replay_latency)
+    else:
+        mock = MockPlatform(latency=parse_range(args.latency), failure_rate=args.failure_rate,
+                            stale_rate=args.stale_rate, ignore_rate=args.ignore_rate, seed=args.seed)
+        base_url = mock.start()
+    work_dir = tempfile.mkdtemp(prefix="lieta_bench_")
+    log = (lambda message: print(f"  [{mode}] {message}", file=sys.stderr)) if args.verbose else (lambda message: None)
+    try:
+        scraper = LietaScraper(logger_func=log, browser_type="chromium", lean=args.lean,
+                               manifest_path=None, tv_codes_path=None)
+        scraper.headless = not args.headed
+        scraper.metrics_dir = None
+        if mock:
+            scraper.set_platform_base_url(base_url)
+        else:
+            scraper.replay = archive
+        # Neither needs a login: an empty session stands in for state.json
+        scraper.storage_state_path = os.path.join(work_dir, "state.json")
+        with open(scraper.storage_state_path, "w", encoding="utf-8") as f:
+            json.dump({"cookies": [], "origins": []}, f)
+
+        started = time.perf_counter()
+        asyncio.run(scraper.perform_full_job(tickers, models, [], [], os.path.join(work_dir, "out"),
+                                             parallel, pages_per_model, False, args.ordering))
+        elapsed = time.perf_counter() - started
+    finally:
+        if mock:
+            mock.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    samples = scraper.metrics.samples
+    items = sorted(v for (platform, model, phase), values in samples.items() if phase == "item" for v in values)
+    attempts = sum(len(values) for (platform, model, phase), values in samples.items() if phase == "attempt")
+    summary = scraper.job_summary()
+    return {
+        "mode": mode,
+        "parallel": parallel,
+        "pages_per_model": pages_per_model,
+        "ordering": args.ordering,
+        "elapsed": round(elapsed, 3),
+        "success": summary["success"],
+        "failed": summary["failed"],
+        "tickers_per_min": round(summary["success"] / (elapsed / 60), 2) if elapsed else None,
+        "item_p50": percentile(items, 0.5),
+        "item_p95": percentile(items, 0.95),
+        "item_p99": percentile(items, 0.99),
+        "retries": max(attempts - summary["success"] - summary["failed"], 0),
+        "failures_by_class": summary["failures_by_class"],
+        "server": dict(mock.stats if mock else archive.stats)
+    }
+
+
+def format_seconds(value):
+    return f"{value:.2f}s" if value is not None else "-"
+
+
+def print_table(rows):
+    print(f"{'mode':<16} {'elapsed':>9} {'ok':>5} {'failed':>6} {'tick/min':>9} {'p50':>7} {'p95':>7} {'p99':>7} {'retries':>7}")
+    for row in rows:
+        print(f"{row['mode']:<16} {row['elapsed']:>8.1f}s {row['success']:>5} {row['failed']:>6} "
+              f"{row['tickers_per_min'] or 0:>9.1f} {format_seconds(row['item_p50']):>7} "
+              f"{format_seconds(row['item_p95']):>7} {format_seconds(row['item_p99']):>7} {row['retries']:>7}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scraping throughput against the local mock platform.")
+    parser.add_argument("--tickers", default="30", help="Number of synthetic tickers, or a comma-separated ticker list")
+    parser.add_argument("--models", default="Gamma,TV Code", help=f"Standard models, comma-separated or 'all' ({', '.join(STD_MODELS)})")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated ({', '.join(MODES)})")
+    parser.add_argument("--ordering", choices=ORDERINGS, default="model")
+    parser.add_argument("--latency", default="0.3-1.2", help="Mock data request latency range in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--stale-rate", type=float, default=0.01)
+    parser.add_argument("--ignore-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1, help="Mock random seed (same failures for every mode)")
+    parser.add_argument("--replay", help="Replay this recorded HAR archive (replay.py) instead of the mock platform")
+    parser.add_argument("--replay-latency", type=float, default=1.0, help="Fraction of the recorded response times to wait (0 = none)")
+    parser.add_argument("--lean", action="store_true", help="Lean browser profile")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--verbose", action="store_true", help="Print the scraper log to stderr")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.models.strip().lower() == "all":
+        models = list(STD_MODELS)
+    else:
+        models = [m.strip() for m in args.models.split(",") if m.strip()]
+    unknown = [m for m in models if m not in STD_MODELS]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown_modes = [m for m in modes if m not in MODES]
+    if unknown or unknown_modes:
+        parser.error(f"Unknown model(s)/mode(s): {', '.join(unknown + unknown_modes)}")
+
+    if args.tickers.isdigit():
+        width = len(args.tickers)
+        tickers = [f"T{i:0{width}d}" for i in range(1, int(args.tickers) + 1)]
+    else:
+        tickers = [t.strip() for t in args.tickers.split(",") if t.strip()]
+
+    rows = []
+    for mode in modes:
+        print(f"Running {mode} ({len(tickers)} tickers x {len(models)} models)...", file=sys.stderr)
+        rows.append(run_mode(mode, tickers, models, args))
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"tickers": len(tickers), "models": models, "results": rows}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import time
+
+from catalog import FileCatalog
+
+# Content-addressed store inside the download folder: download_folder/.blobs
+BLOB_DIR = ".blobs"
+INDEX_NAME = "index.db"
+# Default age for `python blobstore.py compact` (compressed blob, human-facing file removed)
+COMPACT_AFTER_DAYS = 7
+
+
+class BlobStore:
+    """
+    Content-addressed storage for saved reports, deduplicated by SHA-256.
+
+    Every unique report is stored once: the first file is hardlinked as .blobs/<2 hex>/<hash>
+    (copied only where hardlinks are not available), and later identical files (re-runs / retries /
+    snapshots) are replaced by hardlinks to the blob, so they cost no extra space.
+    The blob's size and mtime are recorded when it is stored. A blob changed through an edited link
+    no longer matches them and is stored again from the new file instead of being spread further.
+
+    Nothing is ever removed during a job. compact() is an explicit maintenance step
+    (python blobstore.py compact): it gzips the blobs whose files are all older than N days and
+    removes the files that still hold that content; read() / restore() bring them back.
+    """
+    def __init__(self, download_folder):
+        self.download_folder = download_folder
+        self.root = os.path.join(download_folder, BLOB_DIR)
+        os.makedirs(self.root, exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(self.root, INDEX_NAME), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                saved_at REAL NOT NULL,
+                materialized INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (hash)")
+        # Size / mtime of each raw blob when it was stored (cheap check that it was not edited since)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def blob_path(self, digest, compressed=False):
+        return os.path.join(self.root, digest[:2], digest + (".gz" if compressed else ""))
+
+    def relative(self, path):
+        return os.path.relpath(path, self.download_folder).replace(os.sep, "/")
+
+    @staticmethod
+    def file_digest(path):
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def blob_intact(self, digest):
+        blob = self.blob_path(digest)
+        return os.path.exists(blob) and self.file_digest(blob) == digest
+
+    def blob_current(self, digest, size):
+        """True if the raw blob still has the size and mtime it was stored with (no re-hash)."""
+        row = self.conn.execute("SELECT size, mtime_ns FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        try:
+            st = os.stat(self.blob_path(digest))
+        except OSError:
+            return False
+        return row is not None and st.st_size == size == row[0] and st.st_mtime_ns == row[1]
+
+    def store_blob(self, digest, source):
+        """Makes source the blob of digest: a hardlink to it, or a copy where linking fails."""
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp_path = blob + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            # No hardlinks on this file system (or across devices): the blob is a copy
+            shutil.copyfile(source, tmp_path)
+        # A new directory entry: links to an older (edited) blob keep their content
+        os.replace(tmp_path, blob)
+        st = os.stat(blob)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO blobs (hash, size, mtime_ns) VALUES (?, ?, ?)",
+            (digest, st.st_size, st.st_mtime_ns)
+        )
+        return blob
+
+    def add(self, path):
+        """
+        Registers a newly saved file. Returns the number of bytes saved by deduplication
+        (its size if identical content was already stored, 0 otherwise).
+        """
+        digest = self.file_digest(path)
+        size = os.path.getsize(path)
+        saved = 0
+
+        if not self.blob_current(digest, size):
+            # First occurrence (or a blob modified through an edited link): this file becomes the blob
+            self.store_blob(digest, path)
+        elif not os.path.samefile(self.blob_path(digest), path):
+            # Duplicate: replace the new copy by a hardlink to the stored blob
+            tmp_path = path + ".dedup"
+            try:
+                os.link(self.blob_path(digest), tmp_path)
+                os.replace(tmp_path, path)
+                saved = size
+            except OSError:
+                # No hardlinks on this file system (or across devices): keep the copy
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, hash, size, saved_at, materialized) VALUES (?, ?, ?, ?, 1)",
+            (self.relative(path), digest, size, time.time())
+        )
+        self.conn.commit()
+        return saved
+
+    def compact(self, older_than_days=COMPACT_AFTER_DAYS):
+        """
+        Compresses blobs whose files are all older than `older_than_days` and removes those files
+        (they stay listed in the index, see restore()). A file whose content no longer matches its
+        hash (edited since) is kept and stays materialized. Returns the list of removed paths.
+        """
+        cutoff = time.time() - older_than_days * 86400
+        rows = self.conn.execute(
+            "SELECT hash FROM files GROUP BY hash HAVING MAX(saved_at) < ? AND MAX(materialized) = 1", (cutoff,)
+        ).fetchall()
+
+        removed = []
+        for (digest,) in rows:
+            paths = [rel_path for (rel_path,) in self.conn.execute(
+                "SELECT path FROM files WHERE hash = ? AND materialized = 1", (digest,)
+            )]
+            # Only files that still hold the stored content are removed
+            matching = []
+            for rel_path in paths:
+                full_path = os.path.join(self.download_folder, rel_path)
+                try:
+                    if os.path.exists(full_path) and self.file_digest(full_path) == digest:
+                        matching.append((rel_path, full_path))
+                    elif not os.path.exists(full_path):
+                        matching.append((rel_path, None))
+                except OSError:
+                    continue
+
+            gz_blob = self.blob_path(digest, compressed=True)
+            if not os.path.exists(gz_blob):
+                if self.blob_intact(digest):
+                    source = self.blob_path(digest)
+                else:
+                    source = next((full_path for _, full_path in matching if full_path), None)
+                if source is None:
+                    # Nothing holds this content any more: leave the entries alone
+                    continue
+                tmp_path = gz_blob + ".tmp"
+                with open(source, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(tmp_path, gz_blob)
+
+            for rel_path, full_path in matching:
+                if full_path:
+                    os.remove(full_path)
+                    removed.append(rel_path)
+                self.conn.execute("UPDATE files SET materialized = 0 WHERE path = ?", (rel_path,))
+            # The compressed blob is the stored copy from now on (edited files kept above are their own)
+            if os.path.exists(self.blob_path(digest)):
+                os.remove(self.blob_path(digest))
+            self.conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+        self.conn.commit()
+        return removed
+
+    def read(self, rel_path):
+        """Returns the content of a stored file, materialized or compacted."""
+        full_path = os.path.join(self.download_folder, rel_path)
+        if os.path.exists(full_path):
+            with open(full_path, "rb") as f:
+                return f.read()
+        row = self.conn.execute("SELECT hash FROM files WHERE path = ?", (rel_path,)).fetchone()
+        if not row:
+            raise FileNotFoundError(rel_path)
+        gz_blob = self.blob_path(row[0], compressed=True)
+        if os.path.exists(gz_blob):
+            with gzip.open(gz_blob, "rb") as f:
+                return f.read()
+        if not self.blob_intact(row[0]):
+            raise FileNotFoundError(rel_path)
+        with open(self.blob_path(row[0]), "rb") as f:
+            return f.read()
+
+    def restore(self, rel_path):
+        """Writes a compacted file back to its human-facing path (a regular file). Returns the full path."""
+        full_path = os.path.join(self.download_folder, rel_path)
+        if not os.path.exists(full_path):
+            data = self.read(rel_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            tmp_path = full_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, full_path)
+        self.conn.execute("UPDATE files SET materialized = 1 WHERE path = ?", (rel_path,))
+        self.conn.commit()
+        return full_path
+
+    def compacted_paths(self, prefix=""):
+        """Index paths of the files removed by compact() (optionally under a folder prefix)."""
+        rows = self.conn.execute(
+            "SELECT path FROM files WHERE materialized = 0 AND path LIKE ? ESCAPE '\\' ORDER BY path",
+            (prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%",)
+        )
+        return [path for (path,) in rows]
+
+    def report(self):
+        """
+        Returns {files, compacted, unique_blobs, logical_bytes, stored_bytes, saved_bytes}:
+        logical = what plain files would take, stored = actual bytes on disk (blobs and reports,
+        hardlinks counted once).
+        """
+        files, compacted, unique, logical = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(materialized = 0), 0), COUNT(DISTINCT hash), COALESCE(SUM(size), 0) FROM files"
+        ).fetchone()
+        seen = set()
+        stored = 0
+        paths = [self.blob_path(digest, compressed) for (digest,) in self.conn.execute("SELECT DISTINCT hash FROM files")
+                 for compressed in (False, True)]
+        paths += [os.path.join(self.download_folder, path) for (path,) in self.conn.execute("SELECT path FROM files WHERE materialized = 1")]
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                stored += st.st_size
+        return {
+            "files": files,
+            "compacted": compacted,
+            "unique_blobs": unique,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "saved_bytes": logical - stored
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deduplicated report storage of a download folder (--dedup runs).")
+    parser.add_argument("download_folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("report", help="Show the files / blobs / bytes saved")
+    compact = commands.add_parser("compact", help="Compress old reports and remove their files (restore brings them back)")
+    compact.add_argument("--older-than-days", type=float, default=COMPACT_AFTER_DAYS)
+    restore = commands.add_parser("restore", help="Write compacted reports back to their paths")
+    restore.add_argument("paths", nargs="*", help="Report paths relative to the download folder, or folder prefixes (e.g. Gamma/SPX/)")
+    restore.add_argument("--all", action="store_true", help="Restore every compacted report")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(os.path.join(args.download_folder, BLOB_DIR)):
+        parser.error(f"No deduplicated storage in {args.download_folder}")
+    store = BlobStore(args.download_folder)
+    changed = False
+
+    if args.command == "compact":
+        removed = store.compact(args.older_than_days)
+        changed = bool(removed)
+        print(f"Compacted {len(removed)} reports older than {args.older_than_days:g} days.")
+    elif args.command == "restore":
+        if not args.paths and not args.all:
+            parser.error("restore needs report paths or --all")
+        prefixes = [""] if args.all else [p.replace(os.sep, "/") for p in args.paths]
+        paths = sorted({path for prefix in prefixes for path in store.compacted_paths(prefix)})
+        for path in paths:
+            print(store.restore(path))
+        changed = bool(paths)
+        print(f"Restored {len(paths)} reports.")
+
+    report = store.report()
+    print(f"{report['files']} reports ({report['compacted']} compacted) in {report['unique_blobs']} unique blobs: "
+          f"{format_bytes(report['stored_bytes'])} stored for {format_bytes(report['logical_bytes'])} "
+          f"({format_bytes(report['saved_bytes'])} saved).")
+    store.close()
+
+    if changed:
+        # Keep the viewer's file catalog in line with the removed / restored files
+        catalog = FileCatalog(args.download_folder)
+        catalog.reconcile()
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
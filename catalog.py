@@ -0,0 +1,203 @@
+"""
+Persistent, incremental catalog of the files in a download folder (SQLite), so listing the
+files of a date / model / ticker is an indexed lookup instead of a walk of the whole tree.
+
+The scraper adds every file it writes. reconcile() picks up anything else (files copied in,
+deleted, compacted): it only lists directories whose mtime changed since the last scan, so
+after the one-time build it costs one stat() per directory.
+
+    python catalog.py downloads                    # build / reconcile
+    python catalog.py downloads --date 20261017    # list a date's files
+"""
+import argparse
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+CATALOG_NAME = ".catalog.db"
+CATALOG_EXTENSIONS = ('.html', '.json', '.txt', '.csv', '.pdf', '.png')
+# Ticker_YYYYMMDD_HHMMSS.ext / TV_Codes_YYYYMMDD_HHMMSS.txt (see utils.get_timestamp_filename)
+TIMESTAMP_RE = re.compile(r"_(\d{8})_(\d{6})")
+
+
+def classify(rel_path):
+    """
+    Maps a path relative to the download folder to (platform, model, ticker):
+    [CME/]Model/Ticker/file -> ("std"|"cme", Model, Ticker), [CME/]TV Code/file -> (.., "TV Code", None),
+    anything else -> ("std", "Other", None).
+    """
+    parts = rel_path.split("/")
+    platform = "std"
+    if parts[0] == "CME" and len(parts) > 1:
+        platform = "cme"
+        parts = parts[1:]
+    if len(parts) >= 3:
+        return platform, parts[0], parts[1]
+    if "TV Code" in parts or parts[-1].lower().startswith("tv_codes"):
+        return platform, "TV Code", None
+    return platform, "Other", None
+
+
+class FileCatalog:
+    def __init__(self, download_folder):
+        self.download_folder = download_folder
+        self.conn = sqlite3.connect(os.path.join(download_folder, CATALOG_NAME), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                name TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                model TEXT NOT NULL,
+                ticker TEXT,
+                size INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_lookup ON files (date, platform, model, ticker)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_ticker ON files (platform, model, ticker, date)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+        # Directory mtimes from the last scan: unchanged directories are not listed again
+        self.conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, parent TEXT, mtime REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent)")
+        self.conn.commit()
+
+    def relative(self, path):
+        return os.path.relpath(path, self.download_folder).replace(os.sep, "/")
+
+    def _insert(self, rel_path, size, mtime):
+        directory, _, name = rel_path.rpartition("/")
+        match = TIMESTAMP_RE.search(name)
+        if match:
+            date, time_str = match.groups()
+        else:
+            # No timestamp in the name: fall back to the modification time
+            stamp = datetime.fromtimestamp(mtime)
+            date, time_str = stamp.strftime("%Y%m%d"), stamp.strftime("%H%M%S")
+        platform, model, ticker = classify(rel_path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, dir, name, date, time, platform, model, ticker, size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel_path, directory, name, date, time_str, platform, model, ticker, size)
+        )
+
+    def add(self, path):
+        """Registers a file the scraper just wrote."""
+        st = os.stat(path)
+        self._insert(self.relative(path), st.st_size, st.st_mtime)
+        self.conn.commit()
+
+    def _drop_dir(self, rel_dir):
+        # Prefix match without LIKE ("_" in ticker names is a LIKE wildcard)
+        prefix = rel_dir + "/"
+        removed = self.conn.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (rel_dir, len(prefix), prefix)).rowcount
+        self.conn.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", (rel_dir, len(prefix), prefix))
+        return removed
+
+    def reconcile(self):
+        """
+        Brings the catalog in line with the folder (the first call is the full build).
+        Returns the number of files added or removed.
+        """
+        changes = 0
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            full_dir = os.path.join(self.download_folder, rel_dir)
+            try:
+                mtime = os.stat(full_dir).st_mtime
+            except OSError:
+                changes += self._drop_dir(rel_dir)
+                continue
+
+            known_dirs = {row[0] for row in self.conn.execute("SELECT path FROM dirs WHERE parent = ?", (rel_dir,))}
+            row = self.conn.execute("SELECT mtime FROM dirs WHERE path = ?", (rel_dir,)).fetchone()
+            if row and row[0] == mtime:
+                # No entry added / removed here: only descend
+                stack.extend(known_dirs)
+                continue
+
+            subdirs = set()
+            files = {}
+            with os.scandir(full_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        # .blobs, the catalog itself, ...
+                        continue
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if entry.is_dir():
+                        subdirs.add(rel_path)
+                    elif entry.name.endswith(CATALOG_EXTENSIONS):
+                        files[rel_path] = entry
+
+            for gone in known_dirs - subdirs:
+                changes += self._drop_dir(gone)
+            known_files = {row[0] for row in self.conn.execute("SELECT path FROM files WHERE dir = ?", (rel_dir,))}
+            for gone in known_files - files.keys():
+                self.conn.execute("DELETE FROM files WHERE path = ?", (gone,))
+                changes += 1
+            for rel_path in files.keys() - known_files:
+                st = files[rel_path].stat()
+                self._insert(rel_path, st.st_size, st.st_mtime)
+                changes += 1
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)",
+                (rel_dir, None if rel_dir == "" else rel_dir.rpartition("/")[0], mtime)
+            )
+            stack.extend(subdirs)
+        self.conn.commit()
+        return changes
+
+    def dates(self, limit=None):
+        """Dates ("YYYYMMDD") that have files, newest first."""
+        query = "SELECT DISTINCT date FROM files ORDER BY date DESC"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return [row[0] for row in self.conn.execute(query)]
+
+    def files(self, date=None, platform=None, model=None, ticker=None):
+        """
+        Lists catalogued files (dicts, oldest first). Every filter is optional;
+        date is "YYYYMMDD".
+        """
+        conditions, params = [], []
+        for column, value in (("date", date), ("platform", platform), ("model", model), ("ticker", ticker)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self.conn.execute(f"SELECT * FROM files {where} ORDER BY date, time, path", params)
+        columns = [d[0] for d in cursor.description]
+        records = []
+        for row in cursor:
+            record = dict(zip(columns, row))
+            record["full_path"] = os.path.join(self.download_folder, *record["path"].split("/"))
+            records.append(record)
+        return records
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build / query the download folder's file catalog.")
+    parser.add_argument("download_folder")
+    parser.add_argument("--date", help="List the files of this date (YYYYMMDD)")
+    parser.add_argument("--model")
+    parser.add_argument("--ticker")
+    args = parser.parse_args(argv)
+
+    catalog = FileCatalog(args.download_folder)
+    changes = catalog.reconcile()
+    print(f"Catalog up to date ({changes} changes).")
+    if args.date or args.model or args.ticker:
+        for record in catalog.files(args.date, model=args.model, ticker=args.ticker):
+            print(record["path"])
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
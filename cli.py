@@ -0,0 +1,217 @@
+"""
+Headless command-line runner (servers / cron). Never imports the GUI toolkit;
+Playwright is only imported when a browser engine actually starts.
+
+Examples:
+    python cli.py --tickers tickers.txt --models Gamma,Delta --download-folder out
+    python cli.py --cme-tickers cme.txt --cme-models all --download-folder out --engine http
+    python cli.py --retry --download-folder out
+    python cli.py --tickers tickers.txt --models all --download-folder out --dry-run
+
+Prints one JSON summary line on stdout (logs go to stderr) and exits with
+0 = everything succeeded, 1 = some items failed, 2 = the job could not run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import utils
+from scraper import STD_MODELS, CME_MODELS
+from sharding import ShardedJob, scraper_from_options
+from runlog import RunLogWriter
+from traces import TRACE_MODES, TRACE_MAX_BYTES
+from scheduler import PRIORITIES_PATH, parse_deadline
+from failed_tasks import FAILED_TASKS_PATH, load_failed_tasks, save_failed_tasks, merge_failed_tasks, job_task_keys
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_ERROR = 2
+
+
+def parse_models(value, available):
+    """Parses a comma-separated model list ("all" = every model of the platform)."""
+    if not value:
+        return []
+    if value.strip().lower() == "all":
+        return list(available)
+    models = [m.strip() for m in value.split(",") if m.strip()]
+    unknown = [m for m in models if m not in available]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown model(s): {', '.join(unknown)}. Available: {', '.join(available)}")
+    return models
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Lieta Research Scraper (headless).")
+    parser.add_argument("--tickers", help="Standard platform ticker file (txt/csv)")
+    parser.add_argument("--models", help=f"Standard models, comma-separated or 'all' ({', '.join(STD_MODELS)})")
+    parser.add_argument("--cme-tickers", help="CME platform ticker file (txt/csv)")
+    parser.add_argument("--cme-models", help=f"CME models, comma-separated or 'all' ({', '.join(CME_MODELS)})")
+    parser.add_argument("--download-folder", required=True, help="Output folder")
+
+    parser.add_argument("--retry", action="store_true", help=f"Retry the persisted failed tasks ({FAILED_TASKS_PATH}) instead of a full job")
+    parser.add_argument("--resume", action="store_true", help="Skip items the run manifest records as completed today")
+
+    parser.add_argument("--engine", choices=["browser", "http"], default="browser")
+    parser.add_argument("--browser", choices=["chrome", "brave", "chromium"], default="chromium", help="Browser engine only")
+    parser.add_argument("--capture", choices=["download", "network"], default="download", help="Browser engine only")
+    parser.add_argument("--lean", action="store_true", help="Block images/fonts/analytics and disable animations")
+    parser.add_argument("--parallel", action="store_true", help="Run model queues in parallel")
+    parser.add_argument("--pages-per-model", type=int, default=1)
+    parser.add_argument("--adaptive", action="store_true", help="Adaptive (AIMD) concurrency")
+    parser.add_argument("--dedup", action="store_true", help="Deduplicated storage: identical reports stored once (see python blobstore.py)")
+    parser.add_argument("--concurrency", type=int, default=8, help="HTTP engine only: maximum requests in flight")
+    parser.add_argument("--ordering", choices=["model", "ticker"], default="model",
+                        help="model: one page per model enters every ticker; ticker: enter each ticker once and cycle its models")
+    parser.add_argument("--trace-failures", choices=TRACE_MODES,
+                        help="Browser engine only: save a screenshot, DOM snapshot and recent page events of every failed attempt (attempt) or given-up item (final)")
+    parser.add_argument("--trace-max-mb", type=float, default=TRACE_MAX_BYTES / (1024 * 1024), help="Disk budget of the failure traces per run (per process)")
+    parser.add_argument("--deadline", help="Time (HH:MM) the job should be done by: the log lists the items the plan expects to miss it")
+    parser.add_argument("--priorities", default=PRIORITIES_PATH, help="JSON {ticker: tier} file, lower tiers first (default: SPX, QQQ, ES first)")
+    parser.add_argument("--no-schedule", action="store_true", help="Keep the ticker file order instead of priority tiers + longest expected first")
+    parser.add_argument("--processes", type=int, default=1, help="Shard the job across this many worker processes (one browser each)")
+
+    parser.add_argument("--summary-file", help="Also write the JSON summary to this file")
+    parser.add_argument("--log-file", help="Append the log to this file")
+    parser.add_argument("--events-file", help="Append structured per-attempt events (JSONL) to this file")
+    parser.add_argument("--quiet", action="store_true", help="Do not print the log to stderr")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the arguments and print the plan without scraping")
+    return parser
+
+
+def make_logger(writer=None, quiet=False):
+    def log(message):
+        now = datetime.now()
+        if not quiet:
+            print(f"{now.strftime('%Y-%m-%d %H:%M:%S')} - {message}", file=sys.stderr, flush=True)
+        if writer:
+            # Batched by the writer thread; the file stays open for the run
+            writer.write(message, now)
+    return log
+
+
+def scraper_options(args):
+    return {
+        "engine": args.engine,
+        "browser_type": args.browser,
+        "capture_mode": args.capture,
+        "lean": args.lean,
+        "adaptive": args.adaptive,
+        "dedup": args.dedup,
+        "concurrency": args.concurrency,
+        "trace_failures": args.trace_failures,
+        "trace_max_mb": args.trace_max_mb,
+        "schedule": not args.no_schedule,
+        "priorities_path": args.priorities,
+        "deadline": args.deadline,
+        # No display on servers
+        "headless": True
+    }
+
+
+def run(args, writer=None):
+    log = make_logger(writer, args.quiet)
+    event = writer.event if writer and args.events_file else None
+    started = time.time()
+    summary = {"mode": "retry" if args.retry else "full", "engine": args.engine}
+
+    if args.deadline:
+        try:
+            parse_deadline(args.deadline)
+        except ValueError:
+            summary.update(status="error", error=f"Invalid --deadline '{args.deadline}' (expected HH:MM)")
+            return EXIT_ERROR, summary
+
+    if args.retry:
+        failed_tasks = load_failed_tasks()
+        summary["planned"] = len(failed_tasks)
+        if not failed_tasks:
+            log("No failed tasks to retry.")
+            summary.update(status="ok", success=0, failed=0)
+            return EXIT_OK, summary
+        attempted_keys = {(t["platform"], t["model"], t["ticker"]) for t in failed_tasks}
+    else:
+        try:
+            models = parse_models(args.models, STD_MODELS)
+            cme_models = parse_models(args.cme_models, CME_MODELS)
+        except argparse.ArgumentTypeError as e:
+            summary.update(status="error", error=str(e))
+            return EXIT_ERROR, summary
+
+        tickers = utils.load_tickers_from_file(args.tickers) if args.tickers and models else []
+        cme_tickers = utils.load_tickers_from_file(args.cme_tickers) if args.cme_tickers and cme_models else []
+        if not (tickers and models) and not (cme_tickers and cme_models):
+            summary.update(status="error", error="Nothing to do: give --tickers/--models and/or --cme-tickers/--cme-models.")
+            return EXIT_ERROR, summary
+        attempted_keys = job_task_keys(tickers, models, cme_tickers, cme_models)
+        summary["planned"] = len(attempted_keys)
+
+    if args.dry_run:
+        summary.update(status="dry_run", elapsed=round(time.time() - started, 3))
+        return EXIT_OK, summary
+
+    os.makedirs(args.download_folder, exist_ok=True)
+    options = scraper_options(args)
+    try:
+        if args.processes > 1:
+            job = ShardedJob(options, args.processes, logger_func=log, event_func=event)
+            if args.retry:
+                new_failures = job.run_retry_job(failed_tasks, args.download_folder, args.parallel, args.pages_per_model, args.ordering)
+            else:
+                new_failures = job.run_job(tickers, models, cme_tickers, cme_models, args.download_folder,
+                                           args.parallel, args.pages_per_model, args.resume, args.ordering)
+            job_summary = job.last_summary
+        else:
+            scraper = scraper_from_options(options, log, event)
+            if args.retry:
+                new_failures = asyncio.run(scraper.perform_retry_job(failed_tasks, args.download_folder, args.parallel, args.pages_per_model, args.ordering))
+            else:
+                new_failures = asyncio.run(scraper.perform_full_job(tickers, models, cme_tickers, cme_models, args.download_folder,
+                                                                    args.parallel, args.pages_per_model, args.resume, args.ordering))
+            job_summary = scraper.job_summary()
+    except KeyboardInterrupt:
+        summary.update(status="interrupted", elapsed=round(time.time() - started, 3))
+        return EXIT_ERROR, summary
+    except Exception as e:
+        log(f"Job Critical Error: {e}")
+        summary.update(status="error", error=str(e), elapsed=round(time.time() - started, 3))
+        return EXIT_ERROR, summary
+
+    if new_failures is None:
+        summary.update(status="error", error="Job did not start (no session file? log in once via the GUI).")
+        return EXIT_ERROR, summary
+
+    # Same persisted queue as the GUI's Retry Failed button
+    remaining = merge_failed_tasks(load_failed_tasks(), new_failures, attempted_keys)
+    save_failed_tasks(remaining)
+
+    summary.update(job_summary or {})
+    summary.update(status="ok" if not new_failures else "failures",
+                   queued_for_retry=len(remaining),
+                   elapsed=round(time.time() - started, 3))
+    return (EXIT_FAILURES if new_failures else EXIT_OK), summary
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    writer = RunLogWriter(args.log_file, args.events_file) if args.log_file or args.events_file else None
+    try:
+        code, summary = run(args, writer)
+    finally:
+        if writer:
+            writer.close()
+    summary["exit_code"] = code
+    text = json.dumps(summary, ensure_ascii=False)
+    print(text, flush=True)
+    if args.summary_file:
+        with open(args.summary_file, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class AIMDController:
+    """
+    Adaptive concurrency limit shared by every page / request of a job (std and CME).
+    Additive increase: each success adds increase/limit, i.e. about +1 per round of successes.
+    Multiplicative decrease: server-busy toasts and timeouts multiply the limit by `decrease`
+    (at most once per decrease_cooldown seconds, so one burst of failures counts once).
+    """
+    def __init__(self, logger_func=print, initial=2, min_limit=1, max_limit=16, increase=1.0, decrease=0.5, decrease_cooldown=5.0):
+        self.log = logger_func
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_cooldown = decrease_cooldown
+
+        self.active = 0
+        self.pages = 0
+        self.peak_limit = int(self.limit)
+        self.last_decrease = 0.0
+        self.condition = asyncio.Condition()
+
+    def current_limit(self):
+        return int(self.limit)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one active slot for the duration of an attempt."""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.current_limit())
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.active -= 1
+                self.condition.notify_all()
+
+    @asynccontextmanager
+    async def page_slot(self):
+        """
+        Holds one open page for the life of a page worker. Pages are only opened while fewer than
+        the current limit are open, so a job starting at a low limit does not open every page up
+        front; more are opened as the limit rises (a lowered limit throttles attempts via slot()).
+        """
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.pages < self.current_limit())
+            self.pages += 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.pages -= 1
+                self.condition.notify_all()
+
+    async def on_success(self):
+        old = self.current_limit()
+        self.limit = min(float(self.max_limit), self.limit + self.increase / max(1.0, self.limit))
+        if self.current_limit() != old:
+            self.peak_limit = max(self.peak_limit, self.current_limit())
+            self.log(f"[AIMD] Concurrency limit raised to {self.current_limit()} (max {self.max_limit}).")
+            async with self.condition:
+                self.condition.notify_all()
+
+    async def on_congestion(self, reason):
+        now = time.monotonic()
+        if now - self.last_decrease < self.decrease_cooldown:
+            return
+        self.last_decrease = now
+
+        old = self.current_limit()
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        if self.current_limit() != old:
+            self.log(f"[AIMD] {reason}: concurrency limit lowered to {self.current_limit()}.")
@@ -0,0 +1,437 @@
+"""
+Extraction of the chart / table series embedded in saved reports into columnar datasets.
+
+    python extract.py <download_folder> <dataset_folder> [--processes N] [--date YYYYMMDD]
+
+Reports (HTML downloads and Network Capture JSON records) are parsed in a process pool and
+written as one file per (date, platform, model) partition:
+    dataset_folder/date=YYYY-MM-DD/platform=std/model=Gamma/data.parquet   (pyarrow installed)
+    dataset_folder/date=YYYY-MM-DD/platform=std/model=Gamma/data.npz       (numpy only)
+in long format: ticker, captured_at, series, point, x, x_label, y.
+
+load_dataset() reads partitions back as NumPy column arrays, e.g. a month of SPX gamma:
+    load_dataset("dataset", "Gamma", ticker="SPX", start="2026-09-01", end="2026-09-30")
+
+numpy is required, pyarrow is optional (pip install numpy pyarrow).
+"""
+import argparse
+import array
+import base64
+import json
+import math
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from html.parser import HTMLParser
+
+from blobstore import BLOB_DIR, INDEX_NAME
+
+REPORT_EXTENSIONS = (".html", ".json")
+# Folders that do not hold model reports
+SKIP_DIRS = (BLOB_DIR, "TV Code")
+COLUMNS = ("ticker", "captured_at", "series", "point", "x", "x_label", "y")
+# Reports handed to the pool per worker at a time (bounds the parsed results waiting to be written)
+EXTRACT_WINDOW = 64
+# Reports that could not be parsed (path + error), written next to the partitions
+ERRORS_NAME = "extract_errors.json"
+
+# Report filenames end with _YYYYMMDD_HHMMSS
+TIMESTAMP_RE = re.compile(r"_(\d{8})_(\d{6})\.\w+$")
+PLOTLY_CALL_RE = re.compile(r"Plotly\.(?:newPlot|react|plot)\(\s*")
+JSON_SCRIPT_RE = re.compile(r"<script[^>]*type=[\"']application/(?:json|ld\+json)[\"'][^>]*>(.*?)</script>", re.S | re.I)
+
+# Plotly >= 5.x "typed array" encoding: {"dtype": "f8", "bdata": "<base64>"}
+TYPED_ARRAY_CODES = {"f8": "d", "f4": "f", "i1": "b", "u1": "B", "i2": "h", "u2": "H", "i4": "i", "u4": "I", "i8": "q", "u8": "Q"}
+
+
+def to_float(value):
+    if isinstance(value, bool) or value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return math.nan
+
+
+def decode_values(values):
+    """Returns a plain list from a JSON list or a Plotly typed array."""
+    if isinstance(values, dict) and "bdata" in values and values.get("dtype") in TYPED_ARRAY_CODES:
+        arr = array.array(TYPED_ARRAY_CODES[values["dtype"]])
+        arr.frombytes(base64.b64decode(values["bdata"]))
+        if sys.byteorder != "little":
+            arr.byteswap()
+        return arr.tolist()
+    if isinstance(values, list):
+        return values
+    return []
+
+
+def plotly_traces(html):
+    """Finds the trace arrays passed to Plotly.newPlot / react / plot in a report."""
+    decoder = json.JSONDecoder()
+    traces = []
+    for match in PLOTLY_CALL_RE.finditer(html):
+        pos = match.end()
+        # First argument: the div id (string) or element
+        try:
+            _, pos = decoder.raw_decode(html, pos)
+        except ValueError:
+            comma = html.find(",", pos)
+            if comma < 0:
+                continue
+            pos = comma
+        pos = html.find("[", pos)
+        if pos < 0:
+            continue
+        try:
+            data, _ = decoder.raw_decode(html, pos)
+        except ValueError:
+            continue
+        traces += [t for t in data if isinstance(t, dict)]
+    return traces
+
+
+class TableParser(HTMLParser):
+    """
+    Collects the cell texts of every <table> in a document.
+    header_rows holds, per table, the indexes of the rows made only of <th> cells.
+    """
+    def __init__(self):
+        super().__init__()
+        self.tables = []
+        self.header_rows = []
+        self.row = None
+        self.row_th = True
+        self.cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            self.tables.append([])
+            self.header_rows.append(set())
+        elif tag == "tr" and self.tables:
+            self.row = []
+            self.row_th = True
+        elif tag in ("td", "th") and self.row is not None:
+            self.cell = []
+            self.row_th = self.row_th and tag == "th"
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th") and self.cell is not None:
+            self.row.append(" ".join("".join(self.cell).split()))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            if self.row:
+                if self.row_th:
+                    self.header_rows[-1].add(len(self.tables[-1]))
+                self.tables[-1].append(self.row)
+            self.row = None
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+
+def table_header(rows, header_rows):
+    """
+    Returns (header or None, body rows) of a parsed table. The first row is the header if it is
+    made of <th> cells or, without any <th>, if its value columns are text above numeric rows.
+    """
+    first = rows[0]
+    if 0 in header_rows:
+        return first, rows[1:]
+    if header_rows:
+        # <th> rows further down (e.g. a caption row first): no usable header
+        return None, rows
+    value_cells = first[1:]
+    below = [cell for row in rows[1:] for cell in row[1:]]
+    is_text = lambda cell: cell != "" and math.isnan(to_float(cell))
+    if value_cells and all(is_text(c) for c in value_cells) and any(not is_text(c) for c in below if c != ""):
+        return first, rows[1:]
+    return None, rows
+
+
+def numeric_arrays(data, path="data"):
+    """Yields (path, values) for every list of numbers (2+ items) in a JSON payload."""
+    if isinstance(data, dict):
+        if "bdata" in data and "dtype" in data:
+            yield path, decode_values(data)
+            return
+        for key, value in data.items():
+            yield from numeric_arrays(value, f"{path}.{key}")
+    elif isinstance(data, list):
+        if len(data) > 1 and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in data):
+            yield path, data
+        else:
+            for i, value in enumerate(data):
+                if isinstance(value, (dict, list)):
+                    yield from numeric_arrays(value, f"{path}[{i}]")
+
+
+def extract_series(text, is_json=False):
+    """
+    Returns [(series_name, x_values, y_values)] found in one report:
+    Plotly traces (x/y), HTML tables (first column = label) or, for Network Capture records,
+    every numeric array of the payload.
+    """
+    series = []
+    if is_json:
+        record = json.loads(text)
+        for path, values in numeric_arrays(record.get("data", record)):
+            series.append((path, list(range(len(values))), values))
+        return series
+
+    for i, trace in enumerate(plotly_traces(text)):
+        name = str(trace.get("name") or f"trace{i}")
+        x = decode_values(trace.get("x"))
+        y = decode_values(trace.get("y"))
+        # Horizontal bar charts (e.g. gamma by strike) carry the values on x
+        if trace.get("orientation") == "h":
+            x, y = y, x
+        if y:
+            series.append((name, x or list(range(len(y))), y))
+
+    for script in JSON_SCRIPT_RE.findall(text):
+        try:
+            for path, values in numeric_arrays(json.loads(script), "script"):
+                series.append((path, list(range(len(values))), values))
+        except ValueError:
+            pass
+
+    parser = TableParser()
+    parser.feed(text)
+    for t, rows in enumerate(parser.tables):
+        if not rows:
+            continue
+        header, body = table_header(rows, parser.header_rows[t])
+        if not body:
+            continue
+        width = max(len(header or []), max(len(r) for r in body))
+        labels = [r[0] if r else "" for r in body]
+        for c in range(1, width):
+            name = header[c] if header and c < len(header) and header[c] else f"col{c}"
+            values = [r[c] if c < len(r) else "" for r in body]
+            series.append((f"table{t}:{name}", labels, values))
+    return series
+
+
+def report_info(rel_path):
+    """
+    Parses (platform, model, ticker, date "YYYY-MM-DD", captured_at) from a report path
+    relative to download_folder ([CME/]Model/Ticker/Ticker_YYYYMMDD_HHMMSS.ext). None if it is not a report.
+    """
+    parts = rel_path.replace("\\", "/").split("/")
+    platform = "std"
+    if parts[0] == "CME":
+        platform = "cme"
+        parts = parts[1:]
+    match = TIMESTAMP_RE.search(parts[-1])
+    if len(parts) != 3 or not match:
+        return None
+    captured = datetime.strptime(match.group(1) + match.group(2), "%Y%m%d%H%M%S")
+    return platform, parts[0], parts[1], captured.strftime("%Y-%m-%d"), captured.isoformat()
+
+
+def partition_key(rel_path):
+    """(date, platform, model) partition of a report path."""
+    platform, model, _, date, _ = report_info(rel_path)
+    return date, platform, model
+
+
+def find_reports(download_folder, date=None):
+    """
+    Yields report paths (relative to download_folder), including reports compacted into the blob store.
+    date: optional "YYYYMMDD" filter.
+    """
+    seen = set()
+    for root, dirs, files in os.walk(download_folder):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for file in files:
+            if file.endswith(REPORT_EXTENSIONS) and (not date or date in file):
+                rel_path = os.path.relpath(os.path.join(root, file), download_folder).replace(os.sep, "/")
+                if report_info(rel_path):
+                    seen.add(rel_path)
+                    yield rel_path
+
+    if os.path.exists(os.path.join(download_folder, BLOB_DIR, INDEX_NAME)):
+        from blobstore import BlobStore
+        store = BlobStore(download_folder)
+        for (rel_path,) in store.conn.execute("SELECT path FROM files WHERE materialized = 0"):
+            if rel_path not in seen and (not date or date in rel_path) and report_info(rel_path):
+                yield rel_path
+        store.close()
+
+
+def parse_report(download_folder, rel_path):
+    """
+    Worker: returns (partition key, column lists, error) for one report. A report that cannot be
+    read or parsed gives empty columns and the error text instead of failing the whole batch.
+    """
+    platform, model, ticker, date, captured_at = report_info(rel_path)
+    key = (date, platform, model)
+    columns = {c: [] for c in COLUMNS}
+    try:
+        full_path = os.path.join(download_folder, rel_path)
+        if os.path.exists(full_path):
+            with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        else:
+            # Compacted into the blob store
+            from blobstore import BlobStore
+            store = BlobStore(download_folder)
+            try:
+                text = store.read(rel_path).decode("utf-8", errors="replace")
+            finally:
+                store.close()
+        series = extract_series(text, is_json=rel_path.endswith(".json"))
+    except Exception as e:
+        return key, columns, f"{type(e).__name__}: {e}"
+
+    for name, xs, ys in series:
+        for point, (x, y) in enumerate(zip(xs, ys)):
+            columns["ticker"].append(ticker)
+            columns["captured_at"].append(captured_at)
+            columns["series"].append(name)
+            columns["point"].append(point)
+            columns["x"].append(to_float(x))
+            columns["x_label"].append("" if isinstance(x, (int, float)) else str(x))
+            columns["y"].append(to_float(y))
+    return key, columns, None
+
+
+def partition_dir(dataset_folder, date, platform, model):
+    return os.path.join(dataset_folder, f"date={date}", f"platform={platform}", f"model={model}")
+
+
+def write_partition(dataset_folder, key, columns):
+    """Writes one partition as Parquet (pyarrow) or .npz (numpy only). Returns the file path."""
+    import numpy as np
+    arrays = {
+        "ticker": np.array(columns["ticker"], dtype=str),
+        "captured_at": np.array(columns["captured_at"], dtype=str),
+        "series": np.array(columns["series"], dtype=str),
+        "point": np.array(columns["point"], dtype=np.int32),
+        "x": np.array(columns["x"], dtype=np.float64),
+        "x_label": np.array(columns["x_label"], dtype=str),
+        "y": np.array(columns["y"], dtype=np.float64),
+    }
+    out_dir = partition_dir(dataset_folder, *key)
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        path = os.path.join(out_dir, "data.npz")
+        np.savez(path, **arrays)
+        return path
+
+    path = os.path.join(out_dir, "data.parquet")
+    table = pa.table({name: arrays[name] for name in COLUMNS})
+    pq.write_table(table, path, compression="zstd")
+    return path
+
+
+def extract_folder(download_folder, dataset_folder, processes=None, date=None, logger_func=print):
+    """
+    Batch mode: parses every report under download_folder with a process pool (all cores by
+    default) and rewrites the affected partitions. Reports are processed partition by partition
+    and each partition is written as soon as its last report is parsed, so memory holds one
+    partition (plus a window of pending results), not the whole dataset.
+    Reports that fail to parse are listed in dataset_folder/extract_errors.json (removed by a run
+    without errors). Returns {partition key: rows}.
+    """
+    reports = sorted(find_reports(download_folder, date), key=lambda rel_path: (partition_key(rel_path), rel_path))
+    logger_func(f"Extracting {len(reports)} reports from {download_folder} ...")
+
+    counts = {}
+    errors = []
+    current_key, current = None, None
+
+    def flush():
+        path = write_partition(dataset_folder, current_key, current)
+        counts[current_key] = len(current["y"])
+        logger_func(f"{path}: {counts[current_key]} rows")
+
+    workers = processes or os.cpu_count()
+    window = workers * EXTRACT_WINDOW
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(reports), window):
+            batch = reports[start:start + window]
+            results = pool.map(parse_report, [download_folder] * len(batch), batch, chunksize=16)
+            for rel_path, (key, columns, error) in zip(batch, results):
+                if error:
+                    errors.append({"path": rel_path, "error": error})
+                    logger_func(f"Failed to parse {rel_path}: {error}")
+                if key != current_key:
+                    if current_key is not None:
+                        flush()
+                    current_key, current = key, {c: [] for c in COLUMNS}
+                for c in COLUMNS:
+                    current[c] += columns[c]
+    if current_key is not None:
+        flush()
+
+    if errors:
+        os.makedirs(dataset_folder, exist_ok=True)
+        with open(os.path.join(dataset_folder, ERRORS_NAME), "w", encoding="utf-8") as f:
+            json.dump(errors, f, ensure_ascii=False, indent=1)
+        logger_func(f"{len(errors)} reports could not be parsed, see {os.path.join(dataset_folder, ERRORS_NAME)}")
+    elif os.path.exists(os.path.join(dataset_folder, ERRORS_NAME)):
+        # A clean rerun: the errors of an earlier run no longer apply
+        os.remove(os.path.join(dataset_folder, ERRORS_NAME))
+    return counts
+
+
+def load_dataset(dataset_folder, model, platform="std", ticker=None, start=None, end=None, series=None):
+    """
+    Loads partitions of one model as {column: numpy array}.
+    start / end: inclusive "YYYY-MM-DD" date bounds. ticker / series: optional exact filters.
+    """
+    import numpy as np
+    parts = []
+    if os.path.isdir(dataset_folder):
+        for entry in sorted(os.listdir(dataset_folder)):
+            date = entry[len("date="):]
+            if not entry.startswith("date=") or (start and date < start) or (end and date > end):
+                continue
+            out_dir = partition_dir(dataset_folder, date, platform, model)
+            parquet_path = os.path.join(out_dir, "data.parquet")
+            npz_path = os.path.join(out_dir, "data.npz")
+            if os.path.exists(parquet_path):
+                import pyarrow.parquet as pq
+                table = pq.read_table(parquet_path)
+                parts.append({c: table.column(c).to_numpy() for c in COLUMNS})
+            elif os.path.exists(npz_path):
+                with np.load(npz_path) as data:
+                    parts.append({c: data[c] for c in COLUMNS})
+
+    if not parts:
+        return {c: np.array([]) for c in COLUMNS}
+    result = {c: np.concatenate([p[c] for p in parts]) for c in COLUMNS}
+
+    mask = np.ones(len(result["y"]), dtype=bool)
+    if ticker:
+        mask &= result["ticker"] == ticker
+    if series:
+        mask &= result["series"] == series
+    if not mask.all():
+        result = {c: v[mask] for c, v in result.items()}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract report series into a columnar dataset.")
+    parser.add_argument("download_folder")
+    parser.add_argument("dataset_folder")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--date", help="Only reports of this day (YYYYMMDD)")
+    args = parser.parse_args(argv)
+    extract_folder(args.download_folder, args.dataset_folder, args.processes, args.date)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
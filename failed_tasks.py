@@ -0,0 +1,85 @@
+import json
+import os
+from datetime import datetime
+
+FAILED_TASKS_PATH = "failed_tasks.json"
+
+
+def task_key(task):
+    return (task["platform"], task["model"], task["ticker"])
+
+
+def job_task_keys(tickers, models, cme_tickers, cme_models):
+    """Returns the set of (platform, model, ticker) covered by a full job."""
+    keys = {("std", m, t) for m in models for t in tickers}
+    keys |= {("cme", m, t) for m in cme_models for t in cme_tickers}
+    return keys
+
+
+def load_failed_tasks(path=FAILED_TASKS_PATH):
+    """
+    Loads the persisted failed-task queue. Returns [] if there is none (or it is unreadable).
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [t for t in data.get("tasks", []) if all(k in t for k in ("platform", "model", "ticker"))]
+    except Exception:
+        return []
+
+
+def save_failed_tasks(tasks, path=FAILED_TASKS_PATH):
+    """
+    Writes the failed-task queue atomically (temp file + rename), so a crash mid-write
+    never leaves a truncated queue behind. An empty queue removes the file.
+    """
+    if not tasks:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    data = {
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "tasks": tasks
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def merge_failed_tasks(existing, new_failures, attempted_keys=()):
+    """
+    Reconciles the persisted queue with the outcome of a job.
+    - Existing tasks whose key was attempted by the job are resolved by it: they are dropped
+      if they succeeded, or replaced by the new failure otherwise.
+    - New failures are deduplicated by (platform, model, ticker); attempts add up across runs
+      and first_failed_at keeps the time of the first failure.
+    """
+    attempted_keys = set(attempted_keys)
+    previous = {task_key(t): t for t in existing}
+    merged = {}
+
+    for key, task in previous.items():
+        if key not in attempted_keys:
+            merged[key] = task
+
+    seen = set()
+    for task in new_failures:
+        key = task_key(task)
+        if key in seen:
+            continue
+        seen.add(key)
+        task = dict(task)
+        task.setdefault("failed_at", datetime.now().isoformat(timespec="seconds"))
+        old = merged.get(key) or previous.get(key)
+        if old:
+            task["attempts"] = task.get("attempts", 0) + old.get("attempts", 0)
+            task["first_failed_at"] = old.get("first_failed_at") or old.get("failed_at") or task["failed_at"]
+        else:
+            task["first_failed_at"] = task["failed_at"]
+        merged[key] = task
+
+    return list(merged.values())
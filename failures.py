@@ -0,0 +1,133 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+
+class ScrapeError(Exception):
+    """Base class for a failed ticker attempt. failure_class is stored with failure records."""
+    failure_class = "error"
+
+
+class ServerBusyError(ScrapeError):
+    """The platform answered with a "獲取數據失敗" / "Please Try Again" toast (or HTTP 429/5xx)."""
+    failure_class = "server_busy"
+
+
+class StaleDataError(ScrapeError):
+    """The page kept showing content that does not belong to the requested ticker."""
+    failure_class = "stale_data"
+
+
+class ClickIgnoredError(ScrapeError):
+    """Neither the loading screen nor new data appeared after clicking "Enter"."""
+    failure_class = "click_ignored"
+
+
+class ScrapeTimeoutError(ScrapeError):
+    """Waiting for data, a download or a response timed out."""
+    failure_class = "timeout"
+
+
+class PageCrashedError(ScrapeError):
+    """The page (or its browser/context) crashed or was closed. The page must be reopened."""
+    failure_class = "page_crashed"
+
+
+class SessionExpiredError(ScrapeError):
+    """The saved session is no longer valid. Retrying will not help until the user logs in again."""
+    failure_class = "session_expired"
+
+
+PAGE_CRASH_MARKERS = ("Target page, context or browser has been closed", "Target closed", "Page crashed", "crashed")
+
+
+def classify_exception(e):
+    """
+    Maps any exception raised during an attempt to a ScrapeError subclass instance.
+    """
+    if isinstance(e, ScrapeError):
+        return e
+    message = str(e)
+    if isinstance(e, asyncio.TimeoutError) or type(e).__name__ == "TimeoutError":
+        return ScrapeTimeoutError(message)
+    if any(marker in message for marker in PAGE_CRASH_MARKERS):
+        return PageCrashedError(message)
+    return ScrapeError(message)
+
+
+class RetryPolicy:
+    """
+    Retry budget for one failure class, with exponential backoff and jitter.
+    """
+    def __init__(self, max_attempts, base_delay, max_delay):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Backoff before the next try, after `attempt` (1-based) failures of this class."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # "Equal jitter": keep half of the delay, randomize the other half
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+# Overall attempt cap per ticker (the previous flat retry count)
+MAX_TOTAL_ATTEMPTS = 15
+
+RETRY_POLICIES = {
+    "server_busy": RetryPolicy(max_attempts=8, base_delay=2.0, max_delay=30.0),
+    "stale_data": RetryPolicy(max_attempts=6, base_delay=1.0, max_delay=10.0),
+    "click_ignored": RetryPolicy(max_attempts=6, base_delay=0.5, max_delay=5.0),
+    "timeout": RetryPolicy(max_attempts=4, base_delay=2.0, max_delay=20.0),
+    "page_crashed": RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=5.0),
+    "session_expired": RetryPolicy(max_attempts=1, base_delay=0.0, max_delay=0.0),
+    "error": RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=15.0),
+}
+
+
+class CircuitBreaker:
+    """
+    Per-platform breaker. When server-busy failures spike (threshold within window seconds),
+    the circuit opens and every worker of the platform pauses before its next attempt.
+    Consecutive trips double the pause (up to max_cooldown); a success resets it.
+    """
+    def __init__(self, name, logger_func=print, threshold=5, window=30.0, cooldown=20.0, max_cooldown=300.0):
+        self.name = name
+        self.log = logger_func
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.events = deque()
+        self.open_until = 0.0
+        self.trips = 0
+
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def record_server_busy(self):
+        now = time.monotonic()
+        self.events.append(now)
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+
+        if len(self.events) >= self.threshold and not self.is_open():
+            self.trips += 1
+            pause = min(self.max_cooldown, self.cooldown * (2 ** (self.trips - 1)))
+            self.open_until = now + pause
+            self.events.clear()
+            self.log(f"[{self.name}] Circuit open: {self.threshold} server-busy failures within {self.window:.0f}s. Pausing all workers for {pause:.0f}s.")
+
+    def record_success(self):
+        if not self.is_open():
+            self.trips = 0
+
+    async def wait(self, should_stop=lambda: False):
+        """Blocks while the circuit is open (checking should_stop every second)."""
+        while not should_stop():
+            remaining = self.open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 1.0))
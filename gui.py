@@ -4,15 +4,39 @@ from tkinter import filedialog
 import threading
 import asyncio
 import os
-from datetime import datetime
-from scraper import LietaScraper
+from collections import deque
+from datetime import datetime, timedelta
+from scraper import LietaScraper, STD_PLATFORM_URL, CME_PLATFORM_URL, STD_MODELS, CME_MODELS
+from service import ScraperService
+from sharding import ShardedJob, scraper_from_options
 import utils
+from failed_tasks import load_failed_tasks, save_failed_tasks, merge_failed_tasks, job_task_keys
+from tvcodes import TvCodeStore
+from catalog import FileCatalog
+from virtual_list import VirtualCheckList
+from runlog import RunLogWriter
 # from scraper import LietaScraper
 
+# Console: lines kept in the text box (older ones are only in the run's log file),
+# how often queued messages are drawn, and how many may wait for the next draw
+CONSOLE_MAX_LINES = 2000
+CONSOLE_FLUSH_MS = 50
+CONSOLE_MAX_PENDING = 5000
+
 class LietaApp(ctk.CTk):
     def __init__(self):
         super().__init__()
 
+        # Console messages from any thread wait here and are drawn in batches (see flush_console)
+        self.console_pending = deque()
+        self.console_lines = 0
+        self.console_trimmed = 0
+        self.console_dropped = 0
+        self.console_collapsed = 0
+        self.console_last_message = None
+        self.console_repeats = 0
+        self.run_log = None # Background writer of the current run's log (see runlog.py)
+
         # Configure window
         self.title("Lieta Research Scraper")
         self.geometry(f"{900}x{600}")
@@ -30,8 +54,16 @@ class LietaApp(ctk.CTk):
         
         self.current_log_file = None
         self.last_run_date = None
-        self.last_failed_tasks = []  # Store failed tasks for retry
+        # Failed tasks for retry, persisted in failed_tasks.json so they survive a restart
+        self.last_failed_tasks = load_failed_tasks()
+        if self.last_failed_tasks:
+            self.btn_retry.configure(state="normal")
+            self.log(f"Loaded {len(self.last_failed_tasks)} failed items from the last session. You can Retry Failed items.")
+        self.service = None # Warm scraper service (created on first use when "Keep Browser Warm" is on)
+        self.service_lock = threading.Lock()
+        self.last_warm_date = None
         self.check_schedule()
+        self.after(CONSOLE_FLUSH_MS, self.flush_console)
 
     def check_schedule(self):
         """Checks every 10s if we need to run the scheduled task."""
@@ -43,6 +75,10 @@ class LietaApp(ctk.CTk):
             
             target_time = self.entry_time.get()
             
+            # Warm the browser up to 2 minutes ahead of the scheduled run
+            if 0 <= day_index <= 4 and self.var_keep_warm.get():
+                self.maybe_warm_up(now, target_time)
+
             # Check: Mon-Fri (0-4), Time matches (within this minute), and haven't run today
             if 0 <= day_index <= 4 and current_time == target_time:
                 today_str = now.strftime("%Y-%m-%d")
@@ -55,6 +91,41 @@ class LietaApp(ctk.CTk):
                         self.log("Skipping Schedule: Job already running.")
         
         self.after(10000, self.check_schedule)
+
+    def maybe_warm_up(self, now, target_time):
+        """Starts the warm service (browser, session, model pages) shortly before the scheduled run."""
+        try:
+            target = datetime.combine(now.date(), datetime.strptime(target_time, "%H:%M").time())
+        except ValueError:
+            return
+        seconds_left = (target - now).total_seconds()
+        today_str = now.strftime("%Y-%m-%d")
+        if not (0 < seconds_left <= 120) or self.last_warm_date == today_str or self.btn_start.cget("state") == "disabled":
+            return
+
+        self.last_warm_date = today_str
+        queues = []
+        if self.ticker_filepath:
+            queues += [(STD_PLATFORM_URL, m) for m, var in self.model_vars.items() if var.get() != "off"]
+        if self.cme_ticker_filepath:
+            queues += [(CME_PLATFORM_URL, m) for m, var in self.cme_model_vars.items() if var.get() != "off"]
+        scraper_options = self.get_scraper_options()
+        pages_per_model = int(self.var_pages_per_model.get())
+
+        self.log("Warming up browser for the scheduled run...")
+        threading.Thread(target=self._run_warm_up_thread, args=(scraper_options, queues, pages_per_model), daemon=True).start()
+
+    def _run_warm_up_thread(self, scraper_options, queues, pages_per_model):
+        try:
+            self.get_service().warm_up(scraper_options, queues, pages_per_model)
+        except Exception as e:
+            self.log_safe(f"Warm-up failed: {e}")
+
+    def get_service(self):
+        with self.service_lock:
+            if not self.service:
+                self.service = ScraperService(self.create_scraper, logger_func=self.log_safe)
+            return self.service
     
     def create_sidebar(self):
         self.sidebar_frame = ctk.CTkFrame(self, width=200, corner_radius=0)
@@ -87,6 +158,8 @@ class LietaApp(ctk.CTk):
         radio_brave.pack(side="right", padx=15)
         radio_chrome = ctk.CTkRadioButton(self.top_bar, text="Chrome", variable=self.var_browser, value="chrome", width=70)
         radio_chrome.pack(side="right", padx=5)
+        radio_chromium = ctk.CTkRadioButton(self.top_bar, text="Chromium", variable=self.var_browser, value="chromium", width=80)
+        radio_chromium.pack(side="right", padx=5)
         ctk.CTkLabel(self.top_bar, text="Browser:").pack(side="right", padx=5)
 
 
@@ -113,8 +186,7 @@ class LietaApp(ctk.CTk):
         self.range_std_models.pack(padx=10, pady=5, fill="x")
         
         self.model_vars = {}
-        standard_models = ["Gamma", "Delta", "Theta", "Term", "Smile", "Levels", "Table", "TV Code"] 
-        for i, model in enumerate(standard_models):
+        for i, model in enumerate(STD_MODELS):
             var = ctk.StringVar(value="off")
             chk = ctk.CTkCheckBox(self.range_std_models, text=model, variable=var, onvalue=model, offvalue="off", font=("", 12))
             chk.grid(row=i//2, column=i%2, sticky="w", padx=5, pady=5) # 2 columns
@@ -143,8 +215,7 @@ class LietaApp(ctk.CTk):
         self.range_cme_models.pack(padx=10, pady=5, fill="x")
 
         self.cme_model_vars = {}
-        cme_models = ["Gamma", "Delta", "Smile", "Term", "TV Code"]
-        for i, model in enumerate(cme_models):
+        for i, model in enumerate(CME_MODELS):
             var = ctk.StringVar(value="off")
             chk = ctk.CTkCheckBox(self.range_cme_models, text=model, variable=var, onvalue=model, offvalue="off", font=("", 12))
             chk.grid(row=i//2, column=i%2, sticky="w", padx=5, pady=5) # 2 columns
@@ -172,9 +243,86 @@ class LietaApp(ctk.CTk):
         self.chk_parallel = ctk.CTkSwitch(self.global_frame, text="Multi-window Mode (Scrape Std & CME in parallel)", variable=self.var_parallel)
         self.chk_parallel.grid(row=3, column=0, columnspan=2, padx=15, pady=5, sticky="w")
 
-        # Row 4: Schedule Section
+        # Row 4: Network Capture Switch
+        self.var_capture = ctk.BooleanVar(value=False)
+        self.chk_capture = ctk.CTkSwitch(self.global_frame, text="Network Capture Mode (save model data as JSON, skip chart rendering)", variable=self.var_capture)
+        self.chk_capture.grid(row=4, column=0, columnspan=2, padx=15, pady=5, sticky="w")
+
+        # Row 5: Lean Mode Switch
+        self.var_lean = ctk.BooleanVar(value=False)
+        self.chk_lean = ctk.CTkSwitch(self.global_frame, text="Lean Mode (headless, block images/fonts/analytics, no animations)", variable=self.var_lean)
+        self.chk_lean.grid(row=5, column=0, columnspan=2, padx=15, pady=5, sticky="w")
+
+        # Row 6: Adaptive Concurrency Switch and worker processes
+        self.concurrency_subframe = ctk.CTkFrame(self.global_frame, fg_color="transparent")
+        self.concurrency_subframe.grid(row=6, column=0, columnspan=2, sticky="ew", padx=15, pady=5)
+
+        self.var_adaptive = ctk.BooleanVar(value=False)
+        self.chk_adaptive = ctk.CTkSwitch(self.concurrency_subframe, text="Adaptive Concurrency (AIMD, pages opened are the upper bound)", variable=self.var_adaptive)
+        self.chk_adaptive.pack(side="left")
+
+        # Processes: shard the job across worker processes, one browser each
+        ctk.CTkLabel(self.concurrency_subframe, text="Processes:", font=("",12,"bold")).pack(side="left", padx=(20, 10))
+
+        self.var_processes = ctk.StringVar(value="1")
+        self.opt_processes = ctk.CTkOptionMenu(self.concurrency_subframe, values=["1", "2", "3", "4", "6", "8"], variable=self.var_processes, width=80)
+        self.opt_processes.pack(side="left")
+
+        # Order: model-major (one page per model) or ticker-major (enter a ticker once, cycle its models)
+        ctk.CTkLabel(self.concurrency_subframe, text="Order:", font=("",12,"bold")).pack(side="left", padx=(20, 10))
+
+        self.var_ordering = ctk.StringVar(value="Model-major")
+        self.opt_ordering = ctk.CTkOptionMenu(self.concurrency_subframe, values=["Model-major", "Ticker-major"], variable=self.var_ordering, width=120)
+        self.opt_ordering.pack(side="left")
+
+        # Row 7: Page Pool Size (pages per model sharing one ticker queue)
+        self.pool_subframe = ctk.CTkFrame(self.global_frame, fg_color="transparent")
+        self.pool_subframe.grid(row=7, column=0, columnspan=2, sticky="ew", padx=15, pady=5)
+
+        ctk.CTkLabel(self.pool_subframe, text="Pages per Model:", font=("",12,"bold")).pack(side="left", padx=(0, 10))
+
+        self.var_pages_per_model = ctk.StringVar(value="1")
+        self.opt_pages_per_model = ctk.CTkOptionMenu(self.pool_subframe, values=["1", "2", "3", "4", "6", "8"], variable=self.var_pages_per_model, width=80)
+        self.opt_pages_per_model.pack(side="left")
+
+        # Engine: drive a browser, or replay the data requests over HTTP (no browser)
+        ctk.CTkLabel(self.pool_subframe, text="Engine:", font=("",12,"bold")).pack(side="left", padx=(20, 10))
+
+        self.var_engine = ctk.StringVar(value="Browser")
+        self.opt_engine = ctk.CTkOptionMenu(self.pool_subframe, values=["Browser", "HTTP"], variable=self.var_engine, width=100)
+        self.opt_engine.pack(side="left")
+
+        # Keep one browser / session warm between jobs (schedule and retries skip the cold start)
+        self.var_keep_warm = ctk.BooleanVar(value=False)
+        self.chk_keep_warm = ctk.CTkSwitch(self.pool_subframe, text="Keep Browser Warm", variable=self.var_keep_warm)
+        self.chk_keep_warm.pack(side="left", padx=(20, 0))
+
+        # Resume: skip items the run manifest records as completed today
+        self.var_resume = ctk.BooleanVar(value=False)
+        self.chk_resume = ctk.CTkSwitch(self.pool_subframe, text="Resume (skip items done today)", variable=self.var_resume)
+        self.chk_resume.pack(side="left", padx=(20, 0))
+
+        # Row 8: Deduplicated Storage + Event Log + Failure Trace Switches
+        self.storage_subframe = ctk.CTkFrame(self.global_frame, fg_color="transparent")
+        self.storage_subframe.grid(row=8, column=0, columnspan=2, sticky="ew", padx=15, pady=5)
+
+        self.var_dedup = ctk.BooleanVar(value=False)
+        self.chk_dedup = ctk.CTkSwitch(self.storage_subframe, text="Deduplicated Storage (identical reports stored once)", variable=self.var_dedup)
+        self.chk_dedup.pack(side="left")
+
+        # Structured per-attempt events (JSONL) next to the run log
+        self.var_log_events = ctk.BooleanVar(value=False)
+        self.chk_log_events = ctk.CTkSwitch(self.storage_subframe, text="Event Log (JSONL)", variable=self.var_log_events)
+        self.chk_log_events.pack(side="left", padx=(20, 0))
+
+        # Screenshot + DOM + recent page events of items that fail all their attempts (see traces.py)
+        self.var_trace_failures = ctk.BooleanVar(value=False)
+        self.chk_trace_failures = ctk.CTkSwitch(self.storage_subframe, text="Failure Traces", variable=self.var_trace_failures)
+        self.chk_trace_failures.pack(side="left", padx=(20, 0))
+
+        # Row 9: Schedule Section
         self.schedule_subframe = ctk.CTkFrame(self.global_frame, fg_color="transparent")
-        self.schedule_subframe.grid(row=4, column=0, columnspan=2, sticky="ew", padx=15, pady=(5, 15))
+        self.schedule_subframe.grid(row=9, column=0, columnspan=2, sticky="ew", padx=15, pady=(5, 15))
         
         ctk.CTkLabel(self.schedule_subframe, text="Auto-Schedule (Mon-Fri):", font=("",12,"bold")).pack(side="left", padx=(0, 10))
         
@@ -258,6 +406,30 @@ class LietaApp(ctk.CTk):
             self.download_folder = path
             self.lbl_dl_path.configure(text=path)
             self.log(f"Selected download folder: {path}")
+            self.refresh_catalog()
+
+    def refresh_catalog(self):
+        """
+        Builds / reconciles the download folder's file catalog in the background, so the first
+        file viewer of the session does not pay for the one-time full index build.
+        """
+        folder = self.download_folder
+        if not folder or not os.path.exists(folder):
+            return
+
+        def build():
+            try:
+                catalog = FileCatalog(folder)
+                try:
+                    changes = catalog.reconcile()
+                finally:
+                    catalog.close()
+                if changes:
+                    self.log_safe(f"File catalog updated ({changes} changes).")
+            except Exception as e:
+                self.log_safe(f"File catalog update failed: {e}")
+
+        threading.Thread(target=build, daemon=True).start()
 
     def on_start(self):
         # Validation
@@ -288,27 +460,57 @@ class LietaApp(ctk.CTk):
             return
 
         parallel = self.var_parallel.get()
-        browser_type = self.var_browser.get()
+        pages_per_model = int(self.var_pages_per_model.get())
+        resume = self.var_resume.get()
+        processes = int(self.var_processes.get())
+        scraper_options = self.get_scraper_options()
 
         self.btn_start.configure(state="disabled")
         self.btn_retry.configure(state="disabled")
         self.btn_stop.configure(state="normal")
-        self.last_failed_tasks = [] # Clear previous failures
-        
+
         # Setup Logger for this run
-        os.makedirs("logs", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.current_log_file = os.path.join("logs", f"run_{timestamp}.log")
-        self.log(f"Starting job... (Std: {len(tickers)} tickers, CME: {len(cme_tickers)} tickers) Browser: {browser_type}")
+        self.start_run_log("run")
+        self.log(f"Starting job... (Std: {len(tickers)} tickers, CME: {len(cme_tickers)} tickers) Browser: {scraper_options['browser_type']}, Engine: {scraper_options['engine']}")
         self.log(f"Logging to: {self.current_log_file}")
         
-        threading.Thread(target=self._run_job_thread, args=(tickers, selected_models, cme_tickers, selected_cme_models, self.download_folder, parallel, browser_type), daemon=True).start()
+        threading.Thread(target=self._run_job_thread, args=(tickers, selected_models, cme_tickers, selected_cme_models, self.download_folder, parallel, pages_per_model, resume, processes, scraper_options), daemon=True).start()
+
+    def get_scraper_options(self):
+        """Reads the scraper settings from the UI (must be called on the main thread)."""
+        return {
+            "engine": self.var_engine.get(),
+            "browser_type": self.var_browser.get(),
+            "capture_mode": "network" if self.var_capture.get() else "download",
+            "lean": self.var_lean.get(),
+            "adaptive": self.var_adaptive.get(),
+            "keep_warm": self.var_keep_warm.get(),
+            "dedup": self.var_dedup.get(),
+            "trace_failures": "final" if self.var_trace_failures.get() else None,
+            "ordering": "ticker" if self.var_ordering.get() == "Ticker-major" else "model"
+        }
+
+    def create_scraper(self, scraper_options):
+        return scraper_from_options(scraper_options, logger_func=self.log_safe, event_func=self.log_event)
 
-    def _run_job_thread(self, tickers, models, cme_tickers, cme_models, download_folder, parallel, browser_type):
-        self.scraper_instance = LietaScraper(logger_func=self.log_safe, browser_type=browser_type)
+    def _run_job_thread(self, tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, processes, scraper_options):
         try:
-            # Fix: Run everything in one asyncio loop to preserve browser connection
-            self.last_failed_tasks = asyncio.run(self.scraper_instance.perform_full_job(tickers, models, cme_tickers, cme_models, download_folder, parallel))
+            if processes > 1:
+                # Sharded: one browser per worker process (the warm service is not used)
+                job = ShardedJob(scraper_options, processes, logger_func=self.log_safe, event_func=self.log_event)
+                self.scraper_instance = job
+                new_failures = job.run_job(tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, scraper_options["ordering"])
+            elif scraper_options["keep_warm"]:
+                # Warm service: reuses its event loop, browser and session across jobs
+                service = self.get_service()
+                self.scraper_instance = service
+                new_failures = service.run_job(scraper_options, tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, scraper_options["ordering"])
+            else:
+                self.scraper_instance = self.create_scraper(scraper_options)
+                # Fix: Run everything in one asyncio loop to preserve browser connection
+                new_failures = asyncio.run(self.scraper_instance.perform_full_job(tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, scraper_options["ordering"]))
+            # Items covered by this job are resolved by it; older failures outside it stay queued
+            self.store_failed_tasks(new_failures, job_task_keys(tickers, models, cme_tickers, cme_models))
         except Exception as e:
             self.log_safe(f"Job Critical Error: {e}")
         finally:
@@ -326,7 +528,7 @@ class LietaApp(ctk.CTk):
             self.btn_retry.configure(state="disabled")
             self.log("Job finished successfully.")
             
-        self.current_log_file = None
+        self.stop_run_log()
 
     
     def on_stop(self):
@@ -348,24 +550,33 @@ class LietaApp(ctk.CTk):
         self.btn_retry.configure(state="disabled")
         self.btn_stop.configure(state="normal")
 
-        browser_type = self.var_browser.get()
         parallel = self.var_parallel.get()
+        pages_per_model = int(self.var_pages_per_model.get())
+        processes = int(self.var_processes.get())
+        scraper_options = self.get_scraper_options()
         
         # Setup Logger for this run
-        os.makedirs("logs", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.current_log_file = os.path.join("logs", f"retry_{timestamp}.log")
-        self.log(f"Starting RETRY job... ({len(self.last_failed_tasks)} items) Browser: {browser_type}")
+        self.start_run_log("retry")
+        self.log(f"Starting RETRY job... ({len(self.last_failed_tasks)} items) Browser: {scraper_options['browser_type']}")
 
-        threading.Thread(target=self._run_retry_thread, args=(self.last_failed_tasks, self.download_folder, parallel, browser_type), daemon=True).start()
+        threading.Thread(target=self._run_retry_thread, args=(self.last_failed_tasks, self.download_folder, parallel, pages_per_model, processes, scraper_options), daemon=True).start()
 
-    def _run_retry_thread(self, failed_tasks, download_folder, parallel, browser_type):
-        self.scraper_instance = LietaScraper(logger_func=self.log_safe, browser_type=browser_type)
+    def _run_retry_thread(self, failed_tasks, download_folder, parallel, pages_per_model, processes, scraper_options):
         try:
             # Run retry job
             # returns new failed tasks (if any failed again)
-            new_failures = asyncio.run(self.scraper_instance.perform_retry_job(failed_tasks, download_folder, parallel))
-            self.last_failed_tasks = new_failures
+            if processes > 1:
+                job = ShardedJob(scraper_options, processes, logger_func=self.log_safe, event_func=self.log_event)
+                self.scraper_instance = job
+                new_failures = job.run_retry_job(failed_tasks, download_folder, parallel, pages_per_model, scraper_options["ordering"])
+            elif scraper_options["keep_warm"]:
+                service = self.get_service()
+                self.scraper_instance = service
+                new_failures = service.run_retry_job(scraper_options, failed_tasks, download_folder, parallel, pages_per_model, scraper_options["ordering"])
+            else:
+                self.scraper_instance = self.create_scraper(scraper_options)
+                new_failures = asyncio.run(self.scraper_instance.perform_retry_job(failed_tasks, download_folder, parallel, pages_per_model, scraper_options["ordering"]))
+            self.store_failed_tasks(new_failures, {(t["platform"], t["model"], t["ticker"]) for t in failed_tasks})
         except Exception as e:
             self.log_safe(f"Retry Job Critical Error: {e}")
         finally:
@@ -373,20 +584,105 @@ class LietaApp(ctk.CTk):
             self.after(0, self._job_finished)
 
 
+    def store_failed_tasks(self, new_failures, attempted_keys):
+        """Merges a job's failures into the persisted queue (deduplicated) and saves it."""
+        if new_failures is None:
+            # The job did not start: keep the queue as it is
+            return
+        self.last_failed_tasks = merge_failed_tasks(load_failed_tasks(), new_failures, attempted_keys)
+        try:
+            save_failed_tasks(self.last_failed_tasks)
+        except Exception as e:
+            self.log_safe(f"Failed to save failed tasks: {e}")
+
+    def start_run_log(self, prefix):
+        """Opens logs/<prefix>_<timestamp>.log (+ .jsonl events if enabled) for the run about to start."""
+        self.stop_run_log()
+        os.makedirs("logs", exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.current_log_file = os.path.join("logs", f"{prefix}_{timestamp}.log")
+        events_path = os.path.join("logs", f"{prefix}_{timestamp}.jsonl") if self.var_log_events.get() else None
+        self.run_log = RunLogWriter(self.current_log_file, events_path)
+
+    def stop_run_log(self):
+        """Writes the rest of the run's log and closes it."""
+        if self.run_log:
+            self.run_log.close()
+        self.run_log = None
+        self.current_log_file = None
+
     def log(self, message):
-        timestamp_str = datetime.now().strftime("[%H:%M:%S] ")
-        self.console.insert("end", timestamp_str + message + "\n")
-        self.console.see("end")
-        
-        if self.current_log_file:
+        now = datetime.now()
+        # Queued for the background writer: no file I/O on the Tk main thread
+        if self.run_log:
+            self.run_log.write(message, now)
+        self.queue_console(message, now)
+
+    def log_safe(self, message):
+        # Any thread: the file write and the console line are both only queued
+        self.log(message)
+
+    def queue_console(self, message, timestamp):
+        if len(self.console_pending) >= CONSOLE_MAX_PENDING:
+            # The UI is not keeping up: drop the oldest waiting line (it is in the log file)
             try:
-                with open(self.current_log_file, "a", encoding="utf-8") as f:
-                    f.write(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
-            except Exception:
+                self.console_pending.popleft()
+                self.console_dropped += 1
+            except IndexError:
                 pass
-        
-    def log_safe(self, message):
-        self.after(0, lambda: self.log(message))
+        self.console_pending.append((message, timestamp))
+
+    def flush_console(self):
+        """
+        Draws the queued console messages in one insert (every CONSOLE_FLUSH_MS), collapses
+        repeats of the same message and keeps at most CONSOLE_MAX_LINES lines.
+        """
+        try:
+            chunks = []
+            while self.console_pending:
+                message, timestamp = self.console_pending.popleft()
+                if message == self.console_last_message:
+                    self.console_repeats += 1
+                    self.console_collapsed += 1
+                    continue
+                if self.console_repeats:
+                    chunks.append(f"    (previous message repeated {self.console_repeats} more times)\n")
+                    self.console_repeats = 0
+                self.console_last_message = message
+                chunks.append(timestamp.strftime("[%H:%M:%S] ") + message + "\n")
+            if self.console_repeats:
+                chunks.append(f"    (previous message repeated {self.console_repeats} more times)\n")
+                self.console_repeats = 0
+
+            if chunks:
+                text = "".join(chunks)
+                self.console.insert("end", text)
+                self.console_lines += text.count("\n")
+                excess = self.console_lines - CONSOLE_MAX_LINES
+                if excess > 0:
+                    self.console.delete("1.0", f"{excess + 1}.0")
+                    self.console_lines -= excess
+                    self.console_trimmed += excess
+                self.console.see("end")
+                self.update_console_label()
+        finally:
+            self.after(CONSOLE_FLUSH_MS, self.flush_console)
+
+    def update_console_label(self):
+        notes = []
+        if self.console_trimmed or self.console_dropped:
+            notes.append(f"{self.console_trimmed + self.console_dropped} older lines only in the log file")
+        if self.console_collapsed:
+            notes.append(f"{self.console_collapsed} repeats collapsed")
+        text = f"Logs: ({', '.join(notes)})" if notes else "Logs:"
+        if self.console_label.cget("text") != text:
+            self.console_label.configure(text=text)
+
+    def log_event(self, event, **fields):
+        """Structured event sink of the scrapers (see LietaScraper.emit); any thread."""
+        run_log = self.run_log
+        if run_log:
+            run_log.event(event, **fields)
 
     def save_settings(self):
         import json
@@ -397,6 +693,18 @@ class LietaApp(ctk.CTk):
             "selected_models": [m for m, var in self.model_vars.items() if var.get() != "off"],
             "selected_cme_models": [m for m, var in self.cme_model_vars.items() if var.get() != "off"],
             "parallel": self.var_parallel.get(),
+            "pages_per_model": self.var_pages_per_model.get(),
+            "processes": self.var_processes.get(),
+            "ordering": self.var_ordering.get(),
+            "capture_network": self.var_capture.get(),
+            "engine": self.var_engine.get(),
+            "lean": self.var_lean.get(),
+            "adaptive": self.var_adaptive.get(),
+            "keep_warm": self.var_keep_warm.get(),
+            "resume": self.var_resume.get(),
+            "dedup": self.var_dedup.get(),
+            "log_events": self.var_log_events.get(),
+            "trace_failures": self.var_trace_failures.get(),
             "browser": self.var_browser.get(),
             "schedule_enabled": self.var_schedule_en.get(),
             "schedule_time": self.entry_time.get()
@@ -426,6 +734,7 @@ class LietaApp(ctk.CTk):
             if settings.get("download_folder"):
                 self.download_folder = settings["download_folder"]
                 self.lbl_dl_path.configure(text=self.download_folder)
+                self.refresh_catalog()
 
             if settings.get("selected_models"):
                 for m in settings["selected_models"]:
@@ -439,6 +748,42 @@ class LietaApp(ctk.CTk):
             
             if "parallel" in settings:
                 self.var_parallel.set(settings["parallel"])
+
+            if "pages_per_model" in settings:
+                self.var_pages_per_model.set(str(settings["pages_per_model"]))
+
+            if "processes" in settings:
+                self.var_processes.set(str(settings["processes"]))
+
+            if "ordering" in settings:
+                self.var_ordering.set(settings["ordering"])
+
+            if "capture_network" in settings:
+                self.var_capture.set(settings["capture_network"])
+
+            if "engine" in settings:
+                self.var_engine.set(settings["engine"])
+
+            if "lean" in settings:
+                self.var_lean.set(settings["lean"])
+
+            if "adaptive" in settings:
+                self.var_adaptive.set(settings["adaptive"])
+
+            if "keep_warm" in settings:
+                self.var_keep_warm.set(settings["keep_warm"])
+
+            if "resume" in settings:
+                self.var_resume.set(settings["resume"])
+
+            if "dedup" in settings:
+                self.var_dedup.set(settings["dedup"])
+
+            if "log_events" in settings:
+                self.var_log_events.set(settings["log_events"])
+
+            if "trace_failures" in settings:
+                self.var_trace_failures.set(settings["trace_failures"])
             
             if "browser" in settings:
                 self.var_browser.set(settings["browser"])
@@ -455,8 +800,9 @@ class LietaApp(ctk.CTk):
             
     def open_file_viewer(self):
         """
-        Opens a Toplevel window to list and open files downloaded today.
-        Optimized with filename string matching and SegmentedButton for model selection.
+        Opens a Toplevel window to list and open downloaded files (today by default).
+        Files come from the download folder's catalog (indexed by date); the list is virtualized
+        (only the visible rows exist as widgets) and the selection is kept per date and model.
         """
         if not hasattr(self, 'download_folder') or not self.download_folder or not os.path.exists(self.download_folder):
             import tkinter.messagebox
@@ -465,215 +811,169 @@ class LietaApp(ctk.CTk):
 
         # Create Window
         window = ctk.CTkToplevel(self)
-        window.title("Today's Downloaded Files")
+        window.title("Downloaded Files")
         window.geometry("700x600")
         window.attributes("-topmost", True) # Keep on top
 
-        # Fast Filtering: Use datestring in filename instead of os.stat
+        download_folder = self.download_folder
         today_str = datetime.now().strftime("%Y%m%d")
-        
-        # Grouping: grouped_files[model_name] = { ticker_name: (filepath, time_obj) }
-        grouped_files = {} 
-        files_found_count = 0
 
-        try:
-            for root, dirs, files in os.walk(self.download_folder):
-                 for file in files:
-                      # Check if file has today's date string (Fastest check)
-                      if today_str in file and file.endswith(('.html', '.txt', '.csv', '.pdf', '.png')):
-                          fp = os.path.join(root, file)
-                          
-                          try:
-                                # Parsing structure
-                                rel_path = os.path.relpath(fp, self.download_folder)
-                                parts = rel_path.split(os.sep)
-                                
-                                model_name = "Other"
-                                ticker_name = file # Default
-                                
-                                # Heuristics
-                                if parts[0] == "CME":
-                                    if len(parts) >= 3:
-                                        model_name = f"CME - {parts[1]}"
-                                        ticker_name = parts[2]
-                                    elif "TV Code" in parts or file.lower().startswith("tv_codes"):
-                                        model_name = "CME - TV Code"
-                                        ticker_name = f"File_{file}" # Unique key to keep all files
-                                else:
-                                    if len(parts) >= 2:
-                                        model_name = parts[0]
-                                        ticker_name = parts[1]
-                                    elif "TV Code" in parts or file.lower().startswith("tv_codes"): # Standard TV Code
-                                        model_name = "TV Code"
-                                        ticker_name = f"File_{file}"
-
-                                # Extract time from filename for sorting? 
-                                # Filename format: ..._YYYYMMDD_HHMMSS.ext
-                                # Regex extract HHMMSS
-                                try:
-                                    time_part = file.split(today_str + "_")[1].split(".")[0]
-                                    # Basic check if it looks like time
-                                    if len(time_part) >= 6:
-                                        dt_time = datetime.strptime(time_part[:6], "%H%M%S")
-                                    else:
-                                        dt_time = datetime.now() # Fallback
-                                except:
-                                    # Fallback to mtime if regex fails (slower but rare)
-                                    mnow = os.path.getmtime(fp)
-                                    dt_time = datetime.fromtimestamp(mnow)
-                                
-                                if model_name not in grouped_files:
-                                    grouped_files[model_name] = {}
-                                
-                                # Keep latest file for this ticker
-                                if ticker_name not in grouped_files[model_name] or dt_time > grouped_files[model_name][ticker_name][1]:
-                                    grouped_files[model_name][ticker_name] = (fp, dt_time)
-                                    
-                          except Exception:
-                              pass
-        except Exception as e:
-            self.log_safe(f"Error scanning files: {e}")
-
-        # Flatten for count
-        total_files = sum(len(v) for v in grouped_files.values())
-        
-        # Sort models
-        sorted_models = sorted(grouped_files.keys())
-        if not sorted_models:
-             sorted_models = ["No Data"]
+        # Indexed lookup in the folder's file catalog. The window opens with what is indexed
+        # already; reconcile() (listing the directories changed since the last scan, e.g. files
+        # added by hand) runs in a worker thread and the list is refreshed when it is done
+        def catalog_dates():
+            dates = []
+            try:
+                catalog = FileCatalog(download_folder)
+                try:
+                    dates = catalog.dates(limit=60)
+                finally:
+                    catalog.close()
+            except Exception as e:
+                self.log_safe(f"Error scanning files: {e}")
+            if today_str not in dates:
+                dates.insert(0, today_str)
+            return dates
+        dates = catalog_dates()
+
+        # View state, kept outside the widgets:
+        # grouped[model_name] = { ticker_name: (filepath, time_obj) } for the current date,
+        # rows_cache[(date, model)] = [(key, label, payload)], selections[(date, model)] = {key}
+        view = {"date": today_str, "grouped": {}, "scanning": True}
+        rows_cache = {}
+        selections = {}
 
         # --- UI UI UI ---
         
-        # 1. Top Bar: Model Selector (Segmented Button)
+        # 1. Top Bar: Date + Model Selector (Segmented Button) + Search
         top_frame = ctk.CTkFrame(window, fg_color="transparent")
         top_frame.pack(fill="x", padx=20, pady=(15, 5))
-        
-        ctk.CTkLabel(top_frame, text=f"Found {total_files} files (Today)", font=("", 14, "bold")).pack(anchor="w", padx=5)
+
+        header = ctk.CTkFrame(top_frame, fg_color="transparent")
+        header.pack(fill="x")
+        lbl_count = ctk.CTkLabel(header, text="", font=("", 14, "bold"))
+        lbl_count.pack(side="left", padx=5)
+        date_menu = ctk.CTkOptionMenu(header, values=[f"{d[:4]}-{d[4:6]}-{d[6:]}" for d in dates], width=130,
+                                      command=lambda v: load_date(v.replace("-", "")))
+        date_menu.pack(side="right", padx=5)
 
         # Segmented Button
         # Logic: If too many models, might look crowded. But usually ~5-10 models max.
-        self.seg_models = ctk.CTkSegmentedButton(top_frame, values=sorted_models, command=lambda v: update_list(v))
+        self.seg_models = ctk.CTkSegmentedButton(top_frame, values=["No Data"], command=lambda v: show_model(v))
         self.seg_models.pack(pady=10, fill="x")
-        if sorted_models[0] != "No Data":
-            self.seg_models.set(sorted_models[0]) # Select first
 
-        # 2. List Area
-        scroll_frame = ctk.CTkScrollableFrame(window, width=640, height=400)
-        scroll_frame.pack(fill="both", expand=True, padx=20, pady=5)
-        
-        file_vars = [] # (BooleanVar, filepath)
+        entry_search = ctk.CTkEntry(top_frame, placeholder_text="Search ticker...")
+        entry_search.pack(fill="x", padx=5)
+        entry_search.bind("<KeyRelease>", lambda e: file_list.set_filter(entry_search.get()))
 
-        def update_list(selected_model):
-            # Clear existing
-            for widget in scroll_frame.winfo_children():
-                widget.destroy()
-            file_vars.clear()
-            
-            if selected_model == "No Data" or selected_model not in grouped_files:
-                ctk.CTkLabel(scroll_frame, text="No files found.", text_color="gray").pack(pady=50)
-                return
+        # 2. List Area
+        file_list = VirtualCheckList(window, width=640, height=400, on_change=lambda: update_open_button())
+        file_list.pack(fill="both", expand=True, padx=20, pady=5)
 
-            tickers = grouped_files[selected_model]
-            
-            # Special Handling for TV Code categories
+        def load_date(date_str, keep_model=False):
+            grouped = {}
+            try:
+                catalog = FileCatalog(download_folder)
+                try:
+                    records = catalog.files(date=date_str)
+                finally:
+                    catalog.close()
+
+                for record in records:
+                    model_name = f"CME - {record['model']}" if record["platform"] == "cme" else record["model"]
+                    # TV Code files have no ticker folder: unique key to keep all files
+                    ticker_name = record["ticker"] or f"File_{record['name']}"
+                    # Keep latest file for this ticker (records are oldest first)
+                    grouped.setdefault(model_name, {})[ticker_name] = (record["full_path"], datetime.strptime(record["time"], "%H%M%S"))
+            except Exception as e:
+                self.log_safe(f"Error scanning files: {e}")
+
+            view["date"] = date_str
+            view["grouped"] = grouped
+            total_files = sum(len(v) for v in grouped.values())
+            day_label = "Today" if date_str == today_str else f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+            scanning = " - scanning folder..." if view["scanning"] else ""
+            lbl_count.configure(text=f"Found {total_files} files ({day_label}){scanning}")
+
+            # Sort models (a refresh keeps the model shown if it still has files)
+            sorted_models = sorted(grouped.keys()) or ["No Data"]
+            selected = self.seg_models.get() if keep_model and self.seg_models.get() in grouped else sorted_models[0]
+            self.seg_models.configure(values=sorted_models)
+            self.seg_models.set(selected)
+            show_model(selected)
+
+        def model_rows(selected_model):
+            """(key, label, payload) rows of one model for the current date, built once per viewer."""
+            cache_key = (view["date"], selected_model)
+            if cache_key in rows_cache:
+                return rows_cache[cache_key]
+
+            tickers = view["grouped"].get(selected_model, {})
             if "TV Code" in selected_model:
-                # 1. Collect all files and sort by time (Oldest -> Newest) so latest overwrites earlier
-                tv_files = []
-                for file_key in tickers:
-                    fp, dt_obj = tickers[file_key]
-                    tv_files.append((dt_obj, fp))
-                
-                tv_files.sort(key=lambda x: x[0]) # Sort by datetime ascending
-
-                merged_tv_items = {} # ticker -> content (Last one wins)
-
+                # Special Handling for TV Code categories: query the indexed TV Code store
+                # (latest line per ticker of the day) instead of re-reading the text files
+                platform = "cme" if selected_model.startswith("CME") else "std"
+                day = datetime.strptime(view["date"], "%Y%m%d")
+                store = TvCodeStore()
                 try:
-                    for _, fp in tv_files:
-                        try:
-                            with open(fp, "r", encoding="utf-8") as f:
-                                lines = f.readlines()
-                            
-                            for line in lines:
-                                line = line.strip()
-                                if not line: continue
-                                
-                                # Heuristic to extract Ticker
-                                ticker_label = "Unknown"
-                                if '"' in line:
-                                    parts_q = line.split('"')
-                                    if len(parts_q) > 1:
-                                        ticker_label = parts_q[1]
-                                else:
-                                    # Fallback: First word
-                                    ticker_label = line.split(' ')[0].replace(":", "")
-                                
-                                merged_tv_items[ticker_label] = line
-                        except Exception as e:
-                            print(f"Error reading {fp}: {e}")
-
-                    if not merged_tv_items:
-                         ctk.CTkLabel(scroll_frame, text="No content found in TV Code files.", text_color="gray").pack(pady=20)
-
-                    # Display Unique Tickers (Sorted)
-                    for t_label in sorted(merged_tv_items.keys()):
-                        content = merged_tv_items[t_label]
-                        var = ctk.BooleanVar(value=False)
-                        
-                        # Container (Compact: just the checkbox line)
-                        # chk = ctk.CTkCheckBox(scroll_frame, text=f"{t_label}", variable=var, font=("", 14, "bold"), width=100)
-                        # chk.pack(anchor="w", padx=20, pady=2, fill="x")
-
-                        # Using a Frame to keep alignment consistent if we add more info later, but for now just Checkbox is fine.
-                        # Actually let's use the frame for margin consistecy with previous code style
-                        item_frame = ctk.CTkFrame(scroll_frame, fg_color="transparent")
-                        item_frame.pack(fill="x", pady=2)
-
-                        chk = ctk.CTkCheckBox(item_frame, text=f"{t_label}", variable=var, font=("Consolas", 14, "bold"), width=100)
-                        chk.pack(anchor="w", padx=10)
-
-                        file_vars.append((var, ("TV_DATA", t_label, content)))
-                        
-                except Exception as e:
-                     ctk.CTkLabel(scroll_frame, text=f"Error processing TV Code files: {e}", text_color="red").pack(pady=10)
+                    # Files written before the store existed are imported once
+                    for fp, _ in tickers.values():
+                        store.import_file(fp, platform)
+                    records = store.latest(platform, since=day.strftime("%Y-%m-%d"),
+                                           until=(day + timedelta(days=1)).strftime("%Y-%m-%d"))
+                finally:
+                    store.close()
+                rows = [(r["ticker"], r["ticker"], ("TV_DATA", r["ticker"], r["raw"])) for r in records]
+            else:
+                # Normal Files, sorted by Ticker Name
+                rows = []
+                for ticker in sorted(tickers.keys()):
+                    fp, dt_obj = tickers[ticker]
+                    rows.append((ticker, f"[{dt_obj.strftime('%H:%M:%S')}]  {ticker}", fp))
+
+            rows_cache[cache_key] = rows
+            return rows
+
+        def show_model(selected_model):
+            if selected_model == "No Data" or selected_model not in view["grouped"]:
+                file_list.set_rows([], set())
                 return
-
-            # Normal Files
-            # Sort by Ticker Name
-            for ticker in sorted(tickers.keys()):
-                fp, dt_obj = tickers[ticker]
-                time_str = dt_obj.strftime('%H:%M:%S')
-                
-                var = ctk.BooleanVar(value=False)
-                
-                # Simple clean format
-                chk = ctk.CTkCheckBox(scroll_frame, text=f"[{time_str}]  {ticker}", variable=var, font=("Consolas", 14), height=30, width=500)
-                chk.pack(anchor="w", padx=10, pady=2, fill="x")
-                file_vars.append((var, fp))
+            empty_text = "No content found in TV Code files." if "TV Code" in selected_model else "No files found."
+            try:
+                rows = model_rows(selected_model)
+            except Exception as e:
+                rows, empty_text = [], f"Error processing TV Code files: {e}"
+            file_list.set_rows(rows, selections.setdefault((view["date"], selected_model), set()), empty_text)
+
+        def selected_payloads():
+            """Selected items of every model / date shown in this viewer."""
+            payloads = []
+            for cache_key, keys in selections.items():
+                if keys:
+                    payloads += [payload for key, _, payload in rows_cache.get(cache_key, []) if key in keys]
+            return payloads
+
+        def update_open_button():
+            count = sum(len(keys) for keys in selections.values())
+            btn_open.configure(text=f"Open Selected ({count})" if count else "Open Selected")
 
         # 3. Bottom Actions
         btn_frame = ctk.CTkFrame(window, fg_color="transparent")
         btn_frame.pack(pady=15, fill="x")
 
-        def select_all():
-             for v, _ in file_vars: v.set(True)
-
-        def deselect_all():
-             for v, _ in file_vars: v.set(False)
-
         def open_selected():
             tv_data_to_show = []
             
-            for v, data in file_vars:
-                if v.get():
-                    try:
-                        if isinstance(data, tuple) and data[0] == "TV_DATA":
-                            # Collect TV Data for aggregation
-                            tv_data_to_show.append(data)
-                        else:
-                            # Normal file path - open immediately
-                            self.open_file_cross_platform(data)
-                    except Exception as e:
-                        print(f"Error opening item: {e}")
+            for data in selected_payloads():
+                try:
+                    if isinstance(data, tuple) and data[0] == "TV_DATA":
+                        # Collect TV Data for aggregation
+                        tv_data_to_show.append(data)
+                    else:
+                        # Normal file path - open immediately
+                        self.open_file_cross_platform(data)
+                except Exception as e:
+                    print(f"Error opening item: {e}")
             
             # Handle aggregated TV Data
             if tv_data_to_show:
@@ -707,13 +1007,36 @@ class LietaApp(ctk.CTk):
                 except Exception as e:
                     print(f"Error creating aggregate TV file: {e}")
 
-        ctk.CTkButton(btn_frame, text="Select All", command=select_all, width=120).pack(side="left", padx=20)
-        ctk.CTkButton(btn_frame, text="Deselect All", command=deselect_all, width=120).pack(side="left", padx=5)
-        ctk.CTkButton(btn_frame, text="Open Selected", command=open_selected, width=150, fg_color="#2CC985", hover_color="#229C68", text_color="white").pack(side="right", padx=20)
+        ctk.CTkButton(btn_frame, text="Select All", command=lambda: file_list.set_all(True), width=120).pack(side="left", padx=20)
+        ctk.CTkButton(btn_frame, text="Deselect All", command=lambda: file_list.set_all(False), width=120).pack(side="left", padx=5)
+        btn_open = ctk.CTkButton(btn_frame, text="Open Selected", command=open_selected, width=150, fg_color="#2CC985", hover_color="#229C68", text_color="white")
+        btn_open.pack(side="right", padx=20)
+
+        def reconcile_done():
+            if not window.winfo_exists():
+                return
+            view["scanning"] = False
+            date_menu.configure(values=[f"{d[:4]}-{d[4:6]}-{d[6:]}" for d in catalog_dates()])
+            # Rows of the shown date are rebuilt from the updated catalog (selections are kept)
+            for cache_key in [k for k in rows_cache if k[0] == view["date"]]:
+                del rows_cache[cache_key]
+            load_date(view["date"], keep_model=True)
+
+        def reconcile():
+            try:
+                catalog = FileCatalog(download_folder)
+                try:
+                    catalog.reconcile()
+                finally:
+                    catalog.close()
+            except Exception as e:
+                self.log_safe(f"Error scanning files: {e}")
+            # Widgets are only touched from the Tk main thread
+            self.after(0, reconcile_done)
 
         # Init list
-        if sorted_models[0] != "No Data":
-            update_list(sorted_models[0])
+        load_date(today_str)
+        threading.Thread(target=reconcile, daemon=True).start()
 
     def open_file_cross_platform(self, filepath):
         import subprocess, sys, platform
@@ -732,6 +1055,9 @@ class LietaApp(ctk.CTk):
             self.save_settings()
         except:
             pass
+        if self.service:
+            self.service.shutdown()
+        self.stop_run_log()
         self.destroy()
 
 # Override init to load settings and protocol close
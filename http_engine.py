@@ -0,0 +1,391 @@
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import quote, quote_plus, unquote, unquote_plus, urlsplit
+
+import aiohttp
+
+from scraper import LietaScraper, BASE_URL
+from manifest import MANIFEST_PATH
+from failures import ServerBusyError, StaleDataError, ScrapeTimeoutError, SessionExpiredError
+
+# Endpoint templates keyed by platform ("std" / "cme") and model ("*" = any model).
+# Written by learn_endpoints() from Network Capture mode output, or by hand, e.g.:
+# {"std": {"*": {"method": "GET", "url": "/api/model?name={model}&ticker={ticker}", "post_data": null, "headers": {}}}}
+# Header values may reference the saved localStorage, e.g. "Authorization": "Bearer {ls[token]}"
+ENDPOINTS_PATH = "endpoints.json"
+
+SERVER_FAILURE_TEXTS = ("獲取數據失敗", "Please Try Again")
+
+
+def load_session_cookies(storage_state_path, host):
+    """
+    Builds a Cookie header value from a Playwright storage state file (state.json),
+    keeping only unexpired cookies whose domain matches host.
+    """
+    with open(storage_state_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+
+    now = time.time()
+    pairs = []
+    for cookie in state.get("cookies", []):
+        domain = cookie.get("domain", "").lstrip(".")
+        if domain and host != domain and not host.endswith("." + domain):
+            continue
+        # Playwright uses -1 for session cookies
+        expires = cookie.get("expires", -1)
+        if expires not in (-1, None) and expires < now:
+            continue
+        pairs.append(f"{cookie['name']}={cookie['value']}")
+    return "; ".join(pairs)
+
+
+def load_local_storage(storage_state_path, origin):
+    """
+    Returns the localStorage entries saved for origin as a dict.
+    """
+    with open(storage_state_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+
+    for entry in state.get("origins", []):
+        if entry.get("origin", "").rstrip("/") == origin.rstrip("/"):
+            return {item["name"]: item["value"] for item in entry.get("localStorage", [])}
+    return {}
+
+
+# Marks a placeholder inside a JSON body while it is re-serialized (private-use character)
+PLACEHOLDER_MARK = "\ue000"
+
+
+def template_value(value, model, ticker):
+    """Placeholder name for a whole parameter value equal to the ticker / model, else None."""
+    if value == ticker:
+        return "ticker"
+    if value == model:
+        return "model"
+    if value == model.lower():
+        return "model_lower"
+    return None
+
+
+def escape_braces(text):
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def template_pairs(text, model, ticker):
+    """
+    Templates the values of a "k=v&k=v" query string / form body. Pairs that do not match are
+    kept byte for byte (same encoding as captured).
+    """
+    pairs = []
+    for pair in text.split("&"):
+        key, sep, value = pair.partition("=")
+        name = template_value(unquote_plus(value), model, ticker) if sep else None
+        pairs.append(escape_braces(key) + sep + ("{%s}" % name if name else escape_braces(value)))
+    return "&".join(pairs)
+
+
+def template_json(value, model, ticker):
+    if isinstance(value, dict):
+        return {k: template_json(v, model, ticker) for k, v in value.items()}
+    if isinstance(value, list):
+        return [template_json(v, model, ticker) for v in value]
+    if isinstance(value, str):
+        name = template_value(value, model, ticker)
+        if name:
+            return PLACEHOLDER_MARK + name + PLACEHOLDER_MARK
+    return value
+
+
+def template_url(url, model, ticker):
+    """
+    Replaces path segments and query values equal to the model / ticker with {model} /
+    {model_lower} / {ticker} placeholders (literal braces are escaped for str.format).
+    Parts that merely contain the ticker (e.g. "ES" in "/api/ESG") are left alone.
+    """
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split("/"):
+        name = template_value(unquote(segment), model, ticker) if segment else None
+        segments.append("{%s}" % name if name else escape_braces(segment))
+    path = "/".join(segments)
+    return path + ("?" + template_pairs(parts.query, model, ticker) if parts.query else "")
+
+
+def template_request_text(text, model, ticker):
+    """
+    Templates a captured request body: JSON string fields / form values equal to the model or
+    ticker become {model} / {model_lower} / {ticker} placeholders. Any other body is only escaped
+    (it has no known parameter positions). See build_request() for how each kind is filled in.
+    """
+    if text is None:
+        return None
+    if text.lstrip().startswith(("{", "[")):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return escape_braces(text)
+        text = escape_braces(json.dumps(template_json(data, model, ticker), ensure_ascii=False, separators=(",", ":")))
+        return re.sub(f"{PLACEHOLDER_MARK}(\\w+){PLACEHOLDER_MARK}", r"{\1}", text)
+    if "=" in text:
+        return template_pairs(text, model, ticker)
+    return escape_braces(text)
+
+
+def endpoint_from_capture(record):
+    """
+    Turns a Network Capture record (see LietaScraper.save_data_record) into an endpoint template.
+    Returns None if the ticker is not at a known parameter position (the request cannot be replayed).
+    """
+    parts = urlsplit(record["url"])
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    endpoint = {
+        "method": record.get("method") or "GET",
+        "url": template_url(path, record["model"], record["ticker"]),
+        "post_data": template_request_text(record.get("post_data"), record["model"], record["ticker"]),
+        "headers": {}
+    }
+    if "{ticker}" not in endpoint["url"] and "{ticker}" not in (endpoint["post_data"] or ""):
+        return None
+    return endpoint
+
+
+def learn_endpoints(download_folder, path=ENDPOINTS_PATH):
+    """
+    Scans download_folder for Network Capture JSON files and writes one endpoint template
+    per (platform, model) to path. Returns the endpoints dict.
+    """
+    endpoints = {}
+    latest = {}
+    for root, dirs, files in os.walk(download_folder):
+        for file in files:
+            if not file.endswith(".json"):
+                continue
+            fp = os.path.join(root, file)
+            try:
+                with open(fp, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+                key = (record["platform"], record["model"])
+                if key in latest and latest[key] >= record["timestamp"]:
+                    continue
+                endpoint = endpoint_from_capture(record)
+                if endpoint is None:
+                    continue
+                endpoints.setdefault(record["platform"], {})[record["model"]] = endpoint
+                latest[key] = record["timestamp"]
+            except Exception:
+                # Not a capture record
+                pass
+
+    if endpoints:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(endpoints, f, ensure_ascii=False, indent=2)
+    return endpoints
+
+
+def request_values(model, ticker, encode):
+    """str.format() values of an endpoint template ({model_plus} is kept for hand-written templates)."""
+    return {"model": encode(model), "model_lower": encode(model.lower()), "ticker": encode(ticker),
+            "model_plus": quote_plus(model)}
+
+
+def find_tv_line(data, ticker):
+    """
+    Searches a (nested) JSON payload for a text line containing both the ticker and "Put Wall".
+    """
+    if isinstance(data, str):
+        for line in data.split("\n"):
+            if ticker in line and "Put Wall" in line:
+                return line
+        return None
+    if isinstance(data, dict):
+        data = list(data.values())
+    if isinstance(data, list):
+        for item in data:
+            line = find_tv_line(item, ticker)
+            if line:
+                return line
+    return None
+
+
+class LietaHttpScraper(LietaScraper):
+    """
+    Browserless engine. Replays the platform's data requests with one pooled keep-alive
+    aiohttp session authenticated by the cookies in state.json, with bounded concurrency.
+    Outputs (JSON records, TV codes) and the structured failure list match LietaScraper,
+    so the same Retry flow applies.
+    """
+    def __init__(self, logger_func=print, base_url=BASE_URL, endpoints_path=ENDPOINTS_PATH, concurrency=8, adaptive=False, manifest_path=MANIFEST_PATH):
+        super().__init__(logger_func=logger_func, capture_mode="network", adaptive=adaptive, manifest_path=manifest_path)
+        self.base_url = base_url.rstrip("/")
+        self.endpoints_path = endpoints_path
+        self.concurrency = concurrency
+
+        self.session = None
+        self.semaphore = None
+        self.endpoints = {}
+        self.local_storage = {}
+        # Download folders already scanned for capture records this job (nothing is re-walked per queue)
+        self.learned_folders = set()
+
+    async def start_browser(self, headless=True):
+        """
+        No browser here: opens the pooled HTTP session instead.
+        """
+        host = urlsplit(self.base_url).hostname or ""
+        headers = {"Accept": "application/json, text/plain, */*"}
+        if os.path.exists(self.storage_state_path):
+            cookie = load_session_cookies(self.storage_state_path, host)
+            if cookie:
+                headers["Cookie"] = cookie
+            self.local_storage = load_local_storage(self.storage_state_path, self.base_url)
+
+        if os.path.exists(self.endpoints_path):
+            with open(self.endpoints_path, "r", encoding="utf-8") as f:
+                self.endpoints = json.load(f)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        # Cookies come from state.json; a dummy jar keeps the header stable for the whole run
+        self.session = aiohttp.ClientSession(
+            base_url=self.base_url,
+            headers=headers,
+            connector=connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.log(f"HTTP session opened ({self.base_url}, concurrency {self.concurrency}).")
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+        self.log("HTTP session closed.")
+
+    def reset_job_state(self, max_active=1):
+        super().reset_job_state(max_active)
+        self.learned_folders = set()
+
+    async def new_job_context(self):
+        if not self.session:
+            await self.start_browser()
+        return self.session
+
+    def max_active_slots(self, queue_count, parallel_mode, pages_per_model):
+        # Requests, not pages: the connection pool size is the upper bound
+        return self.concurrency
+
+    async def prewarm_model_pages(self, queues, pages_per_model=1):
+        # No pages to initialize: the warm session is enough
+        pass
+
+    async def run_ticker_groups(self, items, download_folder, parallel_mode, pages_per_model=1):
+        # Requests do not depend on page state: ticker-major ordering gains nothing here
+        return await self.run_task_groups(items, download_folder, parallel_mode, pages_per_model)
+
+    def endpoint_for(self, platform, model):
+        models = self.endpoints.get(platform, {})
+        return models.get(model) or models.get("*")
+
+    def build_request(self, endpoint, model, ticker):
+        """
+        Returns (method, url, body, headers) for one ticker from an endpoint template.
+        Values are encoded for where they go: the URL, a JSON body or a form body.
+        """
+        url = endpoint["url"].format(**request_values(model, ticker, lambda v: quote(v, safe="")))
+        body = None
+        template = endpoint.get("post_data")
+        if template:
+            if template.lstrip().startswith(("{", "[")):
+                # Inside JSON strings
+                body = template.format(**request_values(model, ticker, lambda v: json.dumps(v, ensure_ascii=False)[1:-1]))
+            elif "=" in template:
+                body = template.format(**request_values(model, ticker, quote_plus))
+            else:
+                body = template.format(**request_values(model, ticker, lambda v: v))
+        headers = {k: v.format(ls=self.local_storage) for k, v in (endpoint.get("headers") or {}).items()}
+        if body and body.lstrip().startswith(("{", "[")):
+            headers.setdefault("Content-Type", "application/json")
+        return endpoint.get("method", "GET").upper(), url, body, headers
+
+    async def process_model_queue(self, context, model, tickers, download_folder, tv_codes_list, target_url, subfolder_prefix="", pages_per_model=1):
+        """
+        Fetches all tickers of a model concurrently (bounded by the shared semaphore).
+        pages_per_model does not apply to this engine.
+        """
+        prefix_log = f"[CME-{model}]" if subfolder_prefix else f"[{model}]"
+        short_plat = "cme" if subfolder_prefix == "CME" else "std"
+
+        if not self.endpoints and download_folder not in self.learned_folders:
+            self.learned_folders.add(download_folder)
+            self.endpoints = learn_endpoints(download_folder, self.endpoints_path)
+
+        endpoint = self.endpoint_for(short_plat, model)
+        if not endpoint:
+            self.log(f"{prefix_log} No endpoint known. Run this model once in Network Capture mode first.")
+            for ticker in tickers:
+                self.record_failure(short_plat, model, ticker, "No endpoint", failure_class="error")
+            return
+
+        await asyncio.gather(*(
+            self.fetch_single_ticker(context, endpoint, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+            for ticker in tickers
+        ))
+
+    async def fetch_single_ticker(self, session, endpoint, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
+        short_plat = "cme" if subfolder_prefix == "CME" else "std"
+
+        async def attempt():
+            return await self.attempt_fetch(session, endpoint, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+
+        return await self.run_with_retries(short_plat, model, ticker, attempt)
+
+    async def attempt_fetch(self, session, endpoint, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
+        """
+        One HTTP attempt at one ticker. Returns the saved file path (True for TV Code) on success,
+        raises a failures.ScrapeError otherwise.
+        """
+        platform = "cme" if subfolder_prefix == "CME" else "std"
+        method, url, body, headers = self.build_request(endpoint, model, ticker)
+        try:
+            async with self.semaphore:
+                with self.metrics.phase(platform, model, "fetch"):
+                    async with session.request(method, url, data=body, headers=headers) as resp:
+                        status = resp.status
+                        text = await resp.text()
+        except asyncio.TimeoutError:
+            raise ScrapeTimeoutError(f"No response from {url} within 60s")
+        except aiohttp.ClientError as e:
+            raise ServerBusyError(f"Connection error: {e}")
+
+        if status in (401, 403):
+            raise SessionExpiredError(f"HTTP {status} from {url}")
+        if status >= 400:
+            raise ServerBusyError(f"Server indicated failure: HTTP {status}")
+        for failure_text in SERVER_FAILURE_TEXTS:
+            if failure_text in text:
+                raise ServerBusyError(f"Server indicated failure: {failure_text}")
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise ServerBusyError(f"Server indicated failure: Non-JSON payload from {url}")
+
+        if model == "TV Code":
+            line = find_tv_line(data, ticker)
+            if not line:
+                raise StaleDataError(f"Validation failed: No data found for ticker {ticker}")
+            tv_codes_list.append(line.strip('" '))
+            # The store keeps the line as received (its parser unquotes the ticker)
+            self.record_tv_code(subfolder_prefix, line)
+            self.log(f"[{model}] {ticker} - Code extracted.")
+            self.success_count += 1
+            return True
+
+        with self.metrics.phase(platform, model, "save"):
+            save_path = self.save_data_record(download_folder, subfolder_prefix, model, ticker, data, self.base_url + url, status, method, body)
+        self.log(f"[{model}] {ticker} - Fetched.")
+        self.success_count += 1
+        return save_path
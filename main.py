@@ -1,5 +1,6 @@
 import customtkinter as ctk
 import asyncio
+import multiprocessing
 import sys
 from gui import LietaApp
 
@@ -8,6 +9,8 @@ ctk.set_appearance_mode("Dark")  # Modes: "System" (standard), "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
 def main():
+    # Sharded jobs start worker processes (needed for frozen Windows builds)
+    multiprocessing.freeze_support()
     app = LietaApp()
     app.mainloop()
 
@@ -0,0 +1,118 @@
+import sqlite3
+import time
+from datetime import datetime
+
+MANIFEST_PATH = "run_manifest.db"
+
+
+class RunManifest:
+    """
+    Durable per-item progress of scraping runs (SQLite).
+    One row per (run date, platform, model, ticker), written as each item completes,
+    so an interrupted run can be resumed by skipping what already succeeded today.
+    """
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        # WAL + busy timeout: several jobs / processes may write at the same time
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                run_date TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                model TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                failure_class TEXT,
+                output_path TEXT,
+                started_at REAL,
+                finished_at REAL,
+                duration REAL,
+                PRIMARY KEY (run_date, platform, model, ticker)
+            )
+        """)
+        # One row per full job, to compare traversal orderings (model-major / ticker-major)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_date TEXT NOT NULL,
+                finished_at REAL NOT NULL,
+                ordering TEXT NOT NULL,
+                items INTEGER NOT NULL,
+                success INTEGER NOT NULL,
+                duration REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def today():
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def record(self, run_date, platform, model, ticker, status, attempts=0, failure_class=None, output_path=None, started_at=None):
+        """
+        Upserts the outcome of one item. A later success overwrites an earlier failure,
+        but a failure (e.g. from a stopped retry) never overwrites a success.
+        """
+        finished_at = time.time()
+        duration = finished_at - started_at if started_at else None
+        self.conn.execute("""
+            INSERT INTO items (run_date, platform, model, ticker, status, attempts, failure_class, output_path, started_at, finished_at, duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (run_date, platform, model, ticker) DO UPDATE SET
+                status = excluded.status,
+                attempts = items.attempts + excluded.attempts,
+                failure_class = excluded.failure_class,
+                output_path = COALESCE(excluded.output_path, items.output_path),
+                started_at = excluded.started_at,
+                finished_at = excluded.finished_at,
+                duration = excluded.duration
+            WHERE items.status != 'success' OR excluded.status = 'success'
+        """, (run_date, platform, model, ticker, status, attempts, failure_class, output_path, started_at, finished_at, duration))
+        self.conn.commit()
+
+    def completed_items(self, run_date):
+        """Returns the set of (platform, model, ticker) that succeeded on run_date."""
+        rows = self.conn.execute(
+            "SELECT platform, model, ticker FROM items WHERE run_date = ? AND status = 'success'", (run_date,)
+        )
+        return {tuple(row) for row in rows}
+
+    def summary(self, run_date):
+        """Returns {status: count} for run_date."""
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM items WHERE run_date = ? GROUP BY status", (run_date,))
+        return dict(rows.fetchall())
+
+    def record_run(self, run_date, ordering, items, success, duration):
+        self.conn.execute(
+            "INSERT INTO runs (run_date, finished_at, ordering, items, success, duration) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_date, time.time(), ordering, items, success, duration)
+        )
+        self.conn.commit()
+
+    def seconds_per_item(self, ordering, last=5):
+        """Average job seconds per successful item over the last `last` runs with this ordering (None if no runs)."""
+        rows = self.conn.execute(
+            "SELECT duration, success FROM runs WHERE ordering = ? AND success > 0 ORDER BY finished_at DESC LIMIT ?", (ordering, last)
+        ).fetchall()
+        if not rows:
+            return None
+        return sum(d for d, _ in rows) / sum(s for _, s in rows)
+
+    def item_durations(self, days=14):
+        """
+        Durations (first attempt to success) of the items that succeeded in the last `days` run dates.
+        Returns {(platform, model, ticker): [seconds]}, used by the job scheduler as cost estimates.
+        """
+        since = datetime.fromtimestamp(time.time() - days * 86400).strftime("%Y-%m-%d")
+        rows = self.conn.execute(
+            "SELECT platform, model, ticker, duration FROM items WHERE run_date >= ? AND status = 'success' AND duration IS NOT NULL",
+            (since,)
+        )
+        durations = {}
+        for platform, model, ticker, duration in rows:
+            durations.setdefault((platform, model, ticker), []).append(duration)
+        return durations
+
+    def close(self):
+        self.conn.close()
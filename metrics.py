@@ -0,0 +1,144 @@
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Per-run JSON files and the Prometheus textfile (node_exporter textfile collector) go here
+METRICS_DIR = "metrics"
+PROM_FILENAME = "lieta_scraper.prom"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class PhaseMetrics:
+    """
+    Latency samples per (platform, model, phase) for one job, e.g. open_page, select_model,
+    fill, enter, validate, render, download, save, capture, fetch, attempt and item
+    (a ticker from its first attempt to success), plus completed items for throughput.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.samples = {}   # (platform, model, phase) -> [seconds]
+        self.completed = {} # (platform, model) -> items done
+
+    def record(self, platform, model, phase, seconds):
+        self.samples.setdefault((platform, model, phase), []).append(seconds)
+
+    @contextmanager
+    def phase(self, platform, model, phase):
+        """Times the block as one sample of `phase` (also when it raises)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(platform, model, phase, time.perf_counter() - started)
+
+    def record_completion(self, platform, model):
+        key = (platform, model)
+        self.completed[key] = self.completed.get(key, 0) + 1
+
+    def merge(self, samples, completed):
+        """Adds another process's samples / completions (see sharding.py)."""
+        for key, values in samples.items():
+            self.samples.setdefault(tuple(key), []).extend(values)
+        for key, count in completed.items():
+            key = tuple(key)
+            self.completed[key] = self.completed.get(key, 0) + count
+
+    def summary(self):
+        """
+        {"elapsed": s, "groups": [{platform, model, completed, tickers_per_min,
+        phases: {phase: {count, mean, p50, p95, p99, max}}}]}, in seconds.
+        """
+        elapsed = max(time.time() - self.started, 1e-6)
+        groups = {}
+        for (platform, model, phase), values in self.samples.items():
+            values = sorted(values)
+            stats = {"count": len(values), "mean": sum(values) / len(values), "max": values[-1]}
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = percentile(values, q)
+            groups.setdefault((platform, model), {})[phase] = stats
+
+        result = []
+        for key in sorted(set(groups) | set(self.completed)):
+            completed = self.completed.get(key, 0)
+            result.append({
+                "platform": key[0],
+                "model": key[1],
+                "completed": completed,
+                "tickers_per_min": completed / (elapsed / 60),
+                "phases": groups.get(key, {})
+            })
+        return {"elapsed": elapsed, "groups": result}
+
+    def report_lines(self):
+        """Human-readable per-(platform, model) table for the job summary."""
+        lines = []
+        for group in self.summary()["groups"]:
+            lines.append(f"[{group['platform'].upper()} {group['model']}] {group['completed']} done, {group['tickers_per_min']:.1f} tickers/min")
+            for phase, stats in sorted(group["phases"].items(), key=lambda item: -item[1]["mean"] * item[1]["count"]):
+                lines.append(f"    {phase:<12} n={stats['count']:<5} p50 {stats['p50']:.2f}s  p95 {stats['p95']:.2f}s  p99 {stats['p99']:.2f}s")
+        return lines
+
+    def prometheus_text(self, labels=None):
+        """Prometheus text exposition format (summaries + a throughput gauge)."""
+        extra = "".join(f',{k}="{v}"' for k, v in (labels or {}).items())
+        summary = self.summary()
+        lines = [
+            "# HELP lieta_phase_seconds Latency of one scraping phase.",
+            "# TYPE lieta_phase_seconds summary"
+        ]
+        for group in summary["groups"]:
+            for phase, stats in sorted(group["phases"].items()):
+                base = f'platform="{group["platform"]}",model="{group["model"]}",phase="{phase}"{extra}'
+                for q in QUANTILES:
+                    lines.append(f'lieta_phase_seconds{{{base},quantile="{q}"}} {stats[f"p{int(q * 100)}"]:.6f}')
+                lines.append(f"lieta_phase_seconds_sum{{{base}}} {stats['mean'] * stats['count']:.6f}")
+                lines.append(f"lieta_phase_seconds_count{{{base}}} {stats['count']}")
+        lines += [
+            "# HELP lieta_tickers_per_minute Completed tickers per minute of the last job.",
+            "# TYPE lieta_tickers_per_minute gauge"
+        ]
+        for group in summary["groups"]:
+            lines.append(f'lieta_tickers_per_minute{{platform="{group["platform"]}",model="{group["model"]}"{extra}}} {group["tickers_per_min"]:.4f}')
+        job_labels = f"{{{extra.lstrip(',')}}}" if extra else ""
+        lines += [
+            "# HELP lieta_job_duration_seconds Duration of the last job.",
+            "# TYPE lieta_job_duration_seconds gauge",
+            f"lieta_job_duration_seconds{job_labels} {summary['elapsed']:.3f}",
+            "# HELP lieta_job_timestamp_seconds End time of the last job.",
+            "# TYPE lieta_job_timestamp_seconds gauge",
+            f"lieta_job_timestamp_seconds{job_labels} {time.time():.0f}"
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export(self, metrics_dir=METRICS_DIR, labels=None):
+        """
+        Writes metrics_dir/run_<timestamp>.json (kept, for trends over weeks) and overwrites
+        metrics_dir/lieta_scraper.prom atomically (for the textfile collector).
+        Returns the JSON path.
+        """
+        os.makedirs(metrics_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        json_path = os.path.join(metrics_dir, f"run_{timestamp}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(dict(self.summary(), finished_at=datetime.now().isoformat(timespec="seconds"), labels=labels or {}), f, indent=1)
+
+        prom_path = os.path.join(metrics_dir, PROM_FILENAME)
+        tmp_path = prom_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text(labels))
+        os.replace(tmp_path, prom_path)
+        return json_path
@@ -0,0 +1,299 @@
+"""
+Local stand-in for the Lieta platform pages, for benchmarks and regression runs without the
+live site (standard library only).
+
+/platform and /platform/cme mimic the real flow: "Select model", the Ticker input, "Enter",
+the "有些模型需要較長的時間計算" loading text, "獲取數據失敗" / "Please Try Again" toasts,
+stale previous-ticker content, the "下載" report download and "Put Wall" TV lines.
+Latency and failure rates are configurable.
+
+    python mock_platform.py --port 8765 --failure-rate 0.05
+"""
+import argparse
+import html
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from scraper import STD_MODELS, CME_MODELS
+
+PAGE_HTML = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Lieta Mock Platform</title>
+<style>
+body { font-family: sans-serif; margin: 20px; }
+.hidden { display: none; }
+.model-option { cursor: pointer; padding: 2px 8px; }
+td { padding: 0 6px; }
+</style></head>
+<body>
+<div>
+  <button id="model-btn">Select model</button> <span id="model-current"></span>
+  <div id="model-list" class="hidden"></div>
+  <input id="ticker" placeholder="Ticker">
+  <button id="enter">Enter</button>
+</div>
+<div id="loading"></div>
+<div id="toast"></div>
+<div id="content"></div>
+<script>
+const CONFIG = __CONFIG__;
+let model = null;
+
+const list = document.getElementById("model-list");
+for (const name of CONFIG.models) {
+    const option = document.createElement("div");
+    option.className = "model-option";
+    option.textContent = name;
+    option.onclick = () => {
+        model = name;
+        document.getElementById("model-current").textContent = "Model: " + name;
+        list.classList.add("hidden");
+    };
+    list.appendChild(option);
+}
+document.getElementById("model-btn").onclick = () => list.classList.remove("hidden");
+
+// The scraper's probe reads text nodes, so messages are removed, not hidden
+const setText = (id, text) => { document.getElementById(id).textContent = text; };
+
+const showToast = (text) => {
+    setText("toast", text);
+    setTimeout(() => setText("toast", ""), CONFIG.toast_ms);
+};
+
+document.getElementById("enter").onclick = async () => {
+    const ticker = document.getElementById("ticker").value.trim();
+    setText("toast", "");
+    if (!model || !ticker) return;
+    // Click ignored: no loading text, no update
+    if (Math.random() < CONFIG.ignore_rate) return;
+
+    const downloadBtn = document.getElementById("download");
+    if (downloadBtn) downloadBtn.disabled = true;
+    setText("loading", "有些模型需要較長的時間計算，請稍候");
+
+    let data;
+    try {
+        const query = new URLSearchParams({platform: CONFIG.platform, model: model, ticker: ticker});
+        data = await (await fetch("/api/data?" + query.toString())).json();
+    } catch (e) {
+        data = {error: "獲取數據失敗"};
+    }
+    setText("loading", "");
+
+    if (data.error) {
+        showToast(data.error + " Please Try Again");
+        if (downloadBtn) downloadBtn.disabled = false;
+        return;
+    }
+    if (data.stale) {
+        // Previous ticker's content stays on screen
+        if (downloadBtn) downloadBtn.disabled = false;
+        return;
+    }
+    render(ticker, data);
+};
+
+function render(ticker, data) {
+    const content = document.getElementById("content");
+    content.innerHTML = "";
+    const title = document.createElement("h2");
+    title.textContent = ticker;
+    content.appendChild(title);
+
+    if (data.model === "TV Code") {
+        const line = document.createElement("div");
+        line.textContent = `"${ticker}" Put Wall ${data.put_wall}, Call Wall ${data.call_wall}, Gamma Flip ${data.gamma_flip}`;
+        content.appendChild(line);
+        return;
+    }
+
+    // Chart stand-in with a realistic DOM size
+    const table = document.createElement("table");
+    for (const [strike, value] of data.series) {
+        const row = table.insertRow();
+        row.insertCell().textContent = strike;
+        row.insertCell().textContent = value;
+    }
+    content.appendChild(table);
+
+    const button = document.createElement("button");
+    button.id = "download";
+    button.textContent = "下載";
+    button.onclick = () => {
+        const query = new URLSearchParams({platform: CONFIG.platform, model: data.model, ticker: ticker});
+        const link = document.createElement("a");
+        link.href = "/api/report?" + query.toString();
+        link.download = ticker + ".html";
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+    };
+    content.insertBefore(button, table);
+}
+</script>
+</body></html>
+"""
+
+
+class MockPlatform:
+    """
+    Serves the mock platform on a background thread.
+    latency / download_latency: (min, max) seconds per data request / report download.
+    failure_rate: share of data requests answered with a "獲取數據失敗" toast,
+    stale_rate: share that leaves the previous ticker on screen,
+    ignore_rate: share of "Enter" clicks that do nothing.
+    """
+    def __init__(self, latency=(0.3, 1.2), download_latency=(0.1, 0.4), failure_rate=0.05, stale_rate=0.01,
+                 ignore_rate=0.02, rows=300, seed=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.download_latency = download_latency
+        self.failure_rate = failure_rate
+        self.stale_rate = stale_rate
+        self.ignore_rate = ignore_rate
+        self.rows = rows
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"pages": 0, "data_requests": 0, "failures": 0, "stale": 0, "downloads": 0}
+
+        self.server = ThreadingHTTPServer((host, port), MockRequestHandler)
+        self.server.daemon_threads = True
+        self.server.platform = self
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="MockPlatform", daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def draw(self):
+        with self.lock:
+            return self.random.random()
+
+    def delay(self, bounds):
+        with self.lock:
+            seconds = self.random.uniform(*bounds)
+        time.sleep(seconds)
+
+    def page(self, platform):
+        config = {
+            "platform": platform,
+            "models": CME_MODELS if platform == "cme" else STD_MODELS,
+            "ignore_rate": self.ignore_rate,
+            "toast_ms": 1500
+        }
+        return PAGE_HTML.replace("__CONFIG__", json.dumps(config, ensure_ascii=False))
+
+    def data(self, platform, model, ticker):
+        """Payload of one data request: an error, a stale marker or the model data."""
+        self.count("data_requests")
+        self.delay(self.latency)
+        draw = self.draw()
+        if draw < self.failure_rate:
+            self.count("failures")
+            return {"error": "獲取數據失敗"}
+        if draw < self.failure_rate + self.stale_rate:
+            self.count("stale")
+            return {"stale": True}
+
+        return self.model_data(platform, model, ticker)
+
+    def model_data(self, platform, model, ticker):
+        # Deterministic per ticker, so repeated runs produce identical reports
+        rng = random.Random(f"{platform}/{model}/{ticker}")
+        spot = rng.uniform(50, 5000)
+        return {
+            "platform": platform,
+            "model": model,
+            "ticker": ticker,
+            "put_wall": round(spot * 0.95, 2),
+            "call_wall": round(spot * 1.05, 2),
+            "gamma_flip": round(spot, 2),
+            "series": [[round(spot * (0.8 + 0.4 * i / self.rows), 2), round(rng.gauss(0, 1), 4)] for i in range(self.rows)]
+        }
+
+    def report(self, platform, model, ticker):
+        self.count("downloads")
+        self.delay(self.download_latency)
+        data = self.model_data(platform, model, ticker)
+        rows = "".join(f"<tr><td>{strike}</td><td>{value}</td></tr>" for strike, value in data["series"])
+        return (f"<!doctype html><html><head><meta charset='utf-8'><title>{html.escape(ticker)} {html.escape(model)}</title></head>"
+                f"<body><h1>{html.escape(ticker)}</h1><table>{rows}</table></body></html>")
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        platform = self.server.platform
+        parts = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        if parts.path in ("/", "/platform", "/platform/"):
+            platform.count("pages")
+            self.send_body(platform.page("std"), "text/html; charset=utf-8")
+        elif parts.path.rstrip("/") == "/platform/cme":
+            platform.count("pages")
+            self.send_body(platform.page("cme"), "text/html; charset=utf-8")
+        elif parts.path == "/api/data":
+            data = platform.data(query.get("platform", "std"), query.get("model", ""), query.get("ticker", ""))
+            self.send_body(json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+        elif parts.path == "/api/report":
+            ticker = query.get("ticker", "")
+            body = platform.report(query.get("platform", "std"), query.get("model", ""), ticker)
+            self.send_body(body, "text/html; charset=utf-8",
+                           headers={"Content-Disposition": f'attachment; filename="{ticker}.html"'})
+        else:
+            self.send_body("Not found", "text/plain", status=404)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the local mock Lieta platform.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0.3-1.2", help="Data request latency range in seconds, e.g. 0.3-1.2")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--stale-rate", type=float, default=0.01)
+    parser.add_argument("--ignore-rate", type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    low, _, high = args.latency.partition("-")
+    mock = MockPlatform(latency=(float(low), float(high or low)), failure_rate=args.failure_rate,
+                        stale_rate=args.stale_rate, ignore_rate=args.ignore_rate, host=args.host, port=args.port)
+    print(f"Mock platform on {mock.start()}/platform (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
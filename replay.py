@@ -0,0 +1,189 @@
+"""
+Record / replay of real platform traffic (HAR archives), for offline, repeatable profiling of
+the browser engine with real page payloads, DOM sizes and asset weights.
+
+Record a few tickers per model from the live site (needs a logged-in state.json):
+    python replay.py --archive sessions/lieta.har --tickers SPX,QQQ --models all
+
+Replay: benchmark.py --replay sessions/lieta.har, or set `scraper.replay = TrafficArchive(path)`.
+The job context then answers every request from the archive and nothing reaches the network.
+Recorded tickers are templated, so requests for any other ticker are answered with a recorded
+response (ticker substituted) for the same model.
+"""
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import re
+from urllib.parse import quote, quote_plus, unquote_plus
+
+from scraper import LietaScraper, STD_MODELS, CME_MODELS
+
+TICKER_PLACEHOLDER = "\x00TICKER\x00"
+# Characters a templated ticker can match in a URL / request body
+TICKER_VALUE_RE = r"[^/?&=#\"',;\s]+"
+# Response headers that no longer apply to the decoded body served from the archive
+DROPPED_HEADERS = ("content-length", "content-encoding", "transfer-encoding")
+TEXT_CONTENT_TYPES = ("text/", "json", "javascript", "xml")
+
+
+def ticker_variants(ticker):
+    """The forms a ticker takes in URLs and bodies ("^SPX", "%5ESPX", ...)."""
+    return sorted({ticker, quote(ticker, safe=""), quote_plus(ticker)}, key=len, reverse=True)
+
+
+def ticker_pattern(ticker):
+    """Regex for a whole ticker (not part of a longer word)."""
+    return re.compile(r"(?<![A-Za-z0-9])" + "|".join(re.escape(v) for v in ticker_variants(ticker)) + r"(?![A-Za-z0-9])")
+
+
+class TrafficArchive:
+    """
+    Recorded responses of a HAR file (Playwright record_har_path, content embedded), indexed for replay.
+
+    Requests are matched on method + URL + body. Exact matches are served as recorded; otherwise
+    the request is matched against the recorded requests with their ticker templated
+    ("...?ticker={ticker}"), and the response is served with the recorded ticker replaced.
+    Repeated requests cycle through the recorded responses (e.g. a failure, then the data).
+    latency_scale: sleep this fraction of the recorded response time (0 = answer at once).
+    """
+    def __init__(self, path, latency_scale=0.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        with open(path, "r", encoding="utf-8") as f:
+            log = json.load(f)["log"]
+        self.tickers = log.get("_lietaTickers", [])
+        self.patterns = {ticker: ticker_pattern(ticker) for ticker in self.tickers}
+        self.stats = {"served": 0, "templated": 0, "missed": 0}
+
+        exact = {} # (method, url, body) -> [entry]
+        templated = {} # (method, templated url + body) -> [(ticker, entry)]
+        for entry in log["entries"]:
+            request = entry["request"]
+            body = (request.get("postData") or {}).get("text", "")
+            exact.setdefault((request["method"], request["url"], body), []).append(entry)
+            ticker, key = self.templatize(request["url"] + "\n" + body)
+            if ticker:
+                templated.setdefault((request["method"], key), []).append((ticker, entry))
+
+        self.exact = {key: itertools.cycle(entries) for key, entries in exact.items()}
+        # One regex per templated request, the ticker captured by the (repeated) group
+        self.templated = []
+        for (method, key), entries in templated.items():
+            parts = [re.escape(part) for part in key.split(TICKER_PLACEHOLDER)]
+            regex = re.compile(parts[0] + "".join(
+                (f"(?P<ticker>{TICKER_VALUE_RE})" if i == 0 else "(?P=ticker)") + part for i, part in enumerate(parts[1:])
+            ))
+            self.templated.append((method, regex, itertools.cycle(entries)))
+        self.cache = {} # (method, url, body) -> index into self.templated, or None
+
+    def templatize(self, text):
+        """Replaces the first recorded ticker found in `text`. Returns (ticker, text) or (None, text)."""
+        for ticker, pattern in self.patterns.items():
+            if pattern.search(text):
+                return ticker, pattern.sub(TICKER_PLACEHOLDER, text)
+        return None, text
+
+    def lookup(self, method, url, body):
+        """Returns (entry, recorded_ticker, requested_ticker) for a request, or None."""
+        key = (method, url, body or "")
+        if key in self.exact:
+            return next(self.exact[key]), None, None
+
+        if key not in self.cache:
+            self.cache[key] = None
+            for index, (entry_method, regex, _) in enumerate(self.templated):
+                match = entry_method == method and regex.fullmatch(url + "\n" + (body or ""))
+                if match:
+                    self.cache[key] = (index, unquote_plus(match.group("ticker")))
+                    break
+        if self.cache[key] is None:
+            return None
+        index, requested = self.cache[key]
+        recorded, entry = next(self.templated[index][2])
+        return entry, recorded, requested
+
+    def response(self, entry, recorded=None, requested=None):
+        """Status, headers and body of a recorded entry, with the recorded ticker replaced by the requested one."""
+        response = entry["response"]
+        content = response.get("content", {})
+        text = content.get("text", "")
+        body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+
+        headers = {h["name"]: h["value"] for h in response.get("headers", []) if h["name"].lower() not in DROPPED_HEADERS}
+        mime = content.get("mimeType", "")
+        if recorded and requested and recorded != requested:
+            if any(t in mime for t in TEXT_CONTENT_TYPES):
+                body = self.patterns[recorded].sub(lambda m: requested, body.decode("utf-8", "replace")).encode("utf-8")
+            headers = {name: self.patterns[recorded].sub(lambda m: requested, value) for name, value in headers.items()}
+        return response.get("status", 200), headers, body
+
+    async def route(self, route):
+        """Context route handler: answers from the archive, aborts anything not recorded."""
+        request = route.request
+        try:
+            body = request.post_data
+        except Exception:
+            body = None # binary body
+        found = self.lookup(request.method, request.url, body)
+        if not found:
+            self.stats["missed"] += 1
+            await route.abort()
+            return
+
+        entry, recorded, requested = found
+        self.stats["served"] += 1
+        if recorded:
+            self.stats["templated"] += 1
+        if self.latency_scale and entry.get("time"):
+            await asyncio.sleep(entry["time"] / 1000 * self.latency_scale)
+        status, headers, body = self.response(entry, recorded, requested)
+        await route.fulfill(status=status, headers=headers, body=body)
+
+
+def annotate_archive(path, tickers):
+    """Stores the recorded tickers in the HAR (custom "_lietaTickers" field) so replay can template them."""
+    with open(path, "r", encoding="utf-8") as f:
+        har = json.load(f)
+    har["log"]["_lietaTickers"] = list(tickers)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(har, f, ensure_ascii=False)
+    return len(har["log"]["entries"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record real platform traffic (a few tickers per model) into a HAR archive for replay.")
+    parser.add_argument("--archive", required=True, help="HAR file to write")
+    parser.add_argument("--tickers", default="", help="Standard tickers, comma-separated (keep it to a few)")
+    parser.add_argument("--models", default="all", help=f"Standard models, comma-separated or 'all' ({', '.join(STD_MODELS)})")
+    parser.add_argument("--cme-tickers", default="", help="CME tickers, comma-separated")
+    parser.add_argument("--cme-models", default="all", help=f"CME models, comma-separated or 'all' ({', '.join(CME_MODELS)})")
+    parser.add_argument("--browser", choices=["chrome", "brave", "chromium"], default="chromium")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--download-folder", default="recorded", help="Where the recorded job saves its reports")
+    args = parser.parse_args(argv)
+
+    def split(value, available=None):
+        if available and value.strip().lower() == "all":
+            return list(available)
+        return [v.strip() for v in value.split(",") if v.strip()]
+
+    tickers, cme_tickers = split(args.tickers), split(args.cme_tickers)
+    models = split(args.models, STD_MODELS) if tickers else []
+    cme_models = split(args.cme_models, CME_MODELS) if cme_tickers else []
+    if not (models or cme_models):
+        parser.error("Give --tickers and/or --cme-tickers")
+
+    # Full (not lean) profile, so the archive keeps the real asset weights
+    scraper = LietaScraper(browser_type=args.browser, manifest_path=None, tv_codes_path=None)
+    scraper.headless = not args.headed
+    scraper.metrics_dir = None
+    scraper.record_har_path = args.archive
+    asyncio.run(scraper.perform_full_job(tickers, models, cme_tickers, cme_models, args.download_folder, False))
+    count = annotate_archive(args.archive, tickers + cme_tickers)
+    print(f"Recorded {count} requests to {args.archive}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from datetime import datetime
+
+# Largest number of queued lines written in one go, and the longest a line waits for its write
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+
+
+class RunLogWriter:
+    """
+    Background writer for one run's log file.
+
+    write() / event() only enqueue (safe from any thread, never blocks the UI). A writer thread
+    keeps the file(s) open for the whole run and writes whatever is queued in batches, at
+    least every FLUSH_INTERVAL seconds. Optional structured events (one JSON object per line:
+    ticker, model, attempt, phase, duration, ...) go to a JSONL file next to the text log.
+    close() (also run at interpreter exit) writes everything still queued.
+    """
+    def __init__(self, path, events_path=None):
+        self.path = path # None: events only
+        self.events_path = events_path
+        self.queue = queue.Queue()
+        self.closed = False
+        for file_path in (path, events_path):
+            if file_path and os.path.dirname(file_path):
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="RunLogWriter", daemon=True)
+        self.thread.start()
+        # Daemon thread: make sure a crash / window close does not lose the tail of the log
+        atexit.register(self.close)
+
+    def write(self, message, timestamp=None):
+        """Queues one human-readable log line."""
+        if self.closed or not self.path:
+            return
+        stamp = (timestamp or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+        self.queue.put(("log", f"{stamp} - {message}\n"))
+
+    def event(self, event, **fields):
+        """Queues one structured event (JSONL file only; ignored without events_path)."""
+        if self.closed or not self.events_path:
+            return
+        record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event}
+        record.update(fields)
+        self.queue.put(("event", json.dumps(record, ensure_ascii=False, default=str) + "\n"))
+
+    def _run(self):
+        log_file = open(self.path, "a", encoding="utf-8") if self.path else None
+        events_file = open(self.events_path, "a", encoding="utf-8") if self.events_path else None
+        try:
+            done = False
+            while not done:
+                try:
+                    batch = [self.queue.get(timeout=FLUSH_INTERVAL)]
+                except queue.Empty:
+                    continue
+                while len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                lines = {"log": [], "event": []}
+                for item in batch:
+                    if item is None:
+                        done = True
+                    else:
+                        lines[item[0]].append(item[1])
+                if lines["log"] and log_file:
+                    log_file.write("".join(lines["log"]))
+                    log_file.flush()
+                if lines["event"] and events_file:
+                    events_file.write("".join(lines["event"]))
+                    events_file.flush()
+        finally:
+            if log_file:
+                log_file.close()
+            if events_file:
+                events_file.close()
+
+    def close(self, timeout=5):
+        """Writes everything queued so far and closes the files."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join(timeout)
+        atexit.unregister(self.close)
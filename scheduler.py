@@ -0,0 +1,192 @@
+import heapq
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+# Optional {ticker: tier} file; lower tiers are scraped first
+PRIORITIES_PATH = "priorities.json"
+# Without a priorities file: the index tickers needed before the open come first
+DEFAULT_PRIORITIES = {"SPX": 0, "QQQ": 0, "ES": 0}
+DEFAULT_TIER = 1
+# Cost estimate of an item / model without any history (seconds)
+DEFAULT_ITEM_SECONDS = 20.0
+# History window for the estimates (run dates)
+HISTORY_DAYS = 14
+# Items listed by name in the deadline report
+REPORT_MISSES = 10
+
+
+def normalize_ticker(ticker):
+    """"/ES", "^SPX" and " spx" share the priority of "ES" / "SPX"."""
+    return ticker.strip().upper().lstrip("/^")
+
+
+def load_priorities(path=PRIORITIES_PATH):
+    """Reads {ticker: tier} from path, or returns DEFAULT_PRIORITIES if there is no such file."""
+    if not path or not os.path.exists(path):
+        return dict(DEFAULT_PRIORITIES)
+    with open(path, "r", encoding="utf-8") as f:
+        return {normalize_ticker(t): int(tier) for t, tier in json.load(f).items()}
+
+
+def parse_deadline(value, now=None):
+    """
+    "HH:MM" (today) or an ISO date-time -> timestamp. None stays None.
+    A time of day that has already passed is not moved to tomorrow: everything is late.
+    """
+    if not value:
+        return None
+    now = now or datetime.now()
+    try:
+        moment = datetime.strptime(value.strip(), "%H:%M")
+        moment = now.replace(hour=moment.hour, minute=moment.minute, second=0, microsecond=0)
+    except ValueError:
+        moment = datetime.fromisoformat(value.strip())
+    return moment.timestamp()
+
+
+class JobScheduler:
+    """
+    Cost-aware order of a job's items.
+
+    Queues are filled by priority tier first (DEFAULT_PRIORITIES / priorities.json), then longest
+    expected item first (LPT: the pages of a queue pull from it, so long items do not end up
+    stretching the end of the job). Queues themselves start in the same order (best tier, then
+    largest expected total); when they run one after the other they are also split per tier, so
+    tiers hold across the whole job, not only within a queue. Costs are the median durations of the item in the run manifest,
+    falling back to the model's median, then DEFAULT_ITEM_SECONDS.
+
+    plan() simulates the pages working through the queues to estimate the makespan and which
+    items would finish after the deadline. reorder=False keeps the input order (estimates only).
+    """
+    def __init__(self, durations=None, priorities=None, deadline=None, reorder=True):
+        self.priorities = {normalize_ticker(t): tier for t, tier in (DEFAULT_PRIORITIES if priorities is None else priorities).items()}
+        self.deadline = deadline # timestamp or None
+        self.reorder = reorder
+
+        durations = durations or {}
+        self.item_costs = {key: statistics.median(values) for key, values in durations.items() if values}
+        by_model = {}
+        for (platform, model, _), values in durations.items():
+            by_model.setdefault((platform, model), []).extend(values)
+        self.model_costs = {key: statistics.median(values) for key, values in by_model.items() if values}
+
+    def tier(self, ticker):
+        return self.priorities.get(normalize_ticker(ticker), DEFAULT_TIER)
+
+    def cost(self, platform, model, ticker):
+        key = (platform, model, ticker)
+        if key in self.item_costs:
+            return self.item_costs[key]
+        return self.model_costs.get((platform, model), DEFAULT_ITEM_SECONDS)
+
+    def has_history(self, platform, model, ticker):
+        return (platform, model, ticker) in self.item_costs
+
+    def order_queues(self, queues, by_tier=False):
+        """
+        queues: list of (platform, model, tickers) model-major queues.
+        Returns them with each queue's tickers and the queues themselves in schedule order.
+        by_tier (queues run one after the other): each queue is split into one queue per tier and
+        all tier-0 queues come first, so a critical ticker of the last model is not scraped after
+        every other model's tickers. Costs a page opening per extra segment.
+        """
+        if not self.reorder:
+            return list(queues)
+        ordered = []
+        for platform, model, tickers in queues:
+            tickers = sorted(tickers, key=lambda t: (self.tier(t), -self.cost(platform, model, t)))
+            if by_tier and tickers:
+                for tier in sorted({self.tier(t) for t in tickers}):
+                    ordered.append((platform, model, [t for t in tickers if self.tier(t) == tier]))
+            else:
+                ordered.append((platform, model, tickers))
+        return sorted(ordered, key=lambda q: (
+            min((self.tier(t) for t in q[2]), default=DEFAULT_TIER),
+            -sum(self.cost(q[0], q[1], t) for t in q[2])
+        ))
+
+    def order_ticker_models(self, platform, ticker_models):
+        """Ticker-major queue {ticker: [models]} in schedule order (a ticker costs all its models)."""
+        if not self.reorder:
+            return ticker_models
+        order = sorted(ticker_models, key=lambda t: (
+            self.tier(t),
+            -sum(self.cost(platform, m, t) for m in ticker_models[t])
+        ))
+        return {t: ticker_models[t] for t in order}
+
+    def order_ticker_queues(self, grouped, by_tier=False):
+        """
+        Ticker-major queues {platform: {ticker: [models]}} -> [(platform, {ticker: [models]})] in
+        schedule order. by_tier: split per tier as in order_queues (std and CME run one after the other).
+        """
+        queues = [(platform, self.order_ticker_models(platform, ticker_models)) for platform, ticker_models in grouped.items()]
+        if not (self.reorder and by_tier):
+            return queues
+        segments = []
+        for platform, ticker_models in queues:
+            for tier in sorted({self.tier(t) for t in ticker_models}):
+                segments.append((tier, platform, {t: m for t, m in ticker_models.items() if self.tier(t) == tier}))
+        segments.sort(key=lambda s: (s[0], -sum(self.cost(s[1], m, t) for t, models in s[2].items() for m in models)))
+        return [(platform, ticker_models) for _, platform, ticker_models in segments]
+
+    def plan(self, queues, parallel, pages):
+        """
+        Simulates a job. queues: list of queues, each a list of units (items processed by one page
+        in one go: a ticker of a model-major queue, or a ticker with all its models in ticker-major),
+        each unit a list of (platform, model, ticker). Each queue has `pages` pages pulling units;
+        queues run at the same time in parallel mode, one after the other otherwise.
+        Returns {"items", "known", "makespan", "finish": {(platform, model, ticker): seconds from now}}.
+        """
+        finish = {}
+        known = 0
+        offset = 0.0
+        makespan = 0.0
+        for units in queues:
+            if not units:
+                continue
+            free = [offset] * max(1, min(pages, len(units)))
+            heapq.heapify(free)
+            end = offset
+            for unit in units:
+                start = heapq.heappop(free)
+                for item in unit:
+                    start += self.cost(*item)
+                    finish[item] = start
+                    known += self.has_history(*item)
+                heapq.heappush(free, start)
+                end = max(end, start)
+            makespan = max(makespan, end)
+            if not parallel:
+                offset = end
+        return {"items": len(finish), "known": known, "makespan": makespan, "finish": finish}
+
+    def report_lines(self, plan, now=None):
+        """Human-readable plan summary, with the items that would miss the deadline."""
+        now = now or time.time()
+        eta = datetime.fromtimestamp(now + plan["makespan"])
+        lines = [f"Schedule: {plan['items']} items ({plan['known']} with history), estimated {timedelta(seconds=round(plan['makespan']))}, done around {eta:%H:%M}."]
+        if self.deadline:
+            misses = self.misses(plan, now)
+            deadline = f"{datetime.fromtimestamp(self.deadline):%H:%M}"
+            if not misses:
+                lines.append(f"Deadline {deadline}: every item is expected on time.")
+            else:
+                critical = sum(1 for _, _, ticker, _ in misses if self.tier(ticker) == 0)
+                lines.append(f"Deadline {deadline}: {len(misses)} items would miss it ({critical} critical):")
+                for platform, model, ticker, eta in misses[:REPORT_MISSES]:
+                    lines.append(f"    {platform.upper()} {model} {ticker} (tier {self.tier(ticker)}) ~{datetime.fromtimestamp(eta):%H:%M}")
+                if len(misses) > REPORT_MISSES:
+                    lines.append(f"    ... and {len(misses) - REPORT_MISSES} more")
+        return lines
+
+    def misses(self, plan, now=None):
+        """[(platform, model, ticker, expected finish timestamp)] after the deadline, best tier first."""
+        if not self.deadline:
+            return []
+        now = now or time.time()
+        late = [(p, m, t, now + s) for (p, m, t), s in plan["finish"].items() if now + s > self.deadline]
+        return sorted(late, key=lambda x: (self.tier(x[2]), x[3]))
@@ -1,20 +1,317 @@
 import asyncio
+import json
 import os
+import re
 import time
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from contextlib import asynccontextmanager
+from urllib.parse import unquote
 from datetime import datetime
 import utils
+from concurrency import AIMDController
+from manifest import RunManifest, MANIFEST_PATH
+from blobstore import BlobStore, format_bytes
+from tvcodes import TvCodeStore, TV_CODES_DB_PATH
+from catalog import FileCatalog
+from metrics import PhaseMetrics, METRICS_DIR
+from traces import FailureTracer, TRACE_DIR, TRACE_MAX_BYTES
+from scheduler import JobScheduler, PRIORITIES_PATH, HISTORY_DAYS, load_priorities, parse_deadline
+from failures import (
+    MAX_TOTAL_ATTEMPTS, RETRY_POLICIES, CircuitBreaker, classify_exception,
+    ServerBusyError, StaleDataError, ClickIgnoredError, ScrapeTimeoutError, PageCrashedError, SessionExpiredError
+)
 
 # URL
 BASE_URL = "https://www.lietaresearch.com"
+STD_PLATFORM_URL = f"{BASE_URL}/platform"
+CME_PLATFORM_URL = f"{BASE_URL}/platform/cme"
+
+# Models offered by each platform
+STD_MODELS = ["Gamma", "Delta", "Theta", "Term", "Smile", "Levels", "Table", "TV Code"]
+CME_MODELS = ["Gamma", "Delta", "Smile", "Term", "TV Code"]
+
+# Job traversal orderings
+# "model": model-major, one page per model enters every ticker (default)
+# "ticker": ticker-major, one page enters a ticker once and cycles through the selected models
+ORDERINGS = ("model", "ticker")
+
+# In-page status probe.
+# Installed once per page (via add_init_script). A MutationObserver bumps a DOM version
+# counter and wakes up pending waiters, so the Python side can await a state change
+# instead of polling innerText / get_by_text().count() every 0.5s.
+# status(ticker) walks text nodes only (no innerText on <body>, so no forced layout) and
+# returns one compact object.
+PAGE_PROBE_JS = """
+(() => {
+    if (window.__lietaProbe) return;
+
+    const TOAST_TEXTS = ["獲取數據失敗", "Please Try Again"];
+    const LOADING_TEXT = "有些模型需要較長的時間計算";
+    const DOWNLOAD_TEXT = "下載";
+    const SKIP_TAGS = new Set(["SCRIPT", "STYLE", "NOSCRIPT", "TEMPLATE"]);
+
+    const probe = { version: 0, lastMutation: Date.now(), waiters: [], armed: null };
+
+    const isVisible = (el) => el.checkVisibility ? el.checkVisibility() : el.offsetParent !== null;
+
+    const textNodes = () => {
+        const nodes = [];
+        if (!document.body) return nodes;
+        const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+        while (walker.nextNode()) {
+            const node = walker.currentNode;
+            const parent = node.parentElement;
+            if (!parent || SKIP_TAGS.has(parent.tagName) || !node.data.trim()) continue;
+            nodes.push(node);
+        }
+        return nodes;
+    };
+
+    const mentionsTicker = (text, ticker) =>
+        text.trim() === ticker || text.includes(ticker + " ") || text.includes(ticker + ":") ||
+        text.includes(ticker + "\\n") || text.includes(" " + ticker);
+
+    probe.status = (ticker) => {
+        const s = {
+            version: probe.version,
+            idleMs: Date.now() - probe.lastMutation,
+            toast: null,
+            loading: false,
+            tickerRendered: false,
+            putWall: false,
+            tvLine: null,
+            downloadReady: false,
+            // Load cycle since arm() (always true when not armed)
+            sawLoading: false,
+            fresh: !probe.armed,
+        };
+        const armed = probe.armed;
+        if (armed) {
+            s.sawLoading = armed.sawLoading;
+            s.fresh = armed.rendered;
+        }
+        const wallNodes = [];
+
+        for (const node of textNodes()) {
+            const text = node.data;
+            // Once armed, only toasts shown after arm(): one left over from the previous attempt is not this one's
+            const added = !armed || !armed.old.has(node) || armed.touched.has(node);
+            if (!s.toast && added && TOAST_TEXTS.some((t) => text.includes(t))) {
+                s.toast = (node.parentElement.textContent || text).trim();
+            }
+            if (!s.loading && text.includes(LOADING_TEXT)) s.loading = true;
+            if (text.includes("Put Wall")) {
+                s.putWall = true;
+                wallNodes.push(node);
+            }
+            if (ticker && mentionsTicker(text, ticker) && isVisible(node.parentElement)) {
+                s.tickerRendered = true;
+                // Written after arm(): not the previous model's (or ticker's) content
+                if (armed && added) s.fresh = true;
+            }
+        }
+
+        // TV line: the rendered line containing both the ticker and "Put Wall"
+        if (ticker) {
+            for (const node of wallNodes) {
+                let el = node.parentElement;
+                for (let i = 0; el && i < 5 && !el.textContent.includes(ticker); i++) el = el.parentElement;
+                if (!el || !isVisible(el)) continue;
+                const line = el.innerText.split("\\n").find((l) => l.includes(ticker) && l.includes("Put Wall"));
+                if (line) {
+                    s.tvLine = line;
+                    break;
+                }
+            }
+        }
+
+        for (const btn of document.querySelectorAll("button, [role=button]")) {
+            if (btn.textContent.includes(DOWNLOAD_TEXT) && !btn.disabled && btn.getAttribute("aria-disabled") !== "true") {
+                s.downloadReady = true;
+                break;
+            }
+        }
+        return s;
+    };
+
+    // Starts a load cycle (called right before "Enter"): from now on `fresh` is only true once
+    // content is added or the ticker's text is rewritten, and `sawLoading` once the loading
+    // text appears. A page that still shows the same ticker for another model is not fresh.
+    // The text nodes present now (including any toast still on screen) are recorded as old.
+    probe.arm = () => {
+        probe.armed = { sawLoading: false, rendered: false, old: new WeakSet(textNodes()), touched: new WeakSet() };
+    };
+
+    const isStatusText = (text) => text.includes(LOADING_TEXT) || TOAST_TEXTS.some((t) => text.includes(t));
+
+    const trackLoadCycle = (records) => {
+        const armed = probe.armed;
+        if (!armed) return;
+        for (const record of records) {
+            if (record.type === "characterData") {
+                armed.touched.add(record.target);
+                if (record.target.data.includes(LOADING_TEXT)) armed.sawLoading = true;
+                continue;
+            }
+            for (const node of record.addedNodes) {
+                if (node.nodeType !== Node.ELEMENT_NODE && node.nodeType !== Node.TEXT_NODE) continue;
+                if (node.nodeType === Node.ELEMENT_NODE && SKIP_TAGS.has(node.tagName)) continue;
+                const text = node.textContent || "";
+                if (text.includes(LOADING_TEXT)) armed.sawLoading = true;
+                // Loading text and error toasts come and go without new data
+                if (text.trim() && !isStatusText(text)) armed.rendered = true;
+            }
+        }
+    };
+
+    // Resolves with a fresh status once the DOM version moves past `since`, or after timeoutMs
+    probe.next = (ticker, since, timeoutMs) => new Promise((resolve) => {
+        if (probe.version !== since) return resolve(probe.status(ticker));
+        const waiter = {};
+        const timer = setTimeout(() => waiter.fire(), timeoutMs);
+        waiter.fire = () => {
+            clearTimeout(timer);
+            probe.waiters = probe.waiters.filter((w) => w !== waiter);
+            resolve(probe.status(ticker));
+        };
+        probe.waiters.push(waiter);
+    });
+
+    // Mutations are coalesced: waiters are woken at most every 100ms
+    let scheduled = false;
+    const observer = new MutationObserver((records) => {
+        trackLoadCycle(records);
+        probe.version++;
+        probe.lastMutation = Date.now();
+        if (scheduled || !probe.waiters.length) return;
+        scheduled = true;
+        setTimeout(() => {
+            scheduled = false;
+            probe.waiters.slice().forEach((w) => w.fire());
+        }, 100);
+    });
+    const start = () => observer.observe(document.documentElement, {
+        childList: true,
+        subtree: true,
+        characterData: true,
+        attributes: true,
+        attributeFilter: ["disabled", "aria-disabled", "class", "style", "hidden"],
+    });
+    if (document.documentElement) start();
+    else document.addEventListener("DOMContentLoaded", start);
+
+    window.__lietaProbe = probe;
+})();
+"""
+
+PROBE_NEXT_JS = "([ticker, since, timeoutMs]) => window.__lietaProbe ? window.__lietaProbe.next(ticker, since, timeoutMs) : null"
+PROBE_ARM_JS = "() => { if (!window.__lietaProbe) return false; window.__lietaProbe.arm(); return true; }"
+# After the loading text went away, a page that stayed unchanged this long kept its old content
+STALE_IDLE_MS = 5000
+
+# Lean profile: resources that are not needed to get the data / report
+LEAN_BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+LEAN_BLOCKED_URL_PARTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "clarity.ms", "segment.io", "mixpanel.com", "intercom.io"
+)
+LEAN_VIEWPORT = {"width": 800, "height": 600}
+LEAN_LAUNCH_ARGS = [
+    "--disable-gpu", "--disable-extensions", "--disable-background-networking",
+    "--disable-renderer-backgrounding", "--mute-audio", "--blink-settings=imagesEnabled=false"
+]
+
+# Lean profile: turn off CSS transitions/animations and common chart library animations
+LEAN_NO_ANIMATION_JS = """
+(() => {
+    const css = "*, *::before, *::after { animation: none !important; transition: none !important; }";
+    const addStyle = () => {
+        const style = document.createElement("style");
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    const disableCharts = () => {
+        if (window.Highcharts && window.Highcharts.setOptions) {
+            window.Highcharts.setOptions({ chart: { animation: false }, plotOptions: { series: { animation: false } } });
+        }
+        if (window.Chart && window.Chart.defaults) window.Chart.defaults.animation = false;
+    };
+    if (document.documentElement) addStyle();
+    else document.addEventListener("DOMContentLoaded", addStyle);
+    document.addEventListener("DOMContentLoaded", disableCharts);
+    window.addEventListener("load", disableCharts);
+})();
+"""
 
 class LietaScraper:
-    def __init__(self, logger_func=print, browser_type="chrome"):
+    def __init__(self, logger_func=print, browser_type="chrome", capture_mode="download", lean=False, adaptive=False, manifest_path=MANIFEST_PATH, dedup=False, tv_codes_path=TV_CODES_DB_PATH):
         self.log = logger_func
+        # Platform pages (set_platform_base_url points them at e.g. the local mock platform)
+        self.std_platform_url = STD_PLATFORM_URL
+        self.cme_platform_url = CME_PLATFORM_URL
+        # Optional structured event sink: event_func(event, **fields) (see runlog.RunLogWriter.event)
+        self.event_func = None
+        # Per-phase latency of the current job, exported to metrics_dir at its end (None: not exported)
+        self.metrics = PhaseMetrics()
+        self.metrics_dir = METRICS_DIR
+        self.metrics_file = None
         self.playwright = None
         self.browser = None
         self.storage_state_path = "state.json"
         self.browser_type = browser_type
+        # "download": render the chart and save the HTML report via the "下載" button
+        # "network": save the JSON payload of the data request triggered by "Enter" (non-TV models)
+        self.capture_mode = capture_mode
+        # Lean profile for jobs: headless, non-essential resources blocked, no animations, small viewport
+        self.lean = lean
+        # Jobs run headless in lean mode; the command-line runner always sets this
+        self.headless = lean
+        # Adaptive (AIMD) limit on the number of pages working at once, instead of all of them
+        self.adaptive = adaptive
+        self.controller = None
+        # Persistent (service) mode: keep the browser, the job context and initialized model pages between jobs
+        self.persistent = False
+        self.context = None
+        self.context_state_mtime = None
+        self.page_cache = {} # (target_url, model) -> [page]
+        # Durable per-item progress (SQLite), used to resume interrupted runs. None disables it.
+        self.manifest_path = manifest_path
+        self.manifest = None
+        self.run_date = None
+        # Content-addressed, deduplicated report storage (see blobstore.py)
+        self.dedup = dedup
+        self.blob_stores = {} # download_folder -> BlobStore
+        # Indexed list of the written files, used by the file viewer (see catalog.py)
+        self.catalogs = {} # download_folder -> FileCatalog
+        # Indexed TV Code records (see tvcodes.py), written as codes are extracted. None disables it.
+        self.tv_codes_path = tv_codes_path
+        self.tv_store = None
+        # Traffic capture / offline replay (see replay.py): record_har_path records the job context's
+        # traffic into a HAR archive; replay (a replay.TrafficArchive) answers all requests from one
+        self.record_har_path = None
+        self.replay = None
+        # Failure-triggered page traces (see traces.py): None (off), "attempt" or "final"
+        self.trace_failures = None
+        self.trace_dir = TRACE_DIR
+        self.trace_max_bytes = TRACE_MAX_BYTES
+        self.tracer = None
+        # Traces written by the shards of a sharded job: {run dir: captures} (see trace_counts)
+        self.shard_traces = {}
+        # Cost-aware item order (see scheduler.py): priority tiers, then longest expected first.
+        # deadline: "HH:MM" (or ISO date-time) the job should be done by, reported against the plan
+        self.schedule = True
+        self.priorities_path = PRIORITIES_PATH
+        self.deadline = None
+        self.scheduler = None
+        # Job results (reset by reset_job_state)
+        self.success_count = 0
+        self.failed_items = []
+        self.failed_tasks_structured = []
+        self.skipped_count = 0
+        self.dedup_saved_bytes = 0
+        self.ordering = None
+        self.job_started = None
+        self.late_items = 0
+        self.predicted_misses = None
         
         self.stop_requested = False # Flag to control stopping
 
@@ -40,14 +337,21 @@ class LietaScraper:
         return None
 
     async def start_browser(self, headless=False):
+        # Imported here so the HTTP engine and the command-line runner start without Playwright
+        from playwright.async_api import async_playwright
         self.playwright = await async_playwright().start()
         
         launch_args = {
             "headless": headless,
             "args": ["--disable-blink-features=AutomationControlled"]
         }
+        if self.lean:
+            launch_args["args"] += LEAN_LAUNCH_ARGS
 
-        if self.browser_type == "brave":
+        if self.browser_type == "chromium":
+            # Bundled Chromium (headless shell when headless), no system browser needed
+            pass
+        elif self.browser_type == "brave":
             brave_path = self._get_brave_path()
             if brave_path:
                 launch_args["executable_path"] = brave_path
@@ -59,16 +363,53 @@ class LietaScraper:
             # Default to Chrome
             launch_args["channel"] = "chrome"
 
-        self.browser = await self.playwright.chromium.launch(**launch_args)
-        self.log(f"Browser launched ({self.browser_type}).")
+        try:
+            self.browser = await self.playwright.chromium.launch(**launch_args)
+        except Exception as e:
+            if not (headless and launch_args.get("channel")):
+                raise
+            # Servers usually have no system Chrome; headless runs can use the bundled Chromium
+            self.log(f"System Chrome unavailable ({e}), falling back to bundled Chromium...")
+            launch_args.pop("channel")
+            self.browser = await self.playwright.chromium.launch(**launch_args)
+        self.log(f"Browser launched ({self.browser_type}{', headless' if headless else ''}{', lean' if self.lean else ''}).")
 
     async def close(self):
         if self.browser:
+            if self.record_har_path:
+                # The HAR archive is only written when its context closes
+                for context in self.browser.contexts:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
+        self.browser = None
+        self.playwright = None
+        self.context = None
+        self.page_cache = {}
         self.log("Browser closed.")
 
+    def set_platform_base_url(self, base_url):
+        """Points the job's platform pages at another host (e.g. mock_platform.py for benchmarks)."""
+        base_url = base_url.rstrip("/")
+        self.std_platform_url = f"{base_url}/platform"
+        self.cme_platform_url = f"{base_url}/platform/cme"
+
+    async def ensure_browser(self):
+        """Starts the browser if needed, or restarts it if it died (e.g. the window was closed)."""
+        if self.browser and self.browser.is_connected():
+            return
+        if self.browser or self.playwright:
+            self.log("Browser connection lost, restarting...")
+            try:
+                await self.close()
+            except Exception:
+                pass
+        await self.start_browser(headless=self.headless)
+
     async def ensure_login(self):
         """
         Opens browser, checks if logged in. If not, waits for user to log in.
@@ -140,34 +481,175 @@ class LietaScraper:
         await self.ensure_login()
         await self.close()
 
-    async def perform_full_job(self, tickers, models, cme_tickers, cme_models, download_folder, parallel):
+    async def perform_full_job(self, tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model=1, resume=False, ordering="model"):
         """
         Runs the full job lifecycle (Start -> Run -> Close) in a single loop.
         Returns list of failed tasks.
         """
         try:
-            await self.start_browser(headless=False)
-            return await self.run_scraping_job(tickers, models, cme_tickers, cme_models, download_folder, parallel)
+            await self.start_browser(headless=self.headless)
+            return await self.run_scraping_job(tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, ordering)
         finally:
             await self.close()
 
-    async def perform_retry_job(self, failed_tasks, download_folder, parallel):
+    async def perform_retry_job(self, failed_tasks, download_folder, parallel, pages_per_model=1, ordering="model"):
         """
         Runs a retry job for specific failed tasks.
         """
         try:
-            await self.start_browser(headless=False)
-            return await self.retry_scraping_job(failed_tasks, download_folder, parallel)
+            await self.start_browser(headless=self.headless)
+            return await self.retry_scraping_job(failed_tasks, download_folder, parallel, pages_per_model, ordering)
         finally:
             await self.close()
 
-    def record_failure(self, platform, model, ticker, reason=""):
+    async def new_job_context(self):
+        """
+        Returns the context shared by all model queues of a job (a browser context built from the saved session).
+        In persistent mode the context is reused across jobs until state.json changes (e.g. after a new login).
+        """
+        await self.ensure_browser()
+
+        state_mtime = os.path.getmtime(self.storage_state_path)
+        if self.persistent and self.context and self.context_state_mtime == state_mtime:
+            return self.context
+
+        if self.context:
+            # Session changed: drop the stale context and the pages initialized in it
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+            self.context = None
+            self.page_cache = {}
+
+        context_args = {"storage_state": self.storage_state_path, "accept_downloads": True}
+        if self.record_har_path:
+            context_args.update(record_har_path=self.record_har_path, record_har_content="embed")
+        if self.lean:
+            context_args.update(viewport=LEAN_VIEWPORT, reduced_motion="reduce")
+        context = await self.browser.new_context(**context_args)
+        if self.replay:
+            # Registered first, so it runs after the lean filter (handlers run last-registered first)
+            await context.route("**/*", self.replay.route)
+        if self.lean:
+            await context.add_init_script(LEAN_NO_ANIMATION_JS)
+            await context.route("**/*", self._lean_route)
+
+        if self.persistent:
+            self.context = context
+            self.context_state_mtime = state_mtime
+        return context
+
+    async def _lean_route(self, route):
+        """Aborts non-essential requests (images, media, fonts, analytics) in lean mode."""
+        request = route.request
+        if request.resource_type in LEAN_BLOCKED_RESOURCE_TYPES or any(part in request.url for part in LEAN_BLOCKED_URL_PARTS):
+            await route.abort()
+        else:
+            # Next handler (replay), or the network
+            await route.fallback()
+
+    def reset_job_state(self, max_active=1):
+        """
+        Resets counters, failure lists and circuit breakers at the start of a job.
+        max_active: upper bound for the adaptive concurrency limit (number of pages the job opens).
+        """
+        self.success_count = 0
+        self.failed_items = []
+        self.failed_tasks_structured = [] # List of {'platform': 'std'|'cme', 'model': str, 'ticker': str, 'failure_class': str, 'attempts': int}
+        self.breakers = {
+            "std": CircuitBreaker("STD", logger_func=self.log),
+            "cme": CircuitBreaker("CME", logger_func=self.log)
+        }
+        self.skipped_count = 0
+        self.dedup_saved_bytes = 0
+        self.ordering = None # Set by full jobs, whose timing is compared per ordering
+        self.job_started = time.time()
+        self.metrics.reset()
+        self.metrics_file = None
+        if self.trace_failures:
+            # Kept across jobs: warm pages (persistent mode) keep their buffers
+            if not self.tracer:
+                self.tracer = FailureTracer(self.trace_failures, self.trace_dir, self.trace_max_bytes, logger_func=self.log)
+            self.tracer.mode = self.trace_failures
+            self.tracer.max_bytes = self.trace_max_bytes
+            self.tracer.start_run()
+        else:
+            self.tracer = None
+        self.shard_traces = {}
+        self.run_date = RunManifest.today()
+        if self.manifest_path and not self.manifest:
+            self.manifest = RunManifest(self.manifest_path)
+        self.scheduler = self.build_scheduler()
+        self.late_items = 0
+        self.predicted_misses = None
+
+        self.controller = None
+        if self.adaptive:
+            self.controller = AIMDController(logger_func=self.log, max_limit=max_active)
+            self.log(f"[AIMD] Adaptive concurrency on: starting at {self.controller.current_limit()} of {self.controller.max_limit} pages.")
+
+    def build_scheduler(self):
+        """Scheduler for the next job, with the run manifest's recent item durations as costs."""
+        try:
+            priorities = load_priorities(self.priorities_path)
+        except Exception as e:
+            self.log(f"Could not read priorities from {self.priorities_path}: {e}")
+            priorities = None
+        try:
+            deadline = parse_deadline(self.deadline)
+        except ValueError:
+            self.log(f"Invalid deadline '{self.deadline}' (expected HH:MM), ignoring it.")
+            deadline = None
+        durations = self.manifest.item_durations(HISTORY_DAYS) if self.manifest else {}
+        return JobScheduler(durations, priorities, deadline, reorder=self.schedule)
+
+    def log_schedule(self, queues, parallel_mode, pages):
+        """Logs the scheduler's estimate for the job (queues: see JobScheduler.plan)."""
+        plan = self.scheduler.plan(queues, parallel_mode, pages)
+        if not plan["items"]:
+            return
+        for line in self.scheduler.report_lines(plan):
+            self.log(line)
+        misses = self.scheduler.misses(plan)
+        self.predicted_misses = len(misses) if self.scheduler.deadline else None
+        self.emit("schedule", items=plan["items"], known=plan["known"], makespan=round(plan["makespan"], 1),
+                  predicted_misses=self.predicted_misses, missing=[f"{p}/{m}/{t}" for p, m, t, _ in misses[:50]])
+
+    def max_active_slots(self, queue_count, parallel_mode, pages_per_model):
+        """Number of pages a job keeps open at most (upper bound for the adaptive limit)."""
+        return queue_count * pages_per_model if parallel_mode else pages_per_model
+
+    @asynccontextmanager
+    async def concurrency_slot(self):
+        """Holds an adaptive concurrency slot when adaptive mode is on, otherwise a no-op."""
+        if self.controller:
+            async with self.controller.slot():
+                yield
+        else:
+            yield
+
+    @asynccontextmanager
+    async def page_budget(self):
+        """Holds an open-page slot of the adaptive limit when adaptive mode is on, otherwise a no-op."""
+        if self.controller:
+            async with self.controller.page_slot():
+                yield
+        else:
+            yield
+
+    def record_failure(self, platform, model, ticker, reason="", failure_class=None, attempts=0):
         """Records a failure in both log string format and structured format."""
+        if failure_class is None:
+            failure_class = "stopped" if reason == "Stopped" else "error"
+
         # String format for log
         prefix = f"[CME-{model}]" if platform == "cme" else f"[{model}]"
         log_msg = f"{prefix} {ticker}"
         if reason:
              log_msg += f" ({reason})"
+        elif failure_class:
+             log_msg += f" ({failure_class})"
         
         # Avoid duplicates if possible (though retry logic might cause them if not careful, but list append is simple)
         self.failed_items.append(log_msg)
@@ -176,82 +658,146 @@ class LietaScraper:
         self.failed_tasks_structured.append({
             "platform": platform,
             "model": model,
-            "ticker": ticker
+            "ticker": ticker,
+            "failure_class": failure_class,
+            "attempts": attempts,
+            "failed_at": datetime.now().isoformat(timespec="seconds")
         })
 
-    async def run_scraping_job(self, tickers: list, models: list, cme_tickers: list, cme_models: list, download_folder: str, parallel_mode: bool = False):
+        if self.manifest:
+            status = "stopped" if failure_class == "stopped" else "failed"
+            self.manifest.record(self.run_date, platform, model, ticker, status, attempts=attempts, failure_class=failure_class)
+
+    def record_success(self, platform, model, ticker, attempts, output_path=None, started_at=None):
+        """Writes a completed item to the run manifest."""
+        if self.manifest:
+            self.manifest.record(self.run_date, platform, model, ticker, "success", attempts=attempts, output_path=output_path, started_at=started_at)
+        self.metrics.record_completion(platform, model)
+        if self.scheduler and self.scheduler.deadline and time.time() > self.scheduler.deadline:
+            self.late_items += 1
+        if started_at:
+            self.metrics.record(platform, model, "item", time.time() - started_at)
+
+    def pending_items(self, platform, models, tickers, done):
+        """Ticker-major list of {'platform', 'model', 'ticker'} items not in `done`."""
+        items = []
+        for ticker in tickers:
+            for model in self.pending_models(platform, models, ticker, done):
+                items.append({"platform": platform, "model": model, "ticker": ticker})
+        return items
+
+    def pending_models(self, platform, models, ticker, done):
+        """Models of a ticker that are not in `done` (items already completed today)."""
+        remaining = [m for m in models if (platform, m, ticker) not in done]
+        self.skipped_count += len(models) - len(remaining)
+        return remaining
+
+    def pending_tickers(self, platform, model, tickers, done):
+        """Tickers of a model that are not in `done` (items already completed today)."""
+        remaining = [t for t in tickers if (platform, model, t) not in done]
+        self.skipped_count += len(tickers) - len(remaining)
+        return remaining
+
+    async def run_scraping_job(self, tickers: list, models: list, cme_tickers: list, cme_models: list, download_folder: str, parallel_mode: bool = False, pages_per_model: int = 1, resume: bool = False, ordering: str = "model"):
         """
-        Main scrapping logic. Returns structured failed tasks.
+        Main scrapping logic. Returns structured failed tasks (None if the job could not start).
+        pages_per_model: number of pages opened per model (per platform in ticker-major ordering), sharing one queue.
+        resume: skip items the run manifest records as completed today.
+        ordering: "model" (model-major) or "ticker" (ticker-major), see ORDERINGS.
         """
         self.stop_requested = False
         if not os.path.exists(self.storage_state_path):
              self.log("No session file found. Please use 'Log in via Browser' first.")
-             return []
+             # Nothing was attempted (unlike [], which means everything succeeded)
+             return None
 
-        self.success_count = 0
-        self.failed_items = []
-        self.failed_tasks_structured = [] # List of {'platform': 'std'|'cme', 'model': str, 'ticker': str}
+        if ordering == "ticker":
+            # One queue per platform
+            queue_count = (1 if tickers and models else 0) + (1 if cme_tickers and cme_models else 0)
+        else:
+            queue_count = (len(models) if tickers else 0) + (len(cme_models) if cme_tickers else 0)
+        self.reset_job_state(self.max_active_slots(queue_count, parallel_mode, pages_per_model))
+        self.ordering = ordering
+
+        self.log(f"Starting job. Std: {len(models)} models, CME: {len(cme_models)} models. Pages per model: {pages_per_model}. Ordering: {ordering}-major")
 
-        self.log(f"Starting job. Std: {len(models)} models, CME: {len(cme_models)} models.")
+        done = set()
+        if resume:
+            if self.manifest:
+                done = self.manifest.completed_items(self.run_date)
+                self.log(f"Resume: {len(done)} items already completed today will be skipped.")
+            else:
+                self.log("Resume requested but the run manifest is disabled. Running everything.")
+
+        if ordering == "ticker":
+            items = self.pending_items("std", models, tickers, done) + self.pending_items("cme", cme_models, cme_tickers, done)
+            tv_codes_std, tv_codes_cme = await self.run_task_groups(items, download_folder, parallel_mode, pages_per_model, ordering="ticker")
+            return self.finish_scraping_job(tv_codes_std, tv_codes_cme, download_folder)
         
         tv_codes_std = []
         tv_codes_cme = []
-        
-        if not self.browser:
-            await self.start_browser(headless=False)
 
-        context = await self.browser.new_context(storage_state=self.storage_state_path, accept_downloads=True)
+        # One queue per (platform, model), in schedule order (see scheduler.py)
+        queues = []
+        if tickers and models:
+            queues += [("std", m, self.pending_tickers("std", m, tickers, done)) for m in models]
+        if cme_tickers and cme_models:
+            queues += [("cme", m, self.pending_tickers("cme", m, cme_tickers, done)) for m in cme_models]
+        queues = self.scheduler.order_queues(queues, by_tier=not parallel_mode)
+        self.log_schedule([[[(p, m, t)] for t in q_tickers] for p, m, q_tickers in queues], parallel_mode, pages_per_model)
+
+        context = await self.new_job_context()
         
         tasks = []
         
-        # 1. Standard Platform Tasks
-        if tickers and models:
-            for i, model in enumerate(models):
-                if self.stop_requested:
-                    # In sequential mode, this catches future models
-                    for skipped_model in models[i:]:
-                        for t in tickers:
-                            self.record_failure("std", skipped_model, t, "Stopped")
-                    break
-                    
-                # Standard URL, No prefix
-                coro = self.process_model_queue(context, model, tickers, download_folder, tv_codes_std, target_url=f"{BASE_URL}/platform", subfolder_prefix="")
-                if parallel_mode:
-                    tasks.append(coro)
-                else:
-                    await coro
+        for i, (platform, model, model_tickers) in enumerate(queues):
+            if self.stop_requested:
+                # In sequential mode, this catches future models
+                for skipped_platform, skipped_model, skipped_tickers in queues[i:]:
+                    for t in skipped_tickers:
+                        self.record_failure(skipped_platform, skipped_model, t, "Stopped")
+                break
 
-        # 2. CME Platform Tasks
-        if cme_tickers and cme_models:
-            CME_URL = f"{BASE_URL}/platform/cme"
-            for i, model in enumerate(cme_models):
-                if self.stop_requested:
-                    # In sequential mode, this catches future models
-                    for skipped_model in cme_models[i:]:
-                        for t in cme_tickers:
-                            self.record_failure("cme", skipped_model, t, "Stopped")
-                    break
-                    
-                # CME URL, "CME" prefix
-                coro = self.process_model_queue(context, model, cme_tickers, download_folder, tv_codes_cme, target_url=CME_URL, subfolder_prefix="CME")
-                if parallel_mode:
-                    tasks.append(coro)
-                else:
-                    await coro
+            is_cme = platform == "cme"
+            if not model_tickers:
+                self.log(f"[{'CME-' if is_cme else ''}{model}] All tickers already completed today. Skipping.")
+                continue
+
+            # CME: CME URL, "CME" prefix. Standard: standard URL, no prefix
+            coro = self.process_model_queue(
+                context, model, model_tickers, download_folder, tv_codes_cme if is_cme else tv_codes_std,
+                target_url=self.cme_platform_url if is_cme else self.std_platform_url,
+                subfolder_prefix="CME" if is_cme else "", pages_per_model=pages_per_model
+            )
+            if parallel_mode:
+                tasks.append(coro)
+            else:
+                await coro
 
         if parallel_mode and tasks:
             await asyncio.gather(*tasks)
-        
+
+        return self.finish_scraping_job(tv_codes_std, tv_codes_cme, download_folder)
+
+    def finish_scraping_job(self, tv_codes_std, tv_codes_cme, download_folder):
+        """Saves TV codes, records the job timing for the ordering comparison and logs the summary."""
         # Save TV codes
         if tv_codes_std:
             self.save_tv_codes(tv_codes_std, download_folder, subfolder="")
         if tv_codes_cme:
             self.save_tv_codes(tv_codes_cme, download_folder, subfolder="CME")
+
+        self.storage_report(download_folder)
+
+        # Stopped jobs are not representative
+        if self.manifest and self.ordering and not self.stop_requested:
+            self.manifest.record_run(self.run_date, self.ordering, self.success_count + len(self.failed_items),
+                                     self.success_count, time.time() - self.job_started)
             
         self.log_summary()
         return self.failed_tasks_structured
 
-    async def retry_scraping_job(self, failed_tasks, download_folder, parallel_mode):
+    async def retry_scraping_job(self, failed_tasks, download_folder, parallel_mode, pages_per_model=1, ordering="model"):
         """
         Retries specifically the failed tasks.
         failed_tasks: list of dicts {'platform': 'std'|'cme', 'model': ..., 'ticker': ...}
@@ -261,16 +807,70 @@ class LietaScraper:
              self.log("No session file found. Please use 'Log in via Browser' first.")
              return failed_tasks 
 
-        self.success_count = 0
-        self.failed_items = []
-        self.failed_tasks_structured = [] # New failures during retry
+        self.reset_job_state(self.max_active_slots(len({(i['platform'], i['model']) for i in failed_tasks}), parallel_mode, pages_per_model)) # New failures during retry
 
-        self.log(f"Starting RETRY job. {len(failed_tasks)} items.")
+        by_class = {}
+        for item in failed_tasks:
+            failure_class = item.get("failure_class", "error")
+            by_class[failure_class] = by_class.get(failure_class, 0) + 1
+        breakdown = ", ".join(f"{k}: {v}" for k, v in sorted(by_class.items()))
+        self.log(f"Starting RETRY job. {len(failed_tasks)} items ({breakdown}).")
         
+        tv_codes_std, tv_codes_cme = await self.run_task_groups(failed_tasks, download_folder, parallel_mode, pages_per_model, ordering)
+
+        # Save TV codes
+        if tv_codes_std:
+            self.save_tv_codes(tv_codes_std, download_folder, subfolder="")
+        if tv_codes_cme:
+            self.save_tv_codes(tv_codes_cme, download_folder, subfolder="CME")
+
+        self.storage_report(download_folder)
+        self.log_summary()
+        return self.failed_tasks_structured
+
+    async def run_shard(self, tasks, download_folder, parallel_mode, pages_per_model=1, ordering="model"):
+        """
+        Runs one shard of a multi-process job (see sharding.py): like a retry job over `tasks`,
+        but TV codes are returned instead of saved and no summary is logged, so the parent
+        process can merge all shards into one output tree and one summary.
+        Returns None if the job could not start.
+        """
+        self.stop_requested = False
+        if not os.path.exists(self.storage_state_path):
+             self.log("No session file found. Please use 'Log in via Browser' first.")
+             return None
+
+        self.reset_job_state(self.max_active_slots(len({(i['platform'], i['model']) for i in tasks}), parallel_mode, pages_per_model))
+        self.log(f"Starting shard. {len(tasks)} items.")
+
+        tv_codes_std, tv_codes_cme = await self.run_task_groups(tasks, download_folder, parallel_mode, pages_per_model, ordering)
+        return {
+            "metrics": {"samples": self.metrics.samples, "completed": self.metrics.completed},
+            "success_count": self.success_count,
+            "failed_items": self.failed_items,
+            "failed_tasks": self.failed_tasks_structured,
+            "tv_codes_std": tv_codes_std,
+            "tv_codes_cme": tv_codes_cme,
+            "dedup_saved_bytes": self.dedup_saved_bytes,
+            "late_items": self.late_items,
+            "predicted_misses": self.predicted_misses,
+            "traces": self.trace_counts(),
+            "peak_concurrency": self.controller.peak_limit if self.controller else None
+        }
+
+    async def run_task_groups(self, items, download_folder, parallel_mode, pages_per_model=1, ordering="model"):
+        """
+        Processes a list of {'platform', 'model', 'ticker'} items, grouped into one queue per (platform, model),
+        or one queue per platform in ticker-major ordering.
+        Returns (tv_codes_std, tv_codes_cme).
+        """
+        if ordering == "ticker":
+            return await self.run_ticker_groups(items, download_folder, parallel_mode, pages_per_model)
+
         # Group tasks by (platform, model) to utilize batch processing
         grouped = {} # text_key -> {'platform': p, 'model': m, 'tickers': [], 'url': ...}
         
-        for item in failed_tasks:
+        for item in items:
             platform = item['platform']
             model = item['model']
             ticker = item['ticker']
@@ -278,10 +878,10 @@ class LietaScraper:
             key = (platform, model)
             if key not in grouped:
                 if platform == 'cme':
-                    url = f"{BASE_URL}/platform/cme"
+                    url = self.cme_platform_url
                     sub = "CME"
                 else:
-                    url = f"{BASE_URL}/platform"
+                    url = self.std_platform_url
                     sub = ""
                 grouped[key] = {
                     'platform': platform,
@@ -292,17 +892,19 @@ class LietaScraper:
                 }
             grouped[key]['tickers'].append(ticker)
 
+        # Queues and their tickers in schedule order (see scheduler.py)
+        ordered = self.scheduler.order_queues([(g['platform'], g['model'], g['tickers']) for g in grouped.values()], by_tier=not parallel_mode)
+        queues = [dict(grouped[(p, m)], tickers=t) for p, m, t in ordered]
+        self.log_schedule([[[(p, m, t)] for t in tickers] for p, m, tickers in ordered], parallel_mode, pages_per_model)
+
         tv_codes_std = []
         tv_codes_cme = []
 
-        if not self.browser:
-            await self.start_browser(headless=False)
-
-        context = await self.browser.new_context(storage_state=self.storage_state_path, accept_downloads=True)
+        context = await self.new_job_context()
         
         tasks = []
         
-        for k, task_info in grouped.items():
+        for task_info in queues:
             if self.stop_requested:
                 # Mark remaining as failed
                 for t in task_info['tickers']:
@@ -323,7 +925,8 @@ class LietaScraper:
                 download_folder, 
                 codes_list, 
                 target_url=task_info['url'], 
-                subfolder_prefix=task_info['sub']
+                subfolder_prefix=task_info['sub'],
+                pages_per_model=pages_per_model
             )
             
             if parallel_mode:
@@ -334,14 +937,98 @@ class LietaScraper:
         if parallel_mode and tasks:
             await asyncio.gather(*tasks)
 
-        # Save TV codes
-        if tv_codes_std:
-            self.save_tv_codes(tv_codes_std, download_folder, subfolder="")
-        if tv_codes_cme:
-            self.save_tv_codes(tv_codes_cme, download_folder, subfolder="CME")
-            
-        self.log_summary()
-        return self.failed_tasks_structured
+        return tv_codes_std, tv_codes_cme
+
+    async def run_ticker_groups(self, items, download_folder, parallel_mode, pages_per_model=1):
+        """
+        Ticker-major counterpart of run_task_groups: one ticker queue per platform,
+        each ticker carrying the models still to scrape for it.
+        """
+        grouped = {} # platform -> {ticker: [models]}
+        for item in items:
+            grouped.setdefault(item['platform'], {}).setdefault(item['ticker'], []).append(item['model'])
+        # Tickers in schedule order (see scheduler.py)
+        queues = self.scheduler.order_ticker_queues(grouped, by_tier=not parallel_mode)
+        self.log_schedule([
+            [[(platform, m, t) for m in models] for t, models in ticker_models.items()]
+            for platform, ticker_models in queues
+        ], parallel_mode, pages_per_model)
+
+        tv_codes = {"std": [], "cme": []}
+        context = await self.new_job_context()
+
+        tasks = []
+        for platform, ticker_models in queues:
+            if self.stop_requested:
+                for t, models in ticker_models.items():
+                    for m in models:
+                        self.record_failure(platform, m, t, "Stopped")
+                continue
+
+            coro = self.process_ticker_queue(
+                context,
+                ticker_models,
+                download_folder,
+                tv_codes[platform],
+                target_url=self.cme_platform_url if platform == "cme" else self.std_platform_url,
+                subfolder_prefix="CME" if platform == "cme" else "",
+                pages=pages_per_model
+            )
+
+            if parallel_mode:
+                tasks.append(coro)
+            else:
+                await coro
+
+        if parallel_mode and tasks:
+            await asyncio.gather(*tasks)
+
+        return tv_codes["std"], tv_codes["cme"]
+
+    def job_summary(self):
+        """Machine-readable counterpart of log_summary()."""
+        by_class = {}
+        for item in self.failed_tasks_structured:
+            by_class[item["failure_class"]] = by_class.get(item["failure_class"], 0) + 1
+        return {
+            "success": self.success_count,
+            "failed": len(self.failed_items),
+            "skipped": self.skipped_count,
+            "failures_by_class": by_class,
+            "failed_tasks": self.failed_tasks_structured,
+            "peak_concurrency": self.controller.peak_limit if self.controller else None,
+            "dedup_saved_bytes": self.dedup_saved_bytes,
+            "ordering": self.ordering,
+            "metrics_file": self.metrics_file,
+            "traces": sum(self.trace_counts().values()),
+            "trace_dirs": sorted(self.trace_counts()),
+            "predicted_misses": self.predicted_misses,
+            "late_items": self.late_items if self.scheduler and self.scheduler.deadline else None,
+            "elapsed": round(time.time() - self.job_started, 3) if self.job_started else None
+        }
+
+    def trace_counts(self):
+        """{trace run dir: captures} of this job, its own tracer's and the shards' (dirs with traces only)."""
+        counts = dict(self.shard_traces)
+        if self.tracer and self.tracer.captures:
+            counts[self.tracer.run_dir] = counts.get(self.tracer.run_dir, 0) + self.tracer.captures
+        return counts
+
+    def ordering_report(self):
+        """
+        Compares seconds per successful item of the two orderings over recent full jobs
+        (this one included). Returns a summary line, or None without a comparison.
+        """
+        if not (self.manifest and self.ordering):
+            return None
+        rates = {o: self.manifest.seconds_per_item(o) for o in ORDERINGS}
+        line = f"Ordering: {self.ordering}-major, " + ", ".join(
+            f"{o}-major {r:.2f}s/item" if r else f"{o}-major no runs yet" for o, r in rates.items()
+        )
+        if all(rates.values()):
+            faster, slower = sorted(ORDERINGS, key=lambda o: rates[o])
+            line += f" -> {faster}-major is {(1 - rates[faster] / rates[slower]) * 100:.0f}% faster (last 5 runs each)"
+        return line
 
     def log_summary(self):
         total = self.success_count + len(self.failed_items)
@@ -349,334 +1036,794 @@ class LietaScraper:
         self.log(f"JOB SUMMARY")
         self.log(f"Total Processed: {total}")
         self.log(f"Success: {self.success_count}")
+        if self.skipped_count:
+            self.log(f"Skipped (already done today): {self.skipped_count}")
         self.log(f"Failed: {len(self.failed_items)}")
+        if self.failed_tasks_structured:
+            by_class = {}
+            for item in self.failed_tasks_structured:
+                by_class[item["failure_class"]] = by_class.get(item["failure_class"], 0) + 1
+            self.log("Failures by class: " + ", ".join(f"{k}: {v}" for k, v in sorted(by_class.items())))
         if self.failed_items:
             self.log("Failed Items:")
             for item in self.failed_items:
                 self.log(f" - {item}")
+        if self.controller:
+            self.log(f"Adaptive concurrency: final limit {self.controller.current_limit()}, peak {self.controller.peak_limit} (max {self.controller.max_limit}).")
+        report = self.ordering_report()
+        if report:
+            self.log(report)
+        if self.scheduler and self.scheduler.deadline:
+            self.log(f"Deadline {datetime.fromtimestamp(self.scheduler.deadline):%H:%M}: {self.late_items} items finished after it, {len(self.failed_items)} failed.")
+        for run_dir, captures in sorted(self.trace_counts().items()):
+            self.log(f"Failure traces: {captures} written to {run_dir}")
+        if self.metrics.samples:
+            self.log("Latency by phase:")
+            for line in self.metrics.report_lines():
+                self.log(line)
+            if self.metrics_dir:
+                try:
+                    self.metrics_file = self.metrics.export(self.metrics_dir)
+                    self.log(f"Metrics written to {self.metrics_file}")
+                except Exception as e:
+                    self.log(f"Could not write metrics: {e}")
         self.log("="*30 + "\n")
+        if self.event_func:
+            summary = self.job_summary()
+            summary.pop("failed_tasks", None)
+            self.emit("job", **summary)
             
         # await context.close() # Done in caller wrapper
 
-    async def process_model_queue(self, context, model, tickers, download_folder, tv_codes_list, target_url, subfolder_prefix=""):
+    async def open_model_page(self, context, model, target_url, prefix_log):
         """
-        Processes all tickers for a single model in one page.
+        Opens a new page, navigates to the platform and selects the model.
         """
-        page = await context.new_page()
-        try:
+        platform = "cme" if target_url == self.cme_platform_url else "std"
+        with self.metrics.phase(platform, model, "open_page"):
+            page = await context.new_page()
             page.set_default_timeout(60000) # Set timeout to 60s
-            prefix_log = f"[CME-{model}]" if subfolder_prefix else f"[{model}]"
-            short_plat = "cme" if subfolder_prefix == "CME" else "std"
-            
-            self.log(f"{prefix_log} Page initialized.")
+            await self.install_page_probe(page)
             await page.goto(target_url)
             await page.wait_for_load_state("networkidle")
-            
-            # Select Model
+
+        await self.select_model(page, model, prefix_log)
+        return page
+
+    async def select_model(self, page, model, prefix_log):
+        # Select Model
+        platform = "cme" if "/platform/cme" in page.url else "std"
+        with self.metrics.phase(platform, model, "select_model"):
             await page.get_by_text("Select model", exact=False).first.click()
             await asyncio.sleep(0.5)
             await page.get_by_text(model, exact=True).first.click()
-            self.log(f"{prefix_log} Model selected.")
+        self.log(f"{prefix_log} Model selected.")
 
-            for i, ticker in enumerate(tickers):
-                if self.stop_requested:
-                    self.log(f"{prefix_log} Stopped. Skipping remaining tickers.")
-                    for skipped_ticker in tickers[i:]:
-                         self.record_failure(short_plat, model, skipped_ticker, "Stopped")
-                    break
-                
-                await self.process_single_ticker(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
-                
-        except Exception as e:
-            self.log(f"{prefix_log} Error: {e}")
-            # If the whole page/model setup failed, mark all tickers as failed
-            # We don't know which ones ran if we crash outside the loop, but usually we are inside try block.
-            # If we are here, something big failed.
-            # Simple approach: Log generic error, but we lose tracking who failed exactly if we don't have index.
-            # Ideally we should fail all input tickers here if loop didn't finish
-            # But the 'process_single_ticker' handles individual errors.
-            pass
-        finally:
+    async def acquire_model_page(self, context, model, target_url, prefix_log):
+        """
+        Returns an initialized page for the model: a warm one kept from a previous job
+        (persistent mode) if available, otherwise a newly opened one.
+        """
+        cached = self.page_cache.get((target_url, model), [])
+        while cached:
+            page = cached.pop()
+            if not page.is_closed() and page.context == context:
+                self.log(f"{prefix_log} Reusing warm page.")
+                return page
+        page = await self.open_model_page(context, model, target_url, prefix_log)
+        self.log(f"{prefix_log} Page initialized.")
+        return page
+
+    async def release_model_page(self, page, model, target_url, healthy=True):
+        """Keeps a healthy page for the next job in persistent mode, closes it otherwise."""
+        if self.persistent and healthy and not page.is_closed():
+            self.page_cache.setdefault((target_url, model), []).append(page)
+            return
+        try:
             await page.close()
+        except Exception:
+            pass
+
+    async def prewarm_model_pages(self, queues, pages_per_model=1):
+        """
+        Opens and initializes pages ahead of a job (persistent mode).
+        queues: list of (target_url, model).
+        """
+        context = await self.new_job_context()
 
-    async def process_single_ticker(self, page, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
-        max_retries = 15
+        async def warm(target_url, model):
+            prefix_log = f"[CME-{model}]" if target_url == self.cme_platform_url else f"[{model}]"
+            try:
+                page = await self.open_model_page(context, model, target_url, prefix_log)
+                await self.release_model_page(page, model, target_url)
+            except Exception as e:
+                self.log(f"{prefix_log} Warm-up failed: {e}")
+
+        jobs = []
+        for target_url, model in queues:
+            missing = pages_per_model - len(self.page_cache.get((target_url, model), []))
+            jobs += [warm(target_url, model) for _ in range(missing)]
+        await asyncio.gather(*jobs)
+        self.log(f"Warm-up done: {sum(len(v) for v in self.page_cache.values())} model pages ready.")
+
+    async def process_model_queue(self, context, model, tickers, download_folder, tv_codes_list, target_url, subfolder_prefix="", pages_per_model=1):
+        """
+        Processes all tickers for a single model.
+        A pool of up to `pages_per_model` pages is opened (each initialized once, lazily under the
+        adaptive limit) and every page pulls the next ticker from a shared queue.
+        """
+        prefix_log = f"[CME-{model}]" if subfolder_prefix else f"[{model}]"
         short_plat = "cme" if subfolder_prefix == "CME" else "std"
-        
-        for attempt in range(max_retries):
-            if self.stop_requested: 
-                self.record_failure(short_plat, model, ticker, "Stopped")
-                return
+
+        queue = asyncio.Queue()
+        for ticker in tickers:
+            queue.put_nowait(ticker)
+
+        # No point in opening more pages than there are tickers
+        pool_size = max(1, min(pages_per_model, len(tickers)))
+
+        async def worker(worker_id):
+            # Adaptive mode: the page is only opened once the limit has room for it
+            async with self.page_budget():
+                if not queue.empty() and not self.stop_requested:
+                    await run_worker(worker_id)
+
+        async def run_worker(worker_id):
+            page = None
+            healthy = False
+            worker_log = f"{prefix_log}[P{worker_id}]" if pool_size > 1 else prefix_log
             try:
-                # 2. Input Ticker
-                # Placeholder "Ticker"
-                await page.get_by_placeholder("Ticker").fill(ticker)
-                
-                # 3. Enter
-                await page.get_by_role("button", name="Enter").click()
-                
-                # --- Early Failure Detection (User Request) ---
-                # "如果按下 Enter 後等兩秒沒有出現這個畫面，也要直接 retry"
-                await asyncio.sleep(2)
-                
-                # Check 1: Is the specific loading text present?
-                loading_text_present = await page.get_by_text("有些模型需要較長的時間計算").count() > 0
-                
-                # Check 2: Is the data already valid (Fast load)?
-                # If data loaded instantly, we shouldn't fail even if loading text is gone.
-                fast_check_content = await page.evaluate("() => document.body.innerText")
-                data_already_loaded = False
-                if f"{ticker} " in fast_check_content or f"{ticker}:" in fast_check_content or \
-                   f"{ticker}\n" in fast_check_content or f" {ticker}" in fast_check_content:
-                    data_already_loaded = True
-                
-                if not loading_text_present and not data_already_loaded:
-                    raise Exception("Action failed: No loading screen or data update detected after 2s (Click might have been ignored).")
-                
-                # 4. Wait for processing
-                # Detection: "Download" button becomes enabled? Or data appears?
-                # User said "wait for data load out".
-                # We can wait for a spinner to disappear or "Download" to trigger.
-                # Let's wait for the "Download" button to be clickable/enabled.
-                
-                # Also handle "System Busy" or failure texts here if they exist.
-                
-                download_btn = page.get_by_role("button", name="下載") # Chinese "Download"
-                # Or English "Download" depending on lang. Screenshot shows "下載".
-                
-                # Wait for response
-                # We'll wait up to 30s
-                
-                # 4. Wait for processing & Validate Data Load
-                # Validate that the page has actually loaded the data for the requested TICKER
-                # This prevents downloading stale data from the previous search
-                
-                data_validated = False
-                for _ in range(120): # Wait up to 60s
-                    if self.stop_requested: return
+                page = await self.acquire_model_page(context, model, target_url, worker_log)
 
+                async def reopen_page():
+                    nonlocal page
                     try:
-                        # 4.1 Check for Server Errors (Toast)
-                        # 4.1 Check for Server Errors (Toast)
-                            # Check CN Toast
-                        t_cn = page.get_by_text("獲取數據失敗")
-                        if await t_cn.count() > 0:
-                            msg = await t_cn.first.text_content()
-                            raise Exception(f"Server indicated failure: {msg}")
-
-                        # Check EN Toast
-                        t_en = page.get_by_text("Please Try Again")
-                        if await t_en.count() > 0:
-                            msg = await t_en.first.text_content()
-                            raise Exception(f"Server indicated failure: {msg}")
-
-                        # 4.2 Check for Ticker Presence in Content
-                        # We get the full text to ensure the new Ticker is mentioned in the charts/header
-                        content_text = await page.evaluate("() => document.body.innerText")
-                        
-                        # Heuristic: The Ticker should appear in the body text (Chart Title, etc.)
-                        # We look for the ticker string. To avoid matching the input box only, 
-                        # we can try to look for "{Ticker} Dealers" or just assume if it appears 
-                        # multiple times or in specific context it's good.
-                        # Simple check: If content contains Ticker. 
-                        # Problem: Input box contains Ticker.
-                        # Refined Check: The screenshot shows "SPX Dealers Gamma Hedging".
-                        # So we check for Ticker + " " (space) or Ticker + ":" or Ticker + " Dealers"
-                        
-                        # If we just switched, the OLD ticker might still be there for a split second?
-                        # No, usually innerText updates. 
-                        # We want to ensure at least ONE instance of the Ticker exists that is NOT the input?
-                        # Actually, looking for the specific header pattern from screenshot is best.
-                        # But we need to be general.
-                        
-                        # Let's count occurrences of the Ticker string.
-                        # If > 1 (Input + Header), likely loaded.
-                        # Or check if "Dealers" is present?
-                        
-                        # Let's trust that if the text contains "{Ticker} ", it's likely the header or content.
-                        if f"{ticker} " in content_text or f"{ticker}:" in content_text or \
-                           f"{ticker}\n" in content_text or f" {ticker}" in content_text:
-                            data_validated = True
-                            break
-                            
-                    except Exception as e:
-                        if "Server indicated" in str(e): raise e
-                        # Ignore other parsing errors while waiting
+                        await page.close()
+                    except Exception:
                         pass
-                        
-                    await asyncio.sleep(0.5)
-                
-                if not data_validated:
-                     # This usually means the Spinner didn't stop, or the page never updated from the previous ticker
-                     raise Exception(f"Validation failed: Ticker '{ticker}' not found in loaded content (Stale data?).")
-                
-                # Additional small buffer for rendering
-                await asyncio.sleep(1)
-                
-                # If model is TV Code, we scrape text
-                # If model is TV Code, we scrape text
-                if model == "TV Code":
-                    # Polling for data update (up to 20s)
-                    found_code_line = None
-                    for _ in range(120): # 60 seconds total
-                        if self.stop_requested: return
-                        
-                        # Wait for ANY Put Wall to be present logic (fast check)
-                        try:
-                            # We verify "Put Wall" exists first to avoid reading empty body
-                            if await page.get_by_text("Put Wall").count() > 0:
-                                content = await page.evaluate("() => document.body.innerText")
-                                found_current_ticker = False
-                                for line in content.split('\n'):
-                                    # Relaxed check: Just ticker and Put Wall in same line.
-                                    if ticker in line and "Put Wall" in line:
-                                        found_code_line = line
-                                        found_current_ticker = True
-                                        break
-                                
-                                if found_code_line:
-                                    break
-                                
-                                # If we found "Put Wall" but NOT the current ticker, this is likely stale data or server busy
-                                # Check for specific error message toast if possible, or just fail fast
-                                if not found_current_ticker:
-                                    # Check CN Toast
-                                    t_cn = page.get_by_text("獲取數據失敗")
-                                    if await t_cn.count() > 0:
-                                        msg = await t_cn.first.text_content()
-                                        raise Exception(f"Server indicated failure: {msg}")
-                                    
-                                    # Check EN Toast
-                                    t_en = page.get_by_text("Please Try Again")
-                                    if await t_en.count() > 0:
-                                        msg = await t_en.first.text_content()
-                                        raise Exception(f"Server indicated failure: {msg}")
-                                    
-                                    # Stale data detection
-                                    raise Exception(f"Stale data detected: Found 'Put Wall' but not for {ticker}.")
-
-                            # Check CN Toast
-                            t_cn = page.get_by_text("獲取數據失敗")
-                            if await t_cn.count() > 0:
-                                msg = await t_cn.first.text_content()
-                                raise Exception(f"Server indicated failure: {msg}")
-                            
-                            # Check EN Toast
-                            t_en = page.get_by_text("Please Try Again")
-                            if await t_en.count() > 0:
-                                msg = await t_en.first.text_content()
-                                raise Exception(f"Server indicated failure: {msg}")
-
-                        except Exception as e:
-                            # specific retry exceptions should propagate
-                            if "Server indicated" in str(e) or "Stale data" in str(e):
-                                raise e
-                            pass
-                        
-                        if found_code_line:
-                            break
-                        await asyncio.sleep(0.5)
-                    
-                    if found_code_line:
-                        tv_codes_list.append(found_code_line.strip('" '))
-                        self.log(f"[{model}] {ticker} - Code extracted.")
-                        self.success_count += 1
-                        # Wait a bit to ensure we don't spam too fast
-                        await asyncio.sleep(1) 
-                    else:
-                        raise Exception(f"Validation failed: No data found for ticker {ticker} (Stale data from previous search?)")
+                    page = await self.open_model_page(context, model, target_url, worker_log)
+                    self.log(f"{worker_log} Page reopened after crash.")
+                    return page
+
+                while not queue.empty():
+                    if self.stop_requested:
+                        return
+                    ticker = queue.get_nowait()
+                    await self.process_single_ticker(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix, reopen_page=reopen_page)
+                healthy = True
+            except Exception as e:
+                # Page setup (or the page itself) failed. Remaining tickers stay
+                # in the queue so the other pages of the pool can pick them up.
+                self.log(f"{worker_log} Error: {e}")
+            finally:
+                if page:
+                    await self.release_model_page(page, model, target_url, healthy=healthy)
+
+        await asyncio.gather(*(worker(i + 1) for i in range(pool_size)))
+
+        # Anything left in the queue was never processed (stop requested or every page died)
+        leftover = []
+        while not queue.empty():
+            leftover.append(queue.get_nowait())
+        if leftover:
+            if self.stop_requested:
+                self.log(f"{prefix_log} Stopped. Skipping remaining tickers.")
+            for skipped_ticker in leftover:
+                if self.stop_requested:
+                    self.record_failure(short_plat, model, skipped_ticker, "Stopped")
                 else:
-                    # Standard Download
-                    # We need to monitor for Error Toast WHILE waiting for download
-                    # Create a task for the download event
+                    self.record_failure(short_plat, model, skipped_ticker, "Page failed", failure_class="page_crashed")
+
+    async def process_ticker_queue(self, context, ticker_models, download_folder, tv_codes_list, target_url, subfolder_prefix="", pages=1):
+        """
+        Ticker-major processing of one platform. ticker_models: {ticker: [models]}.
+        A pool of `pages` pages pulls the next ticker from a shared queue, and each page
+        enters that ticker once per model while switching models in place, so the platform
+        (and the page) can reuse the ticker's already loaded data.
+        """
+        platform_log = "[CME]" if subfolder_prefix else "[STD]"
+        short_plat = "cme" if subfolder_prefix == "CME" else "std"
+
+        queue = asyncio.Queue()
+        for ticker in ticker_models:
+            queue.put_nowait(ticker)
+
+        pool_size = max(1, min(pages, len(ticker_models)))
+        first_model = next(iter(ticker_models.values()))[0]
+
+        async def worker(worker_id):
+            # Adaptive mode: the page is only opened once the limit has room for it
+            async with self.page_budget():
+                if not queue.empty() and not self.stop_requested:
+                    await run_worker(worker_id)
+
+        async def run_worker(worker_id):
+            page = None
+            page_model = None
+            healthy = False
+            worker_log = f"{platform_log}[P{worker_id}]" if pool_size > 1 else platform_log
+            try:
+                page = await self.acquire_model_page(context, first_model, target_url, worker_log)
+                page_model = first_model
+
+                async def reopen_page():
+                    nonlocal page, page_model
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                    page = None
+                    page_model = None
+                    page = await self.open_model_page(context, first_model, target_url, worker_log)
+                    page_model = first_model
+                    self.log(f"{worker_log} Page reopened after crash.")
+                    return page
+
+                while not queue.empty():
+                    if self.stop_requested:
+                        return
+                    ticker = queue.get_nowait()
+                    # Start with the model the page already shows (saves one switch per ticker)
+                    models = sorted(ticker_models[ticker], key=lambda m: m != page_model)
                     try:
-                        async with page.expect_download(timeout=60000) as download_info:
-                            await download_btn.click()
-                            
-                            # Polling for error while waiting for download
-                            # Since expect_download is a context manager that waits on __exit__, 
-                            # we can't easily run a parallel loop *inside* the with-block efficiently 
-                            # because flow blocks at __exit__.
-                            # HOWEVER, Playwright's expect_download returns a Download object when yielded? 
-                            # No, it yields an EventInfo that you await .value on.
-                            
-                            # Hack: We can start a background check loop, but we need to stop it when download starts.
-                            # Better approach: Use asyncio.wait between download_info.value and error check?
-                            
-                            # Let's try a custom wait loop instead of simple await download_info.value
-                            
-                            # Create a task for Getting the download
-                            download_task = asyncio.create_task(download_info.value)
-                            
-                            # Create a polling loop for error visibility
-                            # Create a polling loop for error visibility
-                            async def check_error():
-                                for _ in range(120): # 60s
-                                    # Check CN Toast
-                                    t_cn = page.get_by_text("獲取數據失敗")
-                                    if await t_cn.count() > 0:
-                                        msg = await t_cn.first.text_content()
-                                        return msg
-                                    
-                                    # Check EN Toast
-                                    t_en = page.get_by_text("Please Try Again")
-                                    if await t_en.count() > 0:
-                                        msg = await t_en.first.text_content()
-                                        return msg
-                                        
-                                    if download_task.done():
-                                        return None
-                                    await asyncio.sleep(0.5)
-                                return None
-
-                            error_task = asyncio.create_task(check_error())
-                            
-                            done, pending = await asyncio.wait([download_task, error_task], return_when=asyncio.FIRST_COMPLETED)
-                            
-                            if error_task in done:
-                                error_msg = error_task.result()
-                                if error_msg:
-                                    # Error detected
-                                    raise Exception(f"Server indicated failure (Toast detected): {error_msg}")
-                            
-                            # If we are here, either download is done OR timeout (handled by expect_download internal timeout usually? No, we need to await download_task)
-                            if not download_task.done():
-                                # This means error_task finished with False (unlikely if loop matches timeout) or we timed out logic?
-                                # Let's await download_task to get the download object
-                                # If it timed out, it will raise here.
-                                await download_task
-                            
-                            download = await download_task
-
-                    except Exception as e:
-                         # Re-raise to trigger retry
-                         raise e
-                    
-                    # Structure: 
-                    # Standard: download_folder/Model/Ticker/Ticker_date.HTML
-                    # CME: download_folder/CME/Model/Ticker/Ticker_date.HTML
-                    
-                    if subfolder_prefix:
-                        # e.g. "CME"
-                        model_dir = os.path.join(download_folder, subfolder_prefix, utils.clean_filename(model), utils.clean_filename(ticker))
+                        for model in models:
+                            async def attempt(model=model):
+                                nonlocal page_model
+                                # Switch the model in place (retries switch again if a previous try failed midway)
+                                if page_model != model:
+                                    page_model = None
+                                    await self.select_model(page, model, f"{worker_log} {ticker}")
+                                    page_model = model
+                                return await self.attempt_single_ticker(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+
+                            async def recover():
+                                await reopen_page()
+
+                            await self.run_with_retries(short_plat, model, ticker, attempt, on_page_crash=recover, page_func=lambda: page)
+                    except Exception:
+                        # The page could not be reopened: the models of this ticker not attempted yet are lost with it
+                        for model in models[models.index(model) + 1:]:
+                            self.record_failure(short_plat, model, ticker, "Page failed", failure_class="page_crashed")
+                        raise
+                healthy = True
+            except Exception as e:
+                # Remaining tickers stay in the queue for the other pages of the pool
+                self.log(f"{worker_log} Error: {e}")
+            finally:
+                if page:
+                    # Kept (persistent mode) as a warm page of whichever model it shows now
+                    await self.release_model_page(page, page_model or first_model, target_url, healthy=healthy and page_model is not None)
+
+        await asyncio.gather(*(worker(i + 1) for i in range(pool_size)))
+
+        leftover = []
+        while not queue.empty():
+            leftover.append(queue.get_nowait())
+        if leftover:
+            if self.stop_requested:
+                self.log(f"{platform_log} Stopped. Skipping remaining tickers.")
+            for skipped_ticker in leftover:
+                for model in ticker_models[skipped_ticker]:
+                    if self.stop_requested:
+                        self.record_failure(short_plat, model, skipped_ticker, "Stopped")
                     else:
-                        model_dir = os.path.join(download_folder, utils.clean_filename(model), utils.clean_filename(ticker))
-                        
-                    os.makedirs(model_dir, exist_ok=True)
-                    
-                    save_path = os.path.join(model_dir, f"{ticker}_{utils.get_timestamp_filename(prefix='', extension='.html')}")
-                    await download.save_as(save_path)
-                    self.log(f"[{model}] {ticker} - Downloaded.")
-                    self.success_count += 1
+                        self.record_failure(short_plat, model, skipped_ticker, "Page failed", failure_class="page_crashed")
+
+    async def install_page_probe(self, page):
+        """
+        Registers the in-page status probe so it survives navigations.
+        Must be called before page.goto().
+        """
+        await page.add_init_script(PAGE_PROBE_JS)
+        if self.tracer:
+            self.tracer.attach(page)
+
+    async def read_page_status(self, page, ticker, since=-1, timeout_ms=0):
+        """
+        Returns the probe status object in a single round trip.
+        If `since` equals the current DOM version, the call resolves on the next
+        DOM mutation (coalesced) or after timeout_ms, whichever comes first.
+        """
+        status = await page.evaluate(PROBE_NEXT_JS, [ticker, since, timeout_ms])
+        if status is None:
+            # Probe missing (e.g. page was not opened via open_model_page), install it now
+            await page.evaluate(PAGE_PROBE_JS)
+            status = await page.evaluate(PROBE_NEXT_JS, [ticker, since, timeout_ms])
+        return status
+
+    async def arm_page_probe(self, page):
+        """
+        Starts a load cycle in the probe right before "Enter": from then on status["fresh"] only
+        turns true for content rendered after this call (see probe.arm in PAGE_PROBE_JS).
+        """
+        if not await page.evaluate(PROBE_ARM_JS):
+            # Probe missing (e.g. page was not opened via open_model_page), install it now
+            await page.evaluate(PAGE_PROBE_JS)
+            await page.evaluate(PROBE_ARM_JS)
+
+    async def wait_for_page_state(self, page, ticker, condition, timeout, raise_on_toast=True):
+        """
+        Waits until condition(status) is true or the timeout expires, waking up on DOM changes
+        instead of polling on a fixed interval.
+        Returns the last status seen, or None if a stop was requested.
+        """
+        deadline = time.monotonic() + timeout
+        since = -1
+        while True:
+            if self.stop_requested:
+                return None
+
+            remaining = deadline - time.monotonic()
+            # Cap each wait at 1s so the stop flag stays responsive
+            slice_ms = int(max(0.0, min(remaining, 1.0)) * 1000)
+            status = await self.read_page_status(page, ticker, since, slice_ms)
+            since = status["version"]
+
+            if raise_on_toast and status["toast"]:
+                raise ServerBusyError(f"Server indicated failure: {status['toast']}")
+            if condition(status) or remaining <= 0:
+                return status
+
+    async def wait_for_dom_idle(self, page, ticker, idle_ms=300, timeout=1.0):
+        """
+        Waits until the DOM has not changed for idle_ms (rendering settled), up to timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.stop_requested:
+                return
+            status = await self.read_page_status(page, ticker)
+            if status["idleMs"] >= idle_ms:
+                return
+            await asyncio.sleep(min((idle_ms - status["idleMs"]) / 1000, max(0.0, deadline - time.monotonic())))
+
+    async def race_with_toast(self, page, ticker, awaitable, timeout=60):
+        """
+        Awaits `awaitable` (download / response event) while watching the page for an error toast.
+        Raises if the toast shows up first; otherwise returns the awaited value.
+        """
+        main_task = asyncio.ensure_future(awaitable)
+
+        async def watch_toast():
+            toast_status = await self.wait_for_page_state(page, ticker, lambda s: bool(s["toast"]), timeout=timeout, raise_on_toast=False)
+            return toast_status["toast"] if toast_status else None
+
+        error_task = asyncio.create_task(watch_toast())
+
+        try:
+            done, pending = await asyncio.wait([main_task, error_task], return_when=asyncio.FIRST_COMPLETED)
+
+            if error_task in done:
+                error_msg = error_task.result()
+                if error_msg:
+                    # Error detected
+                    main_task.cancel()
+                    raise ServerBusyError(f"Server indicated failure (Toast detected): {error_msg}")
+
+            # If it timed out, it will raise here.
+            return await main_task
+        finally:
+            error_task.cancel()
 
-                break # Success, break retry loop
+    def model_output_dir(self, download_folder, subfolder_prefix, model, ticker):
+        """
+        Returns (and creates) the output folder for one ticker of one model.
+        Standard: download_folder/Model/Ticker
+        CME: download_folder/CME/Model/Ticker
+        """
+        if subfolder_prefix:
+            # e.g. "CME"
+            model_dir = os.path.join(download_folder, subfolder_prefix, utils.clean_filename(model), utils.clean_filename(ticker))
+        else:
+            model_dir = os.path.join(download_folder, utils.clean_filename(model), utils.clean_filename(ticker))
+
+        os.makedirs(model_dir, exist_ok=True)
+        return model_dir
+
+    def is_data_response(self, response, ticker):
+        """
+        Heuristic match for the platform's data request fired by "Enter":
+        an XHR/fetch returning JSON whose URL or body mentions the ticker as a whole token.
+        """
+        request = response.request
+        if request.resource_type not in ("fetch", "xhr"):
+            return False
+        if "json" not in response.headers.get("content-type", ""):
+            return False
+
+        try:
+            post_data = request.post_data or ""
+        except Exception:
+            post_data = ""
+
+        haystack = unquote(request.url) + " " + unquote(post_data)
+        return re.search(rf"(?<![A-Za-z0-9]){re.escape(ticker)}(?![A-Za-z0-9])", haystack) is not None
+
+    async def capture_data_response(self, page, model, ticker, download_folder, subfolder_prefix):
+        """
+        Clicks "Enter" and saves the matching data response as JSON (payload + metadata)
+        to download_folder/[CME/]Model/Ticker/Ticker_date.json, without waiting for the chart.
+        """
+        async with page.expect_response(lambda r: self.is_data_response(r, ticker), timeout=60000) as response_info:
+            await page.get_by_role("button", name="Enter").click()
+            response = await self.race_with_toast(page, ticker, response_info.value)
+
+        if response.status in (401, 403):
+            raise SessionExpiredError(f"HTTP {response.status} from {response.url}")
+        if not response.ok:
+            raise ServerBusyError(f"Server indicated failure: HTTP {response.status} from {response.url}")
+
+        body = await response.text()
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise ServerBusyError(f"Server indicated failure: Non-JSON payload from {response.url}")
+
+        try:
+            post_data = response.request.post_data
+        except Exception:
+            post_data = None
+
+        save_path = self.save_data_record(download_folder, subfolder_prefix, model, ticker, data, response.url, response.status, response.request.method, post_data)
+        self.log(f"[{model}] {ticker} - Captured.")
+        self.success_count += 1
+        return save_path
+
+    def blob_store(self, download_folder):
+        if download_folder not in self.blob_stores:
+            self.blob_stores[download_folder] = BlobStore(download_folder)
+        return self.blob_stores[download_folder]
+
+    def record_tv_code(self, subfolder_prefix, line):
+        """Stores an extracted TV Code line in the indexed TV Code store."""
+        if not self.tv_codes_path:
+            return
+        try:
+            if not self.tv_store:
+                self.tv_store = TvCodeStore(self.tv_codes_path)
+            self.tv_store.add("cme" if subfolder_prefix == "CME" else "std", line)
+        except Exception as e:
+            # The line is still written to the TV_Codes text file at the end of the job
+            self.log(f"TV Code store failed for '{line}': {e}")
+
+    def catalog_output(self, download_folder, save_path):
+        """Adds a written file to the download folder's file catalog."""
+        try:
+            if download_folder not in self.catalogs:
+                self.catalogs[download_folder] = FileCatalog(download_folder)
+            self.catalogs[download_folder].add(save_path)
+        except Exception as e:
+            # The file is saved; the viewer's reconciliation scan picks it up later
+            self.log(f"Catalog update failed for {save_path}: {e}")
+
+    def store_output(self, download_folder, save_path):
+        """Deduplicates a saved report into the blob store (dedup mode only)."""
+        if not self.dedup:
+            return
+        try:
+            self.dedup_saved_bytes += self.blob_store(download_folder).add(save_path)
+        except Exception as e:
+            # The report itself is saved: deduplication is best effort
+            self.log(f"Dedup failed for {save_path}: {e}")
+
+    def storage_report(self, download_folder):
+        """Logs the bytes saved by the blob store (dedup mode only; compaction is `python blobstore.py compact`)."""
+        if not self.dedup:
+            return
+        try:
+            report = self.blob_store(download_folder).report()
+            self.log(f"Storage: {format_bytes(self.dedup_saved_bytes)} deduplicated this job. "
+                     f"Archive: {report['files']} reports in {report['unique_blobs']} unique blobs, "
+                     f"{format_bytes(report['stored_bytes'])} stored for {format_bytes(report['logical_bytes'])} "
+                     f"({format_bytes(report['saved_bytes'])} saved, {report['compacted']} reports compacted).")
+        except Exception as e:
+            self.log(f"Storage report failed: {e}")
+
+    def save_data_record(self, download_folder, subfolder_prefix, model, ticker, data, url, status, method="GET", post_data=None):
+        """
+        Saves a model data payload plus metadata to download_folder/[CME/]Model/Ticker/Ticker_date.json.
+        The request (method, url, post_data) is kept so the HTTP engine can learn the endpoint from it.
+        """
+        record = {
+            "platform": "cme" if subfolder_prefix == "CME" else "std",
+            "model": model,
+            "ticker": ticker,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "method": method,
+            "url": url,
+            "post_data": post_data,
+            "status": status,
+            "data": data
+        }
+
+        model_dir = self.model_output_dir(download_folder, subfolder_prefix, model, ticker)
+        save_path = os.path.join(model_dir, f"{ticker}_{utils.get_timestamp_filename(prefix='', extension='.json')}")
+        with open(save_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        self.catalog_output(download_folder, save_path)
+        return save_path
+
+    async def process_single_ticker(self, page, model, ticker, download_folder, tv_codes_list, subfolder_prefix, reopen_page=None):
+        """
+        Scrapes one ticker on an initialized model page, with typed retries.
+        reopen_page: optional async callable returning a fresh model page after a page crash.
+        """
+        short_plat = "cme" if subfolder_prefix == "CME" else "std"
+        current = {"page": page}
+
+        async def attempt():
+            return await self.attempt_single_ticker(current["page"], model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+
+        async def recover():
+            current["page"] = await reopen_page()
+
+        return await self.run_with_retries(short_plat, model, ticker, attempt, on_page_crash=recover if reopen_page else None,
+                                           page_func=lambda: current["page"])
+
+    async def run_with_retries(self, platform, model, ticker, attempt_func, on_page_crash=None, page_func=None):
+        """
+        Runs attempt_func() until it succeeds, a stop is requested, or the retry budget of the
+        failure class (see failures.RETRY_POLICIES) runs out. Waits between attempts with
+        exponential backoff + jitter, and while the platform's circuit breaker is open.
+        attempt_func returns the output path (or True) on success and False if it bailed out because of a stop.
+        page_func: optional callable returning the page the attempts run on (for failure traces).
+        Returns True on success.
+        """
+        breaker = self.breakers[platform]
+        class_attempts = {}
+        started_at = time.time()
+
+        for total in range(1, MAX_TOTAL_ATTEMPTS + 1):
+            await breaker.wait(lambda: self.stop_requested)
+            if self.stop_requested:
+                self.record_failure(platform, model, ticker, "Stopped")
+                return False
+
+            attempt_started = time.time()
+            if self.tracer and page_func:
+                self.tracer.mark(page_func(), "attempt", model=model, ticker=ticker, attempt=total)
+            try:
+                async with self.concurrency_slot():
+                    result = await attempt_func()
+                self.metrics.record(platform, model, "attempt", time.time() - attempt_started)
+                self.emit("attempt", platform=platform, model=model, ticker=ticker, attempt=total, phase="attempt",
+                          duration=round(time.time() - attempt_started, 3), outcome="success" if result else "stopped")
+                if result:
+                    # Attempts return the saved file path (or True when there is no file, e.g. TV Code)
+                    output_path = result if isinstance(result, str) else None
+                    self.record_success(platform, model, ticker, total, output_path, started_at)
+                    breaker.record_success()
+                    if self.controller:
+                        await self.controller.on_success()
+                    return True
+                self.record_failure(platform, model, ticker, "Stopped")
+                return False
 
             except Exception as e:
-                self.log(f"[{model}] {ticker} - Attempt {attempt+1}/{max_retries} failed: {e}")
-                if attempt == max_retries - 1:
+                error = classify_exception(e)
+                failure_class = error.failure_class
+                class_attempts[failure_class] = class_attempts.get(failure_class, 0) + 1
+                policy = RETRY_POLICIES.get(failure_class, RETRY_POLICIES["error"])
+
+                self.log(f"[{model}] {ticker} - Attempt {total}/{MAX_TOTAL_ATTEMPTS} failed ({failure_class}): {error}")
+                gave_up = class_attempts[failure_class] >= policy.max_attempts or total == MAX_TOTAL_ATTEMPTS
+                self.metrics.record(platform, model, "attempt", time.time() - attempt_started)
+                self.emit("attempt", platform=platform, model=model, ticker=ticker, attempt=total, phase="attempt",
+                          duration=round(time.time() - attempt_started, 3), outcome="failed" if gave_up else "retry",
+                          failure_class=failure_class, error=str(error)[:200])
+                if self.tracer and page_func and self.tracer.should_capture(gave_up):
+                    await self.capture_trace(page_func(), platform, model, ticker, total, failure_class, error, gave_up)
+
+                if self.controller and isinstance(error, (ServerBusyError, ScrapeTimeoutError)):
+                    await self.controller.on_congestion(f"{failure_class} on {platform.upper()}")
+
+                if isinstance(error, ServerBusyError):
+                    breaker.record_server_busy()
+                elif isinstance(error, SessionExpiredError):
+                    self.handle_session_expired()
+
+                if gave_up:
                     self.log(f"[{model}] {ticker} - Skipped after retries.")
-                    self.record_failure(short_plat, model, ticker)
-                await asyncio.sleep(2)
+                    self.record_failure(platform, model, ticker, failure_class=failure_class, attempts=total)
+                    return False
+
+                await asyncio.sleep(policy.delay(class_attempts[failure_class]))
+
+                if isinstance(error, PageCrashedError) and on_page_crash:
+                    try:
+                        await on_page_crash()
+                    except Exception as reopen_error:
+                        self.log(f"[{model}] {ticker} - Could not reopen page: {reopen_error}")
+                        self.record_failure(platform, model, ticker, failure_class="page_crashed", attempts=total)
+                        raise PageCrashedError(str(reopen_error))
+
+        return False
+
+    async def capture_trace(self, page, platform, model, ticker, attempt, failure_class, error, gave_up):
+        """Writes the page's failure trace (see traces.FailureTracer); never interrupts the job."""
+        meta = {"platform": platform, "model": model, "ticker": ticker, "attempt": attempt,
+                "failure_class": failure_class, "error": str(error), "gave_up": gave_up}
+        try:
+            path = await self.tracer.capture(page, f"{platform}_{model}_{ticker}_a{attempt}", meta)
+        except Exception as e:
+            self.log(f"[{model}] {ticker} - Could not write trace: {e}")
+            return
+        if path:
+            self.log(f"[{model}] {ticker} - Trace saved to {path}")
+            self.emit("trace", platform=platform, model=model, ticker=ticker, attempt=attempt, path=path)
+
+    def emit(self, event, **fields):
+        """Sends a structured event to event_func (if any); never interrupts the job."""
+        if self.event_func:
+            try:
+                self.event_func(event, **fields)
+            except Exception:
+                pass
+
+    def handle_session_expired(self):
+        """Every further attempt would fail the same way: stop the job so the user can log in again."""
+        if not self.stop_requested:
+            self.log("Session expired. Stopping job, please use 'Log in via Browser' and retry the failed items.")
+            self.stop_requested = True
+
+    def is_login_page(self, page):
+        url = page.url.lower()
+        return any(marker in url for marker in ("login", "signin", "sign-in"))
+
+    async def attempt_single_ticker(self, page, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
+        """
+        One attempt at one ticker. Returns the saved file path (True for TV Code) on success,
+        False if a stop was requested.
+        Raises a failures.ScrapeError subclass (or a Playwright error) on failure.
+        Each step is timed as a phase of self.metrics.
+        """
+        platform = "cme" if subfolder_prefix == "CME" else "std"
+        phase = lambda name: self.metrics.phase(platform, model, name)
+
+        # 2. Input Ticker
+        # Placeholder "Ticker"
+        with phase("fill"):
+            await page.get_by_placeholder("Ticker").fill(ticker)
+        
+        # Network capture mode: persist the data response directly, no rendering / report download
+        if self.capture_mode == "network" and model != "TV Code":
+            with phase("capture"):
+                return await self.capture_data_response(page, model, ticker, download_folder, subfolder_prefix)
+        if self.capture_mode == "network":
+            # TV Code has no data file: the line is read from the page as usual, but its data
+            # request is kept too, so the HTTP engine can learn the TV Code endpoint
+            return await self.capture_tv_request(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+
+        return await self.load_and_save(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+
+    async def capture_tv_request(self, page, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
+        """
+        load_and_save() for TV Code in Network Capture mode, recording the ticker's data response
+        on the way. The record (see save_data_record) is saved once the line was extracted.
+        """
+        responses = []
+
+        def on_response(response):
+            if self.is_data_response(response, ticker):
+                responses.append(response)
+
+        page.on("response", on_response)
+        try:
+            result = await self.load_and_save(page, model, ticker, download_folder, tv_codes_list, subfolder_prefix)
+        finally:
+            page.remove_listener("response", on_response)
+
+        if result and responses:
+            response = responses[-1]
+            try:
+                data = json.loads(await response.text())
+                try:
+                    post_data = response.request.post_data
+                except Exception:
+                    post_data = None
+                self.save_data_record(download_folder, subfolder_prefix, model, ticker, data, response.url, response.status, response.request.method, post_data)
+            except Exception as e:
+                # The code itself is extracted; only the endpoint sample is missing
+                self.log(f"[{model}] {ticker} - Data request not recorded: {e}")
+        return result
+
+    async def load_and_save(self, page, model, ticker, download_folder, tv_codes_list, subfolder_prefix):
+        """
+        Enter, validation and output of one attempt (the ticker is already filled in):
+        the TV Code line, or the downloaded report. Returns like attempt_single_ticker.
+        """
+        platform = "cme" if subfolder_prefix == "CME" else "std"
+        phase = lambda name: self.metrics.phase(platform, model, name)
+
+        # 3. Enter
+        with phase("enter"):
+            # Only what renders after this counts: in ticker-major ordering the page still
+            # shows this ticker for the previous model, which must not pass as loaded
+            await self.arm_page_probe(page)
+            await page.get_by_role("button", name="Enter").click()
+            
+            # --- Early Failure Detection (User Request) ---
+            # "如果按下 Enter 後等兩秒沒有出現這個畫面，也要直接 retry"
+            # Either the loading text or freshly rendered data (fast load) must show up within 2s.
+            # We return as soon as one of them appears instead of always sleeping 2s.
+            # The loading text may also already be on screen (shown before the observer saw it appear).
+            status = await self.wait_for_page_state(page, ticker, lambda s: s["sawLoading"] or s["loading"] or s["fresh"], timeout=2)
+        if status is None:
+            return False
+
+        if not status["sawLoading"] and not status["loading"] and not status["fresh"]:
+            if self.is_login_page(page):
+                raise SessionExpiredError(f"Redirected to login page ({page.url}).")
+            raise ClickIgnoredError("Action failed: No loading screen or data update detected after 2s (Click might have been ignored).")
+        
+        # 4. Wait for processing & Validate Data Load
+        # Validate that the page has actually loaded the data for the requested TICKER
+        # This prevents downloading stale data from the previous search.
+        # Server error toasts raise from inside wait_for_page_state.
+        # A load that ends without new content (loading text gone, page idle) kept the old content.
+        with phase("validate"):
+            status = await self.wait_for_page_state(
+                page, ticker,
+                lambda s: (s["fresh"] and s["tickerRendered"]) or (not s["fresh"] and not s["loading"] and s["idleMs"] >= STALE_IDLE_MS),
+                timeout=60
+            )
+        if status is None:
+            return False
+
+        if not (status["fresh"] and status["tickerRendered"]):
+             # This usually means the Spinner didn't stop, or the page never updated from the previous ticker
+             raise StaleDataError(f"Validation failed: Ticker '{ticker}' not found in loaded content (Stale data?).")
+        
+        # If model is TV Code, we scrape text
+        if model == "TV Code":
+            # Wait (up to 60s) for a "Put Wall" line. If "Put Wall" is rendered but not for
+            # the current ticker, it is likely stale data from the previous search.
+            with phase("extract"):
+                status = await self.wait_for_page_state(page, ticker, lambda s: s["tvLine"] or s["putWall"], timeout=60)
+            if status is None:
+                return False
+
+            if status["tvLine"]:
+                tv_codes_list.append(status["tvLine"].strip('" '))
+                # The store keeps the line as rendered (its parser unquotes the ticker)
+                self.record_tv_code(subfolder_prefix, status["tvLine"])
+                self.log(f"[{model}] {ticker} - Code extracted.")
+                self.success_count += 1
+            elif status["putWall"]:
+                raise StaleDataError(f"Stale data detected: Found 'Put Wall' but not for {ticker}.")
+            else:
+                raise StaleDataError(f"Validation failed: No data found for ticker {ticker} (Stale data from previous search?)")
+        else:
+            # Small buffer for rendering: wait for the download button and for the DOM to settle
+            # (replaces the fixed 1s sleep)
+            with phase("render"):
+                status = await self.wait_for_page_state(page, ticker, lambda s: s["downloadReady"], timeout=60)
+                if status is None:
+                    return False
+                if not status["downloadReady"]:
+                    raise ScrapeTimeoutError(f"Download button for {ticker} not ready within 60s.")
+                await self.wait_for_dom_idle(page, ticker)
+
+            download_btn = page.get_by_role("button", name="下載") # Chinese "Download"
+
+            # Standard Download
+            # We need to monitor for Error Toast WHILE waiting for download
+            with phase("download"):
+                async with page.expect_download(timeout=60000) as download_info:
+                    await download_btn.click()
+                    download = await self.race_with_toast(page, ticker, download_info.value)
+            
+            with phase("save"):
+                model_dir = self.model_output_dir(download_folder, subfolder_prefix, model, ticker)
+                save_path = os.path.join(model_dir, f"{ticker}_{utils.get_timestamp_filename(prefix='', extension='.html')}")
+                await download.save_as(save_path)
+                self.store_output(download_folder, save_path)
+                self.catalog_output(download_folder, save_path)
+            self.log(f"[{model}] {ticker} - Downloaded.")
+            self.success_count += 1
+            return save_path
+
+        return True
 
     def save_tv_codes(self, codes, download_folder, subfolder=""):
         if not codes:
@@ -700,4 +1847,14 @@ class LietaScraper:
         path = os.path.join(tv_dir, filename)
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
+        self.catalog_output(download_folder, path)
+        if self.tv_codes_path:
+            # Its lines were stored as they were extracted (here or in a shard process):
+            # the viewer must not import the file again
+            try:
+                if not self.tv_store:
+                    self.tv_store = TvCodeStore(self.tv_codes_path)
+                self.tv_store.mark_imported(path)
+            except Exception as e:
+                self.log(f"TV Code store failed for {path}: {e}")
         self.log(f"Saved aggregated TV codes to {path}")
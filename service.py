@@ -0,0 +1,115 @@
+import asyncio
+import threading
+
+
+class ScraperService:
+    """
+    Long-lived scraper host: one event loop in a background thread and one scraper
+    (Playwright driver, browser, session context and initialized model pages) kept warm
+    across jobs, so scheduled runs and retries skip the multi-second cold start.
+
+    scraper_factory(options) must return a new scraper for the given options dict
+    (see LietaApp.get_scraper_options).
+    """
+    # Options that require a new browser / engine when they change.
+    # capture_mode, adaptive, dedup and trace_failures are applied to the running scraper between jobs.
+    LAUNCH_OPTIONS = ("engine", "browser_type", "lean")
+
+    def __init__(self, scraper_factory, logger_func=print):
+        self.scraper_factory = scraper_factory
+        self.log = logger_func
+        self.scraper = None
+        self.launch_key = None
+        # Jobs and warm-ups run one at a time on the warm scraper
+        self.lock = asyncio.Lock()
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="ScraperService", daemon=True)
+        self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine on the service loop and blocks the calling thread until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    @property
+    def stop_requested(self):
+        return bool(self.scraper and self.scraper.stop_requested)
+
+    @stop_requested.setter
+    def stop_requested(self, value):
+        # Lets the GUI's STOP button treat the service like a scraper instance
+        if self.scraper:
+            self.scraper.stop_requested = value
+
+    async def _prepare(self, options):
+        launch_key = tuple(options.get(k) for k in self.LAUNCH_OPTIONS)
+        if self.scraper and launch_key != self.launch_key:
+            self.log("Launch options changed, restarting warm browser...")
+            await self._discard()
+
+        if not self.scraper:
+            self.scraper = self.scraper_factory(options)
+            self.scraper.persistent = True
+            self.launch_key = launch_key
+        else:
+            self.scraper.capture_mode = options.get("capture_mode", self.scraper.capture_mode)
+            self.scraper.adaptive = options.get("adaptive", self.scraper.adaptive)
+            self.scraper.dedup = options.get("dedup", self.scraper.dedup)
+            self.scraper.trace_failures = options.get("trace_failures", self.scraper.trace_failures)
+        return self.scraper
+
+    async def _discard(self):
+        if self.scraper:
+            try:
+                await self.scraper.close()
+            except Exception as e:
+                self.log(f"Error closing warm browser: {e}")
+        self.scraper = None
+        self.launch_key = None
+
+    async def _with_scraper(self, options, action):
+        """Prepares the warm scraper and runs action(scraper), one operation at a time."""
+        async with self.lock:
+            scraper = await self._prepare(options)
+            try:
+                return await action(scraper)
+            except Exception:
+                # The browser may be in an unknown state: start cold next time
+                await self._discard()
+                raise
+
+    def run_job(self, options, tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model=1, resume=False, ordering="model"):
+        return self.run(self._with_scraper(options, lambda scraper: scraper.run_scraping_job(
+            tickers, models, cme_tickers, cme_models, download_folder, parallel, pages_per_model, resume, ordering)))
+
+    def run_retry_job(self, options, failed_tasks, download_folder, parallel, pages_per_model=1, ordering="model"):
+        return self.run(self._with_scraper(options, lambda scraper: scraper.retry_scraping_job(
+            failed_tasks, download_folder, parallel, pages_per_model, ordering)))
+
+    def warm_up(self, options, queues=None, pages_per_model=1):
+        """
+        Starts the browser and session context ahead of a job.
+        queues: optional list of (target_url, model) to pre-initialize pages for (browser engine only).
+        """
+        async def _warm(scraper):
+            await scraper.new_job_context()
+            if queues:
+                await scraper.prewarm_model_pages(queues, pages_per_model)
+
+        return self.run(self._with_scraper(options, _warm))
+
+    async def _shutdown(self):
+        async with self.lock:
+            await self._discard()
+
+    def shutdown(self, timeout=10):
+        """Closes the warm browser and stops the loop."""
+        try:
+            self.run(self._shutdown(), timeout=timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
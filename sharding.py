@@ -0,0 +1,271 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from scraper import LietaScraper
+from manifest import RunManifest, MANIFEST_PATH
+
+
+def scraper_from_options(options, logger_func=print, event_func=None, manifest_path=MANIFEST_PATH):
+    """
+    Builds a scraper from an options dict (see LietaApp.get_scraper_options):
+    engine ("Browser" / "HTTP"), browser_type, capture_mode, lean, adaptive,
+    and optionally headless, concurrency (HTTP engine), trace_failures / trace_max_mb (browser engine)
+    and schedule / priorities_path / deadline (see scheduler.py).
+    event_func: optional structured event sink (see LietaScraper.emit).
+    manifest_path: run manifest the scraper records items in (None: no manifest).
+    """
+    if str(options.get("engine", "Browser")).lower() == "http":
+        # aiohttp is only needed (and imported) for this engine
+        from http_engine import LietaHttpScraper
+        scraper = LietaHttpScraper(logger_func=logger_func, concurrency=options.get("concurrency", 8),
+                                   adaptive=options.get("adaptive", False), manifest_path=manifest_path)
+        scraper.event_func = event_func
+        apply_schedule_options(scraper, options)
+        return scraper
+    scraper = LietaScraper(
+        logger_func=logger_func,
+        browser_type=options.get("browser_type", "chrome"),
+        capture_mode=options.get("capture_mode", "download"),
+        lean=options.get("lean", False),
+        adaptive=options.get("adaptive", False),
+        dedup=options.get("dedup", False),
+        manifest_path=manifest_path
+    )
+    if options.get("headless") is not None:
+        scraper.headless = options["headless"]
+    scraper.trace_failures = options.get("trace_failures")
+    if options.get("trace_max_mb"):
+        scraper.trace_max_bytes = int(options["trace_max_mb"] * 1024 * 1024)
+    scraper.event_func = event_func
+    apply_schedule_options(scraper, options)
+    return scraper
+
+
+def apply_schedule_options(scraper, options):
+    scraper.schedule = options.get("schedule", True)
+    scraper.deadline = options.get("deadline")
+    if options.get("priorities_path"):
+        scraper.priorities_path = options["priorities_path"]
+
+
+def job_tasks(tickers, models, cme_tickers, cme_models):
+    """Expands a full job into its list of {'platform', 'model', 'ticker'} items."""
+    tasks = [{"platform": "std", "model": m, "ticker": t} for m in models for t in tickers] if tickers else []
+    if cme_tickers:
+        tasks += [{"platform": "cme", "model": m, "ticker": t} for m in cme_models for t in cme_tickers]
+    return tasks
+
+
+def partition_tasks(tasks, shards, ordering="model", cost=None):
+    """
+    Splits tasks into at most `shards` lists, balancing their expected durations (LPT: largest
+    first, onto the shard with the least expected work). cost(task) -> seconds, e.g. from
+    JobScheduler.cost; without it every task counts the same.
+    Model-major pages are bound to one model, so whole (platform, model) queues are kept together
+    when there are at least as many queues as shards. Otherwise the items themselves are spread.
+    Ticker-major: all models of a (platform, ticker) stay in one shard.
+    """
+    cost = cost or (lambda task: 1.0)
+    groups = {}
+    for task in tasks:
+        key = (task["platform"], task["ticker"]) if ordering == "ticker" else (task["platform"], task["model"])
+        groups.setdefault(key, []).append(task)
+    if len(groups) < shards and ordering != "ticker":
+        # Fewer queues than shards: every item is its own unit
+        units = [[task] for task in tasks]
+    else:
+        units = list(groups.values())
+
+    parts = [[] for _ in range(shards)]
+    loads = [0.0] * shards
+    for unit in sorted(units, key=lambda u: sum(cost(t) for t in u), reverse=True):
+        i = min(range(shards), key=lambda i: (loads[i], len(parts[i])))
+        parts[i].extend(unit)
+        loads[i] += sum(cost(t) for t in unit)
+    return [p for p in parts if p]
+
+
+def _run_shard_process(index, options, tasks, download_folder, parallel_mode, pages_per_model, ordering, log_queue, stop_event, events=False, manifest_path=MANIFEST_PATH):
+    """
+    Worker process entry point: one browser (and one Playwright connection) per shard.
+    Items are recorded in the job's manifest (manifest_path), not the default one.
+    """
+    def log(message):
+        log_queue.put(f"[Shard {index}] {message}")
+
+    def event(name, **fields):
+        # Structured events travel on the log queue as (name, fields) tuples
+        log_queue.put((name, dict(fields, shard=index)))
+
+    scraper = scraper_from_options(options, log, event if events else None, manifest_path)
+
+    async def watch_stop():
+        # The STOP button sets the shared event; mirror it onto this process's scraper
+        while True:
+            if stop_event.is_set():
+                scraper.stop_requested = True
+            await asyncio.sleep(0.5)
+
+    async def main():
+        watcher = asyncio.create_task(watch_stop())
+        try:
+            await scraper.start_browser(headless=scraper.headless)
+            return await scraper.run_shard(tasks, download_folder, parallel_mode, pages_per_model, ordering)
+        finally:
+            watcher.cancel()
+            await scraper.close()
+
+    return asyncio.run(main())
+
+
+class ShardedJob:
+    """
+    Runs a job across a pool of worker processes. Each worker drives its own browser with the
+    shared state.json and writes into the same output tree; TV codes, success counts and
+    structured failures are merged back here into one TV code file and one job summary.
+    """
+    def __init__(self, options, shards, logger_func=print, manifest_path=MANIFEST_PATH, event_func=None):
+        self.options = options
+        self.shards = max(1, shards)
+        self.log = logger_func
+        self.event_func = event_func
+        self.manifest_path = manifest_path
+        self.stop_event = None
+        self.stop_requested_early = False
+        self.last_summary = None
+
+    @property
+    def stop_requested(self):
+        return self.stop_requested_early or bool(self.stop_event and self.stop_event.is_set())
+
+    @stop_requested.setter
+    def stop_requested(self, value):
+        # Lets the GUI's STOP button treat the job like a scraper instance
+        self.stop_requested_early = value
+        if value and self.stop_event:
+            self.stop_event.set()
+
+    def run_job(self, tickers, models, cme_tickers, cme_models, download_folder, parallel_mode, pages_per_model=1, resume=False, ordering="model"):
+        """Full job. Returns structured failed tasks (None if the job could not start)."""
+        tasks = job_tasks(tickers, models, cme_tickers, cme_models)
+        skipped = 0
+        if resume and self.manifest_path:
+            manifest = RunManifest(self.manifest_path)
+            done = manifest.completed_items(RunManifest.today())
+            manifest.close()
+            remaining = [t for t in tasks if (t["platform"], t["model"], t["ticker"]) not in done]
+            skipped = len(tasks) - len(remaining)
+            tasks = remaining
+            self.log(f"Resume: {skipped} items already completed today will be skipped.")
+        return self.run_tasks(tasks, download_folder, parallel_mode, pages_per_model, ordering, skipped, full_job=True)
+
+    def run_retry_job(self, failed_tasks, download_folder, parallel_mode, pages_per_model=1, ordering="model"):
+        return self.run_tasks(failed_tasks, download_folder, parallel_mode, pages_per_model, ordering)
+
+    def run_tasks(self, tasks, download_folder, parallel_mode, pages_per_model=1, ordering="model", skipped=0, full_job=False):
+        if not os.path.exists("state.json"):
+            self.log("No session file found. Please use 'Log in via Browser' first.")
+            return None
+
+        # Merged results, summarized with the regular job summary
+        summary = scraper_from_options(self.options, self.log, self.event_func, self.manifest_path)
+        summary.skipped_count = skipped
+        summary.job_started = time.time()
+        summary.metrics.reset()
+        # Crashed shards' items are recorded against today's run (retry jobs included)
+        summary.run_date = RunManifest.today()
+        if self.manifest_path:
+            # Item durations for the scheduler; full jobs also record their timing in it
+            summary.manifest = RunManifest(self.manifest_path)
+        if full_job:
+            # Full jobs take part in the ordering comparison
+            summary.ordering = ordering
+        # Partition costs and the deadline line of the summary (each shard plans and orders its own items)
+        summary.scheduler = summary.build_scheduler()
+
+        # Balanced by expected duration (the same estimates the shards schedule with)
+        parts = partition_tasks(tasks, self.shards, ordering,
+                                cost=lambda t: summary.scheduler.cost(t["platform"], t["model"], t["ticker"]))
+        if not parts:
+            summary.log_summary()
+            if summary.manifest:
+                summary.manifest.close()
+            return []
+        self.log(f"Starting sharded job: {len(tasks)} items across {len(parts)} processes.")
+
+        # spawn: Playwright and the GUI's threads do not survive fork()
+        ctx = multiprocessing.get_context("spawn")
+        manager = ctx.Manager()
+        log_queue = manager.Queue()
+        self.stop_event = manager.Event()
+        if self.stop_requested_early:
+            self.stop_event.set()
+
+        forwarding = True
+
+        def forward_logs():
+            while forwarding or not log_queue.empty():
+                try:
+                    item = log_queue.get(timeout=0.2)
+                    if isinstance(item, tuple):
+                        if self.event_func:
+                            self.event_func(item[0], **item[1])
+                    else:
+                        self.log(item)
+                except queue.Empty:
+                    pass
+                except (EOFError, OSError):
+                    return
+
+        forwarder = threading.Thread(target=forward_logs, daemon=True)
+        forwarder.start()
+
+        tv_codes_std = []
+        tv_codes_cme = []
+        try:
+            with ProcessPoolExecutor(max_workers=len(parts), mp_context=ctx) as pool:
+                futures = [
+                    pool.submit(_run_shard_process, i + 1, self.options, part, download_folder, parallel_mode, pages_per_model, ordering, log_queue, self.stop_event, bool(self.event_func), self.manifest_path)
+                    for i, part in enumerate(parts)
+                ]
+                for i, (future, part) in enumerate(zip(futures, parts)):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.log(f"[Shard {i + 1}] Crashed: {e}")
+                        result = None
+                    if result is None:
+                        for t in part:
+                            summary.record_failure(t["platform"], t["model"], t["ticker"], "Shard failed", failure_class="error")
+                        continue
+                    summary.success_count += result["success_count"]
+                    summary.dedup_saved_bytes += result["dedup_saved_bytes"]
+                    summary.late_items += result["late_items"]
+                    if result["predicted_misses"] is not None:
+                        summary.predicted_misses = (summary.predicted_misses or 0) + result["predicted_misses"]
+                    summary.metrics.merge(result["metrics"]["samples"], result["metrics"]["completed"])
+                    # Shards starting in the same second share a trace run dir
+                    for run_dir, captures in result["traces"].items():
+                        summary.shard_traces[run_dir] = summary.shard_traces.get(run_dir, 0) + captures
+                    summary.failed_items += result["failed_items"]
+                    summary.failed_tasks_structured += result["failed_tasks"]
+                    tv_codes_std += result["tv_codes_std"]
+                    tv_codes_cme += result["tv_codes_cme"]
+        finally:
+            summary.stop_requested = self.stop_requested
+            forwarding = False
+            forwarder.join(timeout=5)
+            manager.shutdown()
+            self.stop_event = None
+
+        # One TV code file per platform and one summary, as in a single-process job
+        failed_tasks = summary.finish_scraping_job(tv_codes_std, tv_codes_cme, download_folder)
+        self.last_summary = summary.job_summary()
+        if summary.manifest:
+            summary.manifest.close()
+        return failed_tasks
@@ -0,0 +1,133 @@
+import os
+import time
+
+import pytest
+
+import blobstore
+from blobstore import BlobStore
+from catalog import FileCatalog
+
+
+def save(folder, rel_path, data):
+    path = os.path.join(folder, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def age(store, days):
+    store.conn.execute("UPDATE files SET saved_at = ?", (time.time() - days * 86400,))
+    store.conn.commit()
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = BlobStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def edit(path, data, mode="wb"):
+    with open(path, mode) as f:
+        f.write(data)
+    # A later save by hand: a new mtime even on coarse file system clocks
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_unique_reports_are_stored_once(store, tmp_path):
+    first = save(str(tmp_path), "Gamma/SPX/SPX_1.html", b"<html>report</html>")
+    assert store.add(first) == 0
+    assert os.path.samefile(first, store.blob_path(store.file_digest(first)))
+    store.add(save(str(tmp_path), "Gamma/QQQ/QQQ_1.html", b"<html>qqq</html>"))
+
+    report = store.report()
+    assert report["stored_bytes"] == report["logical_bytes"] and report["saved_bytes"] == 0
+    # Registering the same file again changes nothing
+    assert store.add(first) == 0
+
+
+def test_edited_first_report_is_not_spread(store, tmp_path):
+    first = save(str(tmp_path), "Gamma/SPX/SPX_1.html", b"<html>report</html>")
+    store.add(first)
+    # Editing the report in place also edits the blob...
+    edit(first, b"<html>edited</html>")
+    # ...so the next identical report becomes the new blob instead of a link to the edit
+    second = save(str(tmp_path), "Gamma/SPX/SPX_2.html", b"<html>report</html>")
+    assert store.add(second) == 0
+    assert store.read("Gamma/SPX/SPX_2.html") == b"<html>report</html>"
+    third = save(str(tmp_path), "Gamma/SPX/SPX_3.html", b"<html>report</html>")
+    assert store.add(third) == len(b"<html>report</html>")
+    assert os.path.samefile(second, third)
+
+
+def test_edited_link_does_not_spread(store, tmp_path):
+    data = b"<html>same</html>"
+    store.add(save(str(tmp_path), "Gamma/SPX/SPX_1.html", data))
+    linked = save(str(tmp_path), "Gamma/SPX/SPX_2.html", data)
+    assert store.add(linked) == len(data)
+    # An in-place edit of a linked duplicate (same size) also changes the blob...
+    edit(linked, b"<HTML>", "r+b")
+    # ...so the next duplicate gets a fresh blob instead of the edited content
+    third = save(str(tmp_path), "Gamma/SPX/SPX_3.html", data)
+    store.add(third)
+    with open(third, "rb") as f:
+        assert f.read() == data
+
+
+def test_adding_never_compacts(store, tmp_path):
+    path = save(str(tmp_path), "Gamma/SPX/SPX_1.html", b"old report")
+    store.add(path)
+    age(store, 30)
+    store.add(save(str(tmp_path), "Gamma/QQQ/QQQ_1.html", b"new report"))
+    assert os.path.exists(path)
+    assert store.report()["compacted"] == 0
+
+
+def test_compact_and_restore_round_trip(store, tmp_path):
+    data = b"<html>old</html>" * 100
+    first = save(str(tmp_path), "Gamma/SPX/SPX_1.html", data)
+    second = save(str(tmp_path), "Gamma/SPX/SPX_2.html", data)
+    edited = save(str(tmp_path), "Gamma/QQQ/QQQ_1.html", b"qqq")
+    for path in (first, second, edited):
+        store.add(path)
+    with open(edited, "wb") as f:
+        f.write(b"edited by hand")
+    age(store, 30)
+
+    removed = store.compact(7)
+    assert sorted(removed) == ["Gamma/SPX/SPX_1.html", "Gamma/SPX/SPX_2.html"]
+    assert not os.path.exists(first) and not os.path.exists(second)
+    # The edited report is kept as it is
+    with open(edited, "rb") as f:
+        assert f.read() == b"edited by hand"
+    assert store.read("Gamma/SPX/SPX_1.html") == data
+
+    assert store.compacted_paths("Gamma/SPX/") == ["Gamma/SPX/SPX_1.html", "Gamma/SPX/SPX_2.html"]
+    store.restore("Gamma/SPX/SPX_1.html")
+    with open(first, "rb") as f:
+        assert f.read() == data
+    assert store.compacted_paths() == ["Gamma/SPX/SPX_2.html"]
+
+
+def test_cli_restore_updates_catalog(tmp_path, capsys):
+    folder = str(tmp_path)
+    store = BlobStore(folder)
+    path = save(folder, "Gamma/SPX/SPX_20260101_120000.html", b"report")
+    store.add(path)
+    age(store, 30)
+    store.close()
+
+    catalog = FileCatalog(folder)
+    catalog.reconcile()
+    assert len(catalog.files("20260101")) == 1
+
+    blobstore.main([folder, "compact", "--older-than-days", "7"])
+    assert not os.path.exists(path)
+    assert catalog.files("20260101") == []
+    blobstore.main([folder, "restore", "--all"])
+    assert os.path.exists(path)
+    assert len(catalog.files("20260101")) == 1
+    assert "Restored 1 reports." in capsys.readouterr().out
+    catalog.close()
@@ -0,0 +1,41 @@
+import asyncio
+
+from concurrency import AIMDController
+
+
+def test_pages_open_as_the_limit_rises():
+    async def run():
+        controller = AIMDController(logger_func=lambda message: None, initial=2, max_limit=4)
+        opened = []
+        release = asyncio.Event()
+
+        async def page_worker(i):
+            async with controller.page_slot():
+                opened.append(i)
+                await release.wait()
+
+        workers = [asyncio.create_task(page_worker(i)) for i in range(4)]
+        await asyncio.sleep(0.01)
+        assert len(opened) == 2
+
+        # About one round of successes raises the limit by one page
+        while controller.current_limit() < 3:
+            await controller.on_success()
+        await asyncio.sleep(0.01)
+        assert len(opened) == 3
+
+        release.set()
+        await asyncio.gather(*workers)
+        assert len(opened) == 4 and controller.pages == 0
+
+    asyncio.run(run())
+
+
+def test_congestion_halves_the_limit_once_per_cooldown():
+    async def run():
+        controller = AIMDController(logger_func=lambda message: None, initial=8, max_limit=8)
+        await controller.on_congestion("server_busy")
+        await controller.on_congestion("server_busy")
+        return controller.current_limit()
+
+    assert asyncio.run(run()) == 4
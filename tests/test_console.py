@@ -0,0 +1,98 @@
+"""
+Console coalescing of the GUI (LietaApp.queue_console / flush_console), run without a window.
+Skipped unless customtkinter is installed.
+"""
+from collections import deque
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("customtkinter")
+
+import gui
+from gui import LietaApp
+
+
+class FakeText:
+    def __init__(self):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text += text
+
+    def delete(self, start, end):
+        # "1.0" to "<n>.0": the first n - 1 lines
+        self.text = "".join(self.text.splitlines(True)[int(end.split(".")[0]) - 1:])
+
+    def see(self, index):
+        pass
+
+
+class FakeLabel:
+    def __init__(self):
+        self.text = "Logs:"
+
+    def cget(self, option):
+        return self.text
+
+    def configure(self, text):
+        self.text = text
+
+
+class Console:
+    """The console state and methods of LietaApp, without Tk."""
+    queue_console = LietaApp.queue_console
+    flush_console = LietaApp.flush_console
+    update_console_label = LietaApp.update_console_label
+
+    def __init__(self):
+        self.console_pending = deque()
+        self.console_lines = 0
+        self.console_trimmed = 0
+        self.console_dropped = 0
+        self.console_collapsed = 0
+        self.console_last_message = None
+        self.console_repeats = 0
+        self.console = FakeText()
+        self.console_label = FakeLabel()
+        self.scheduled = None
+
+    def after(self, ms, func):
+        self.scheduled = func
+
+    def lines(self):
+        return self.console.text.splitlines()
+
+
+NOW = datetime(2026, 10, 17, 9, 30)
+
+
+def test_repeats_are_collapsed():
+    console = Console()
+    for message in ["Waiting", "Waiting", "Waiting", "Done"]:
+        console.queue_console(message, NOW)
+    console.flush_console()
+    assert console.lines() == ["[09:30:00] Waiting", "    (previous message repeated 2 more times)", "[09:30:00] Done"]
+    assert console.console_label.text == "Logs: (2 repeats collapsed)"
+    # The next draw is scheduled
+    assert console.scheduled == console.flush_console
+
+
+def test_console_keeps_the_last_lines(monkeypatch):
+    monkeypatch.setattr(gui, "CONSOLE_MAX_LINES", 5)
+    console = Console()
+    for i in range(8):
+        console.queue_console(f"line {i}", NOW)
+    console.flush_console()
+    assert console.lines() == [f"[09:30:00] line {i}" for i in range(3, 8)]
+    assert console.console_trimmed == 3
+    assert console.console_label.text == "Logs: (3 older lines only in the log file)"
+
+
+def test_pending_lines_are_bounded(monkeypatch):
+    monkeypatch.setattr(gui, "CONSOLE_MAX_PENDING", 3)
+    console = Console()
+    for i in range(5):
+        console.queue_console(f"line {i}", NOW)
+    assert [message for message, _ in console.console_pending] == ["line 2", "line 3", "line 4"]
+    assert console.console_dropped == 2
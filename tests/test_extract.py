@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+import extract
+from extract import parse_report
+
+pytest.importorskip("numpy")
+
+
+def save(folder, rel_path, text):
+    path = os.path.join(folder, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return rel_path
+
+
+def series_of(columns):
+    series = {}
+    for name, label, y in zip(columns["series"], columns["x_label"], columns["y"]):
+        series.setdefault(name, []).append((label, y))
+    return series
+
+
+PLOTLY = '<script>Plotly.newPlot("chart", [{"name": "Gamma", "x": [1, 2, 3], "y": [4.5, -1, 0]}], {});</script>'
+
+
+def test_plotly_report(tmp_path):
+    rel_path = save(str(tmp_path), "Gamma/SPX/SPX_20261017_093000.html", PLOTLY)
+    key, columns, error = parse_report(str(tmp_path), rel_path)
+    assert key == ("2026-10-17", "std", "Gamma")
+    assert error is None
+    assert columns["y"] == [4.5, -1.0, 0.0]
+    assert set(columns["ticker"]) == {"SPX"}
+
+
+def test_table_with_th_header(tmp_path):
+    html = "<table><tr><th>Strike</th><th>Call</th><th>Put</th></tr><tr><td>100</td><td>1,200</td><td>3</td></tr></table>"
+    rel_path = save(str(tmp_path), "CME/Table/ES/ES_20261017_093000.html", html)
+    key, columns, _ = parse_report(str(tmp_path), rel_path)
+    assert key == ("2026-10-17", "cme", "Table")
+    assert series_of(columns) == {"table0:Call": [("100", 1200.0)], "table0:Put": [("100", 3.0)]}
+
+
+def test_table_without_header_keeps_its_first_row(tmp_path):
+    html = "<table><tr><td>Put Wall</td><td>5800</td></tr><tr><td>Call Wall</td><td>6000</td></tr></table>"
+    rel_path = save(str(tmp_path), "Levels/SPX/SPX_20261017_093000.html", html)
+    _, columns, _ = parse_report(str(tmp_path), rel_path)
+    assert series_of(columns) == {"table0:col1": [("Put Wall", 5800.0), ("Call Wall", 6000.0)]}
+
+
+def test_text_header_row_without_th(tmp_path):
+    html = "<table><tr><td>Strike</td><td>Gamma</td></tr><tr><td>100</td><td>2.5</td></tr></table>"
+    rel_path = save(str(tmp_path), "Table/SPX/SPX_20261017_093000.html", html)
+    _, columns, _ = parse_report(str(tmp_path), rel_path)
+    assert series_of(columns) == {"table0:Gamma": [("100", 2.5)]}
+
+
+def test_broken_report_is_recorded_not_raised(tmp_path):
+    rel_path = save(str(tmp_path), "Gamma/SPX/SPX_20261017_093000.json", "[1, 2")
+    key, columns, error = parse_report(str(tmp_path), rel_path)
+    assert key == ("2026-10-17", "std", "Gamma")
+    assert columns["y"] == []
+    assert error.startswith("JSONDecodeError")
+
+    # A record whose top level is not an object
+    rel_path = save(str(tmp_path), "Gamma/SPX/SPX_20261017_100000.json", "[1, 2, 3]")
+    assert parse_report(str(tmp_path), rel_path)[2].startswith("AttributeError")
+
+
+def test_extract_folder_writes_partitions_and_errors(tmp_path):
+    reports, dataset = str(tmp_path / "reports"), str(tmp_path / "dataset")
+    save(reports, "Gamma/SPX/SPX_20261016_093000.html", PLOTLY)
+    save(reports, "Gamma/QQQ/QQQ_20261017_093000.html", PLOTLY)
+    save(reports, "Gamma/IWM/IWM_20261017_093000.json", "not json")
+    save(reports, "Delta/SPX/SPX_20261017_093000.json", json.dumps({"data": {"values": [1, 2]}}))
+
+    counts = extract.extract_folder(reports, dataset, processes=1, logger_func=lambda message: None)
+    assert counts == {("2026-10-16", "std", "Gamma"): 3, ("2026-10-17", "std", "Gamma"): 3,
+                      ("2026-10-17", "std", "Delta"): 2}
+    with open(os.path.join(dataset, extract.ERRORS_NAME), encoding="utf-8") as f:
+        errors = json.load(f)
+    assert [e["path"] for e in errors] == ["Gamma/IWM/IWM_20261017_093000.json"]
+
+    data = extract.load_dataset(dataset, "Gamma", start="2026-10-17")
+    assert list(data["ticker"]) == ["QQQ"] * 3
+
+
+def test_clean_rerun_removes_stale_errors(tmp_path):
+    reports, dataset = str(tmp_path / "reports"), str(tmp_path / "dataset")
+    save(reports, "Gamma/IWM/IWM_20261017_093000.json", "not json")
+    extract.extract_folder(reports, dataset, processes=1, logger_func=lambda message: None)
+    assert os.path.exists(os.path.join(dataset, extract.ERRORS_NAME))
+
+    # The broken report was fixed
+    save(reports, "Gamma/IWM/IWM_20261017_093000.json", json.dumps({"data": {"values": [1, 2]}}))
+    extract.extract_folder(reports, dataset, processes=1, logger_func=lambda message: None)
+    assert not os.path.exists(os.path.join(dataset, extract.ERRORS_NAME))
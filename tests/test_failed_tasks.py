@@ -0,0 +1,36 @@
+from failed_tasks import job_task_keys, load_failed_tasks, merge_failed_tasks, save_failed_tasks
+
+
+def task(ticker, model="Gamma", platform="std", **fields):
+    return dict(platform=platform, model=model, ticker=ticker, **fields)
+
+
+def test_attempted_tasks_are_resolved_by_the_job():
+    existing = [task("SPX", attempts=2, failed_at="2026-10-16T09:00:00"), task("QQQ", attempts=1), task("ES", platform="cme")]
+    attempted = job_task_keys(["SPX", "QQQ"], ["Gamma"], [], [])
+    # SPX failed again, QQQ succeeded, ES was not part of the job
+    merged = merge_failed_tasks(existing, [task("SPX", attempts=3, failed_at="2026-10-17T09:00:00")], attempted)
+
+    by_ticker = {t["ticker"]: t for t in merged}
+    assert set(by_ticker) == {"SPX", "ES"}
+    assert by_ticker["SPX"]["attempts"] == 5
+    assert by_ticker["SPX"]["first_failed_at"] == "2026-10-16T09:00:00"
+    assert by_ticker["ES"] == existing[2]
+
+
+def test_new_failures_are_deduplicated():
+    merged = merge_failed_tasks([], [task("SPX", attempts=1), task("SPX", attempts=4), task("SPX", model="Delta")])
+    assert [(t["model"], t.get("attempts")) for t in merged] == [("Gamma", 1), ("Delta", None)]
+    assert all(t["first_failed_at"] == t["failed_at"] for t in merged)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "failed_tasks.json")
+    assert load_failed_tasks(path) == []
+    save_failed_tasks([task("SPX"), {"ticker": "broken"}], path)
+    assert load_failed_tasks(path) == [task("SPX")]
+    save_failed_tasks([], path)
+    assert not (tmp_path / "failed_tasks.json").exists()
+
+    (tmp_path / "failed_tasks.json").write_text("{truncated", encoding="utf-8")
+    assert load_failed_tasks(path) == []
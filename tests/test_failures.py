@@ -0,0 +1,82 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import failures
+from failures import (CircuitBreaker, PageCrashedError, RETRY_POLICIES, ScrapeError, ScrapeTimeoutError,
+                      ServerBusyError, classify_exception)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the breaker's clock: the event loop keeps the real one
+    monkeypatch.setattr(failures, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_classify_exception():
+    busy = ServerBusyError("toast")
+    assert classify_exception(busy) is busy
+    assert isinstance(classify_exception(asyncio.TimeoutError()), ScrapeTimeoutError)
+    assert isinstance(classify_exception(RuntimeError("Target page, context or browser has been closed")), PageCrashedError)
+    other = classify_exception(ValueError("boom"))
+    assert type(other) is ScrapeError and other.failure_class == "error"
+
+
+def test_retry_delay_is_capped_with_jitter():
+    policy = RETRY_POLICIES["server_busy"]
+    for attempt in (1, 3, 10):
+        ceiling = min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1))
+        assert ceiling / 2 <= policy.delay(attempt) <= ceiling
+    assert RETRY_POLICIES["session_expired"].max_attempts == 1
+
+
+def test_breaker_opens_on_a_spike_only(clock):
+    breaker = CircuitBreaker("std", logger_func=lambda message: None, threshold=3, window=30, cooldown=20)
+    breaker.record_server_busy()
+    clock.now += 31
+    # The first failure fell out of the window
+    breaker.record_server_busy()
+    breaker.record_server_busy()
+    assert not breaker.is_open()
+    breaker.record_server_busy()
+    assert breaker.is_open() and breaker.open_until == clock.now + 20
+
+
+def test_breaker_closes_after_the_pause_and_backs_off(clock):
+    breaker = CircuitBreaker("std", logger_func=lambda message: None, threshold=2, window=30, cooldown=20, max_cooldown=30)
+    for _ in range(2):
+        breaker.record_server_busy()
+    # Successes while open do not reset the backoff
+    breaker.record_success()
+    clock.now += 20
+    assert not breaker.is_open()
+    asyncio.run(breaker.wait())
+
+    # Another spike right after the pause: twice as long (capped)
+    for _ in range(2):
+        breaker.record_server_busy()
+    assert breaker.open_until == clock.now + 30
+    clock.now += 30
+    # A success after the pause resets it
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_server_busy()
+    assert breaker.open_until == clock.now + 20
+
+
+def test_wait_returns_when_stopped(clock):
+    breaker = CircuitBreaker("std", logger_func=lambda message: None, threshold=1)
+    breaker.record_server_busy()
+    assert breaker.is_open()
+    asyncio.run(breaker.wait(should_stop=lambda: True))
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+import http_engine
+from http_engine import LietaHttpScraper, endpoint_from_capture, template_request_text, template_url
+
+
+@pytest.fixture
+def scraper():
+    return LietaHttpScraper(logger_func=lambda message: None, manifest_path=None)
+
+
+def test_template_url_only_touches_parameter_positions():
+    url = template_url("/api/ESG/data?name=Gamma&ticker=ES&range=ES-1", "Gamma", "ES")
+    assert url == "/api/ESG/data?name={model}&ticker={ticker}&range=ES-1"
+
+
+def test_template_url_path_segments_and_encoding():
+    assert template_url("/api/tv%20code/%5ESPX", "TV Code", "^SPX") == "/api/{model_lower}/{ticker}"
+    assert template_url("/api/x?q=%7Bliteral%7D&m=TV+Code", "TV Code", "SPX") == "/api/x?q=%7Bliteral%7D&m={model}"
+    assert template_url("/api/{v}/SPX", "Gamma", "SPX") == "/api/{{v}}/{ticker}"
+
+
+def test_template_json_body_fields():
+    body = json.dumps({"model": "Gamma", "params": {"symbol": "SPX", "note": "SPX only"}, "tags": ["SPX"]})
+    template = template_request_text(body, "Gamma", "SPX")
+    assert template == '{{"model":"{model}","params":{{"symbol":"{ticker}","note":"SPX only"}},"tags":["{ticker}"]}}'
+
+
+def test_template_form_and_plain_bodies():
+    assert template_request_text("model=TV+Code&symbol=%2FES", "TV Code", "/ES") == "model={model}&symbol={ticker}"
+    # No known parameter positions: escaped, not substring-replaced
+    assert template_request_text("ES {x}", "Gamma", "ES") == "ES {{x}}"
+    assert template_request_text(None, "Gamma", "ES") is None
+
+
+def test_build_request_round_trip(scraper):
+    record = {"model": "Gamma", "ticker": "SPX", "method": "POST",
+              "url": "https://example.com/api/data?m=Gamma&t=SPX",
+              "post_data": json.dumps({"symbol": "SPX", "model": "Gamma"})}
+    endpoint = endpoint_from_capture(record)
+    method, url, body, headers = scraper.build_request(endpoint, "TV Code", 'A"B')
+    assert method == "POST"
+    assert url == "/api/data?m=TV%20Code&t=A%22B"
+    assert json.loads(body) == {"symbol": 'A"B', "model": "TV Code"}
+    assert headers["Content-Type"] == "application/json"
+
+
+def test_capture_without_ticker_position_is_not_learned():
+    record = {"model": "Gamma", "ticker": "SPX", "url": "https://example.com/api/latest", "post_data": None}
+    assert endpoint_from_capture(record) is None
+
+
+def test_learn_endpoints_reads_tv_code_records(tmp_path):
+    folder = tmp_path / "TV Code" / "SPX"
+    folder.mkdir(parents=True)
+    record = {"platform": "std", "model": "TV Code", "ticker": "SPX", "timestamp": "2026-10-18T09:00:00",
+              "method": "GET", "url": "https://example.com/api/tv?symbol=SPX", "post_data": None, "data": {}}
+    (folder / "SPX_20261018_090000.json").write_text(json.dumps(record), encoding="utf-8")
+    endpoints = http_engine.learn_endpoints(str(tmp_path), str(tmp_path / "endpoints.json"))
+    assert endpoints["std"]["TV Code"]["url"] == "/api/tv?symbol={ticker}"
+
+
+def test_missing_endpoints_are_learned_once_per_job(scraper, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_engine, "learn_endpoints", lambda folder, path: calls.append(folder) or {})
+    scraper.endpoints_path = str(tmp_path / "endpoints.json")
+    for model in ("Gamma", "Delta", "Theta"):
+        asyncio.run(scraper.process_model_queue(None, model, ["SPX"], str(tmp_path), [], None))
+    assert calls == [str(tmp_path)]
+    assert len(scraper.failed_items) == 3
+
+    scraper.reset_job_state()
+    asyncio.run(scraper.process_model_queue(None, "Gamma", ["SPX"], str(tmp_path), [], None))
+    assert len(calls) == 2
@@ -0,0 +1,48 @@
+import pytest
+
+from manifest import RunManifest
+from sharding import ShardedJob
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = RunManifest(str(tmp_path / "manifest.db"))
+    yield manifest
+    manifest.close()
+
+
+def test_completed_items_are_today_successes(manifest):
+    manifest.record("2026-10-16", "std", "Gamma", "SPX", "success", attempts=1)
+    manifest.record("2026-10-17", "std", "Gamma", "SPX", "failed", attempts=3, failure_class="timeout")
+    manifest.record("2026-10-17", "std", "Gamma", "QQQ", "success", attempts=1)
+    manifest.record("2026-10-17", "cme", "Gamma", "ES", "success", attempts=2)
+    assert manifest.completed_items("2026-10-17") == {("std", "Gamma", "QQQ"), ("cme", "Gamma", "ES")}
+    assert manifest.summary("2026-10-17") == {"failed": 1, "success": 2}
+
+
+def test_failure_never_overwrites_a_success(manifest):
+    manifest.record("2026-10-17", "std", "Gamma", "SPX", "failed", attempts=2, failure_class="timeout")
+    manifest.record("2026-10-17", "std", "Gamma", "SPX", "success", attempts=1, output_path="Gamma/SPX/SPX_1.html")
+    # e.g. a stopped retry of an item that already succeeded
+    manifest.record("2026-10-17", "std", "Gamma", "SPX", "stopped", attempts=1)
+    row = manifest.conn.execute("SELECT status, attempts, output_path FROM items").fetchone()
+    assert row == ("success", 3, "Gamma/SPX/SPX_1.html")
+
+
+def test_resume_skips_items_completed_today(tmp_path, monkeypatch):
+    path = str(tmp_path / "manifest.db")
+    manifest = RunManifest(path)
+    manifest.record(RunManifest.today(), "std", "Gamma", "SPX", "success", attempts=1)
+    manifest.record(RunManifest.today(), "std", "Gamma", "QQQ", "failed", attempts=1)
+    manifest.close()
+
+    started = {}
+
+    def run_tasks(self, tasks, download_folder, parallel_mode, pages_per_model=1, ordering="model", skipped=0, full_job=False):
+        started.update(tasks=tasks, skipped=skipped)
+
+    monkeypatch.setattr(ShardedJob, "run_tasks", run_tasks)
+    job = ShardedJob({}, shards=2, logger_func=lambda message: None, manifest_path=path)
+    job.run_job(["SPX", "QQQ"], ["Gamma", "Delta"], [], [], str(tmp_path / "out"), False, resume=True)
+    assert started["skipped"] == 1
+    assert [(t["model"], t["ticker"]) for t in started["tasks"]] == [("Gamma", "QQQ"), ("Delta", "SPX"), ("Delta", "QQQ")]
@@ -0,0 +1,53 @@
+import json
+import os
+
+from metrics import PROM_FILENAME, PhaseMetrics, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.95) == 95
+    assert percentile(values, 0.99) == 99
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile([], 0.5) is None
+
+
+def metrics_with_samples():
+    metrics = PhaseMetrics()
+    for seconds in (1.0, 2.0, 3.0, 4.0):
+        metrics.record("std", "Gamma", "download", seconds)
+    metrics.record_completion("std", "Gamma")
+    # Samples and completions of another shard
+    metrics.merge({("std", "Gamma", "download"): [10.0]}, {("std", "Gamma"): 1, ("cme", "Delta"): 2})
+    return metrics
+
+
+def test_summary_merges_shard_samples():
+    summary = metrics_with_samples().summary()
+    gamma, = [g for g in summary["groups"] if g["model"] == "Gamma"]
+    stats = gamma["phases"]["download"]
+    assert stats["count"] == 5 and stats["mean"] == 4.0 and stats["max"] == 10.0
+    assert stats["p50"] == 3.0 and stats["p99"] == 10.0
+    assert gamma["completed"] == 2
+    # Completions without samples still get a group
+    assert [(g["platform"], g["model"]) for g in summary["groups"]] == [("cme", "Delta"), ("std", "Gamma")]
+
+
+def test_prometheus_text_and_export(tmp_path):
+    metrics = metrics_with_samples()
+    text = metrics.prometheus_text({"host": "a"})
+    assert 'lieta_phase_seconds{platform="std",model="Gamma",phase="download",host="a",quantile="0.95"} 10.000000' in text
+    assert 'lieta_phase_seconds_sum{platform="std",model="Gamma",phase="download",host="a"} 20.000000' in text
+    assert 'lieta_phase_seconds_count{platform="std",model="Gamma",phase="download",host="a"} 5' in text
+    assert 'lieta_job_duration_seconds{host="a"} ' in text
+    # Every sample line is "<name>{labels} <number>"
+    for line in text.splitlines():
+        if not line.startswith("#"):
+            float(line.rsplit(" ", 1)[1])
+
+    json_path = metrics.export(str(tmp_path))
+    with open(json_path, encoding="utf-8") as f:
+        assert len(json.load(f)["groups"]) == 2
+    assert os.path.exists(os.path.join(tmp_path, PROM_FILENAME))
+    assert not os.path.exists(os.path.join(tmp_path, PROM_FILENAME + ".tmp"))
@@ -0,0 +1,101 @@
+"""
+Browser tests against the local mock platform (mock_platform.py).
+Skipped unless Playwright and its Chromium are installed.
+"""
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("playwright.async_api")
+
+from failures import ScrapeTimeoutError, StaleDataError
+from mock_platform import MockPlatform
+from scraper import LietaScraper
+
+
+@pytest.fixture
+def mock():
+    platform = MockPlatform(latency=(0.05, 0.1), download_latency=(0.0, 0.05), failure_rate=0, stale_rate=0, ignore_rate=0, rows=20, seed=1)
+    platform.start()
+    yield platform
+    platform.stop()
+
+
+def make_scraper(mock):
+    scraper = LietaScraper(logger_func=lambda message: None, browser_type="chromium", manifest_path=None, tv_codes_path=None)
+    scraper.metrics_dir = None
+    scraper.set_platform_base_url(mock.base_url)
+    scraper.reset_job_state()
+    return scraper
+
+
+async def with_page(mock, model, body):
+    scraper = make_scraper(mock)
+    try:
+        await scraper.start_browser(headless=True)
+    except Exception as e:
+        pytest.skip(f"Chromium unavailable: {e}")
+    try:
+        context = await scraper.browser.new_context(accept_downloads=True)
+        page = await scraper.open_model_page(context, model, scraper.std_platform_url, "[test]")
+        return await body(scraper, page)
+    finally:
+        await scraper.close()
+
+
+def test_download_saves_the_requested_model(mock, tmp_path):
+    async def body(scraper, page):
+        return await scraper.attempt_single_ticker(page, "Gamma", "SPX", str(tmp_path), [], "")
+
+    path = asyncio.run(with_page(mock, "Gamma", body))
+    with open(path, encoding="utf-8") as f:
+        assert "SPX Gamma" in f.read()
+
+
+def test_ticker_major_stale_model_switch_is_not_saved(mock, tmp_path):
+    """Same ticker, next model, but the platform keeps the previous model's content on screen."""
+    async def body(scraper, page):
+        first = await scraper.attempt_single_ticker(page, "Gamma", "SPX", str(tmp_path), [], "")
+        await scraper.select_model(page, "Delta", "[test]")
+        mock.stale_rate = 1.0
+        with pytest.raises(StaleDataError):
+            await scraper.attempt_single_ticker(page, "Delta", "SPX", str(tmp_path), [], "")
+        return first
+
+    first = asyncio.run(with_page(mock, "Gamma", body))
+    saved = [os.path.join(d, f) for d, _, files in os.walk(tmp_path) for f in files if f.endswith(".html")]
+    assert saved == [first]
+
+
+def test_ticker_major_tv_code_after_chart_needs_a_fresh_line(mock, tmp_path):
+    async def body(scraper, page):
+        await scraper.attempt_single_ticker(page, "Gamma", "SPX", str(tmp_path), [], "")
+        await scraper.select_model(page, "TV Code", "[test]")
+        codes = []
+        assert await scraper.attempt_single_ticker(page, "TV Code", "SPX", str(tmp_path), codes, "") is True
+        return codes
+
+    codes = asyncio.run(with_page(mock, "Gamma", body))
+    assert len(codes) == 1 and "Put Wall" in codes[0]
+
+
+def test_download_button_never_ready_is_a_timeout(mock, tmp_path):
+    async def body(scraper, page):
+        read_page_status = scraper.read_page_status
+        wait_for_page_state = scraper.wait_for_page_state
+
+        async def no_download(*args):
+            status = await read_page_status(*args)
+            return dict(status, downloadReady=False)
+
+        async def short_wait(page, ticker, condition, timeout, **kwargs):
+            return await wait_for_page_state(page, ticker, condition, min(timeout, 3), **kwargs)
+
+        scraper.read_page_status = no_download
+        scraper.wait_for_page_state = short_wait
+        with pytest.raises(ScrapeTimeoutError):
+            await scraper.attempt_single_ticker(page, "Gamma", "SPX", str(tmp_path), [], "")
+
+    asyncio.run(with_page(mock, "Gamma", body))
+    assert not [f for _, _, files in os.walk(tmp_path) for f in files if f.endswith(".html")]
@@ -0,0 +1,88 @@
+import asyncio
+import base64
+import json
+
+import pytest
+
+from replay import TrafficArchive, annotate_archive
+
+
+def entry(method, url, status, text, mime="application/json", body=None, encoding=None):
+    request = {"method": method, "url": url, "headers": []}
+    if body is not None:
+        request["postData"] = {"mimeType": "application/x-www-form-urlencoded", "text": body}
+    content = {"mimeType": mime, "text": text}
+    if encoding:
+        content["encoding"] = encoding
+    headers = [{"name": "Content-Type", "value": mime}, {"name": "Content-Length", "value": str(len(text))}]
+    return {"request": request, "response": {"status": status, "headers": headers, "content": content}, "time": 120}
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / "session.har")
+    entries = [
+        entry("GET", "https://lieta.test/api/gamma?ticker=SPX", 200, json.dumps({"ticker": "SPX", "values": [1, 2]})),
+        # A busy answer, then the data
+        entry("POST", "https://lieta.test/api/delta", 500, "busy", "text/plain", body="ticker=SPX&model=Delta"),
+        entry("POST", "https://lieta.test/api/delta", 200, "SPX delta", "text/plain", body="ticker=SPX&model=Delta"),
+        entry("GET", "https://lieta.test/logo.png", 200, base64.b64encode(b"\x89PNG").decode(), "image/png", encoding="base64"),
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"log": {"entries": entries}}, f)
+    assert annotate_archive(path, ["SPX"]) == 4
+    return path
+
+
+def test_exact_requests_cycle_through_the_recording(archive_path):
+    archive = TrafficArchive(archive_path)
+    statuses = []
+    for _ in range(3):
+        found, recorded, requested = archive.lookup("POST", "https://lieta.test/api/delta", "ticker=SPX&model=Delta")
+        assert recorded is None
+        statuses.append(archive.response(found)[0])
+    assert statuses == [500, 200, 500]
+
+    status, headers, body = archive.response(archive.lookup("GET", "https://lieta.test/logo.png", None)[0])
+    assert body == b"\x89PNG"
+    assert "Content-Length" not in headers
+
+
+def test_other_tickers_get_a_templated_response(archive_path):
+    archive = TrafficArchive(archive_path)
+    found = archive.lookup("GET", "https://lieta.test/api/gamma?ticker=NVDA", None)
+    assert found[1:] == ("SPX", "NVDA")
+    status, headers, body = archive.response(*found)
+    assert status == 200 and json.loads(body) == {"ticker": "NVDA", "values": [1, 2]}
+
+    found = archive.lookup("POST", "https://lieta.test/api/delta", "ticker=QQQ&model=Delta")
+    assert archive.response(*found)[2] == b"busy"
+    # Another model is not recorded
+    assert archive.lookup("POST", "https://lieta.test/api/delta", "ticker=QQQ&model=Theta") is None
+
+
+class FakeRoute:
+    def __init__(self, method, url, post_data=None):
+        self.request = type("Request", (), {"method": method, "url": url, "post_data": post_data})()
+        self.result = None
+
+    async def fulfill(self, status, headers, body):
+        self.result = (status, body)
+
+    async def abort(self):
+        self.result = "aborted"
+
+
+def test_route_answers_from_the_archive_only(archive_path):
+    archive = TrafficArchive(archive_path)
+    served = FakeRoute("GET", "https://lieta.test/api/gamma?ticker=QQQ")
+    missed = FakeRoute("GET", "https://analytics.test/collect")
+
+    async def run():
+        await archive.route(served)
+        await archive.route(missed)
+
+    asyncio.run(run())
+    assert served.result[0] == 200 and b"QQQ" in served.result[1]
+    assert missed.result == "aborted"
+    assert archive.stats == {"served": 1, "templated": 1, "missed": 1}
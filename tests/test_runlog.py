@@ -0,0 +1,33 @@
+import json
+from datetime import datetime
+
+from runlog import BATCH_SIZE, RunLogWriter
+
+
+def test_close_writes_everything_queued(tmp_path):
+    path = tmp_path / "logs" / "run.log"
+    writer = RunLogWriter(str(path))
+    count = BATCH_SIZE * 2 + 10
+    for i in range(count):
+        writer.write(f"line {i}", timestamp=datetime(2026, 10, 17, 9, 30))
+    writer.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == count
+    assert lines[0] == "2026-10-17 09:30:00 - line 0" and lines[-1].endswith(f"line {count - 1}")
+    # Nothing is queued after close
+    writer.write("late")
+    writer.close()
+    assert len(path.read_text(encoding="utf-8").splitlines()) == count
+
+
+def test_events_go_to_the_jsonl_file(tmp_path):
+    events_path = tmp_path / "run.jsonl"
+    writer = RunLogWriter(None, events_path=str(events_path))
+    writer.write("no text log")
+    writer.event("attempt", ticker="SPX", model="Gamma", attempt=1, duration=1.5, outcome="success")
+    writer.close()
+
+    records = [json.loads(line) for line in events_path.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 1
+    assert records[0]["event"] == "attempt" and records[0]["ticker"] == "SPX" and records[0]["duration"] == 1.5
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+
+from scheduler import JobScheduler, load_priorities, parse_deadline
+
+
+@pytest.fixture
+def scheduler():
+    durations = {
+        ("std", "Gamma", "NVDA"): [30, 50, 40],
+        ("std", "Gamma", "SPX"): [10],
+        ("std", "Delta", "TSLA"): [5],
+    }
+    return JobScheduler(durations, {"SPX": 0, "ES": 0})
+
+
+def test_costs_fall_back_to_model_then_default(scheduler):
+    assert scheduler.cost("std", "Gamma", "NVDA") == 40
+    assert scheduler.cost("std", "Gamma", "AAPL") == 35  # model median
+    assert scheduler.cost("std", "Theta", "AAPL") == 20.0  # no history
+    assert scheduler.tier("/es") == 0 and scheduler.tier("NVDA") == 1
+
+
+def test_queue_order_tier_then_longest_first(scheduler):
+    queues = scheduler.order_queues([("std", "Delta", ["TSLA", "AAPL"]), ("std", "Gamma", ["NVDA", "AAPL", "SPX"])])
+    assert queues == [("std", "Gamma", ["SPX", "NVDA", "AAPL"]), ("std", "Delta", ["TSLA", "AAPL"])]
+
+
+def test_sequential_queues_are_split_by_tier(scheduler):
+    """The critical ticker of the last model must not wait for every other model's tickers."""
+    queues = scheduler.order_queues([("std", "Gamma", ["NVDA", "AAPL"]), ("std", "Delta", ["TSLA", "SPX"])], by_tier=True)
+    assert queues == [("std", "Delta", ["SPX"]), ("std", "Gamma", ["NVDA", "AAPL"]), ("std", "Delta", ["TSLA"])]
+
+
+def test_ticker_queues_split_by_tier_across_platforms(scheduler):
+    grouped = {"std": {"NVDA": ["Gamma"], "SPX": ["Gamma"]}, "cme": {"ES": ["Gamma"], "NQ": ["Gamma"]}}
+    queues = scheduler.order_ticker_queues(grouped, by_tier=True)
+    # Tier 0 of both platforms first, larger expected total first within a tier
+    assert [(p, list(t)) for p, t in queues] == [("cme", ["ES"]), ("std", ["SPX"]), ("std", ["NVDA"]), ("cme", ["NQ"])]
+    assert [p for p, _ in scheduler.order_ticker_queues(grouped)] == ["std", "cme"]
+
+
+def test_no_reorder_keeps_input(scheduler):
+    scheduler.reorder = False
+    queues = [("std", "Delta", ["TSLA", "SPX"])]
+    assert scheduler.order_queues(queues, by_tier=True) == queues
+
+
+def test_plan_pages_and_modes(scheduler):
+    units = [[("std", "Gamma", "NVDA")], [("std", "Gamma", "SPX")], [("std", "Gamma", "AAPL")]]
+    # One page: 40 + 10 + 35
+    assert scheduler.plan([units], parallel=False, pages=1)["makespan"] == 85
+    # Two pages pull from the queue: NVDA (40) on one, SPX then AAPL (10 + 35) on the other
+    plan = scheduler.plan([units], parallel=False, pages=2)
+    assert plan["makespan"] == 45 and plan["finish"][("std", "Gamma", "AAPL")] == 45
+    assert plan["items"] == 3 and plan["known"] == 2
+
+    other = [[("std", "Delta", "TSLA")]]
+    assert scheduler.plan([units, other], parallel=False, pages=1)["makespan"] == 90
+    assert scheduler.plan([units, other], parallel=True, pages=1)["makespan"] == 85
+
+
+def test_misses_and_report(scheduler):
+    now = datetime(2026, 10, 19, 9, 0).timestamp()
+    scheduler.deadline = now + 60
+    units = [[("std", "Gamma", "NVDA")], [("std", "Gamma", "AAPL")], [("std", "Gamma", "SPX")]]
+    plan = scheduler.plan([units], parallel=False, pages=1)
+    misses = scheduler.misses(plan, now)
+    # Critical tier first
+    assert [m[2] for m in misses] == ["SPX", "AAPL"]
+    lines = scheduler.report_lines(plan, now)
+    assert "2 items would miss it (1 critical)" in lines[1]
+
+
+def test_priorities_and_deadline_parsing(tmp_path):
+    path = tmp_path / "priorities.json"
+    path.write_text('{"^spx": 0, "NVDA": "2"}', encoding="utf-8")
+    assert load_priorities(str(path)) == {"SPX": 0, "NVDA": 2}
+    assert load_priorities(str(tmp_path / "missing.json"))["QQQ"] == 0
+
+    now = datetime(2026, 10, 19, 10, 0)
+    assert parse_deadline("09:15", now) == datetime(2026, 10, 19, 9, 15).timestamp()
+    assert parse_deadline("2026-10-20T09:15", now) == datetime(2026, 10, 20, 9, 15).timestamp()
+    assert parse_deadline("", now) is None
+    with pytest.raises(ValueError):
+        parse_deadline("soon", now)
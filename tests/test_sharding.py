@@ -0,0 +1,155 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import sharding
+from manifest import RunManifest
+from sharding import ShardedJob, job_tasks, partition_tasks
+
+
+class InlinePool:
+    """Stands in for the spawn process pool: runs each shard in this process."""
+    def __init__(self, max_workers=None, mp_context=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def shard_result(index, options, tasks, *args):
+    return {
+        "metrics": {"samples": {}, "completed": {}},
+        "success_count": len(tasks) - 1,
+        "failed_items": [f"[{tasks[0]['model']}] {tasks[0]['ticker']}"],
+        "failed_tasks": [dict(tasks[0], reason="Timeout", failure_class="timeout")],
+        "tv_codes_std": [],
+        "tv_codes_cme": [],
+        "dedup_saved_bytes": 0,
+        "late_items": 0,
+        "predicted_misses": None,
+        "traces": {f"traces/run_{index}": 1} if index != 2 else {},
+        "peak_concurrency": None
+    }
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "state.json").write_text('{"cookies": [], "origins": []}', encoding="utf-8")
+    monkeypatch.setattr(sharding, "ProcessPoolExecutor", InlinePool)
+    monkeypatch.setattr(sharding, "_run_shard_process", shard_result)
+    return ShardedJob({"trace_failures": "final"}, shards=3, logger_func=lambda message: None, manifest_path=None)
+
+
+def test_sharded_summary_merges_traces_and_failures(job, tmp_path):
+    tasks = job_tasks(["SPX", "QQQ"], ["Gamma", "Delta", "Theta"], [], [])
+    failed = job.run_tasks(tasks, str(tmp_path / "out"), False)
+
+    summary = job.last_summary
+    assert summary["success"] == 3 and summary["failed"] == 3
+    assert len(failed) == 3
+    assert summary["traces"] == 2
+    assert summary["trace_dirs"] == ["traces/run_1", "traces/run_3"]
+
+
+def test_retry_job_with_a_crashed_shard_keeps_the_other_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "state.json").write_text('{"cookies": [], "origins": []}', encoding="utf-8")
+    monkeypatch.setattr(sharding, "ProcessPoolExecutor", InlinePool)
+
+    def crash_second(index, *args):
+        if index == 2:
+            raise RuntimeError("browser died")
+        return shard_result(index, *args)
+
+    monkeypatch.setattr(sharding, "_run_shard_process", crash_second)
+    manifest_path = str(tmp_path / "manifest.db")
+    job = ShardedJob({}, shards=2, logger_func=lambda message: None, manifest_path=manifest_path)
+    tasks = job_tasks(["SPX", "QQQ"], ["Gamma", "Delta"], [], [])
+    failed = job.run_retry_job(tasks, str(tmp_path / "out"), False)
+
+    summary = job.last_summary
+    # Shard 1: one success, one failure; shard 2 crashed: both of its items failed
+    assert summary["success"] == 1
+    assert len(failed) == 3
+    assert sum(t["failure_class"] == "error" for t in failed) == 2
+    manifest = RunManifest(manifest_path)
+    assert manifest.summary(RunManifest.today()) == {"failed": 2}
+    manifest.close()
+
+
+def test_shards_record_in_the_job_manifest(tmp_path, monkeypatch):
+    built = []
+
+    class FakeScraper:
+        headless = True
+
+        async def start_browser(self, headless=True):
+            pass
+
+        async def run_shard(self, tasks, *args):
+            return {"success_count": len(tasks)}
+
+        async def close(self):
+            pass
+
+    def fake_from_options(options, logger_func=print, event_func=None, manifest_path=None):
+        built.append(manifest_path)
+        return FakeScraper()
+
+    monkeypatch.setattr(sharding, "scraper_from_options", fake_from_options)
+    manifest_path = str(tmp_path / "manifest.db")
+    tasks = job_tasks(["SPX"], ["Gamma"], [], [])
+    result = sharding._run_shard_process(1, {}, tasks, str(tmp_path), False, 1, "model", queue.Queue(), threading.Event(),
+                                         False, manifest_path)
+    assert result == {"success_count": 1}
+    assert built == [manifest_path]
+
+
+def test_partition_keeps_queues_together():
+    tasks = job_tasks(["SPX", "QQQ"], ["Gamma", "Delta", "Theta"], ["ES"], ["Gamma"])
+    parts = partition_tasks(tasks, 2)
+    queues = [{(t["platform"], t["model"]) for t in part} for part in parts]
+    assert not queues[0] & queues[1]
+    assert sorted(len(p) for p in parts) == [3, 4]
+
+
+def test_partition_balances_expected_durations():
+    # Gamma items take 10x longer: Gamma alone on one shard, everything else on the other
+    tasks = job_tasks(["SPX", "QQQ"], ["Gamma", "Delta", "Theta", "Term"], [], [])
+    cost = lambda t: 100.0 if t["model"] == "Gamma" else 10.0
+    parts = partition_tasks(tasks, 2, cost=cost)
+    loads = sorted(sum(cost(t) for t in part) for part in parts)
+    assert loads == [60.0, 200.0]
+    # By count alone both shards would get 4 items: 220 vs 40
+    assert sorted(len(p) for p in partition_tasks(tasks, 2)) == [4, 4]
+
+
+def test_partition_ticker_major_keeps_tickers_together():
+    tasks = job_tasks(["SPX", "QQQ", "IWM"], ["Gamma", "Delta"], [], [])
+    for part in partition_tasks(tasks, 2, "ticker"):
+        for ticker in {t["ticker"] for t in part}:
+            assert sum(t["ticker"] == ticker for t in part) == 2
+    # Fewer tickers than shards: still one shard per ticker
+    assert len(partition_tasks(job_tasks(["SPX"], ["Gamma", "Delta"], [], []), 3, "ticker")) == 1
+
+
+def test_partition_spreads_a_few_queues_across_shards():
+    tasks = job_tasks(["A", "B", "C", "D"], ["Gamma"], [], [])
+    cost = {"A": 30.0, "B": 10.0, "C": 10.0, "D": 10.0}
+    parts = partition_tasks(tasks, 2, cost=lambda t: cost[t["ticker"]])
+    assert sorted([t["ticker"] for t in p] for p in parts) == [["A"], ["B", "C", "D"]]
+    assert partition_tasks([], 3) == []
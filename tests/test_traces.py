@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+from types import SimpleNamespace
+
+from traces import FailureTracer
+
+
+class FakePage:
+    url = "https://lieta.test/gamma"
+
+    def __init__(self, dom="<html>" + "x" * 1000 + "</html>"):
+        self.handlers = {}
+        self.dom = dom
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def emit(self, event, value):
+        self.handlers[event](value)
+
+    def is_closed(self):
+        return self.closed
+
+    async def screenshot(self, timeout=None):
+        return b"\x89PNG" + b"\x00" * 500
+
+    async def content(self):
+        return self.dom
+
+
+def request(url, resource_type="xhr"):
+    return SimpleNamespace(url=url, method="GET", resource_type=resource_type)
+
+
+def test_buffer_keeps_the_last_data_events(tmp_path):
+    tracer = FailureTracer(trace_dir=str(tmp_path), buffer_events=3, logger_func=lambda message: None)
+    page = FakePage()
+    tracer.attach(page)
+    tracer.attach(page)
+    for i in range(5):
+        page.emit("request", request(f"https://lieta.test/api/{i}"))
+    # Assets are not buffered
+    page.emit("request", request("https://lieta.test/logo.png", "image"))
+    tracer.mark(page, "attempt", ticker="SPX", attempt=2)
+
+    path = asyncio.run(tracer.capture(page, "Gamma SPX/2", {"ticker": "SPX"}))
+    assert os.path.basename(path) == "Gamma_SPX_2.json"
+    with open(path, encoding="utf-8") as f:
+        record = json.load(f)
+    assert record["ticker"] == "SPX" and record["url"] == page.url
+    assert [e.get("url") for e in record["events"]] == ["https://lieta.test/api/3", "https://lieta.test/api/4", None]
+    assert os.path.exists(path[:-5] + ".png") and os.path.exists(path[:-5] + ".html")
+    # The next capture only shows what happened since
+    assert not tracer.buffers[page]
+
+
+def test_captures_stop_at_the_byte_cap(tmp_path):
+    logs = []
+    tracer = FailureTracer(trace_dir=str(tmp_path), max_bytes=4000, logger_func=logs.append)
+    page = FakePage()
+    tracer.attach(page)
+
+    first = asyncio.run(tracer.capture(page, "first", {}))
+    assert first and 0 < tracer.bytes_written <= 4000
+    written = sorted(os.listdir(tracer.run_dir))
+    # A second capture would exceed the budget: nothing is written from now on
+    page.dom = "<html>" + "y" * 3000 + "</html>"
+    assert asyncio.run(tracer.capture(page, "second", {})) is None
+    assert tracer.cap_reached and len(logs) == 1
+    page.dom = "<html></html>"
+    assert asyncio.run(tracer.capture(page, "third", {})) is None
+    assert sorted(os.listdir(tracer.run_dir)) == written
+    assert tracer.captures == 1
+
+    # A new run gets a new budget
+    tracer.start_run()
+    assert not tracer.cap_reached and tracer.bytes_written == 0
+
+
+def test_capture_modes_and_closed_pages(tmp_path):
+    assert FailureTracer(mode="attempt", trace_dir=str(tmp_path)).should_capture(gave_up=False)
+    tracer = FailureTracer(mode="final", trace_dir=str(tmp_path), logger_func=lambda message: None)
+    assert not tracer.should_capture(gave_up=False) and tracer.should_capture(gave_up=True)
+
+    page = FakePage()
+    page.closed = True
+    assert asyncio.run(tracer.capture(page, "closed", {})).endswith("closed.json")
+    # Only the event record: no screenshot or DOM of a closed page
+    assert sorted(os.listdir(tracer.run_dir)) == ["closed.json"]
+    assert asyncio.run(tracer.capture(None, "no page", {})) is None
@@ -0,0 +1,57 @@
+import pytest
+
+from tvcodes import SCHEMA_VERSION, TvCodeStore, parse_tv_line
+
+
+@pytest.mark.parametrize("line", [
+    # As rendered by the platform and mock_platform.py
+    '"SPX" Put Wall 5700.5, Call Wall 5900, Gamma Flip 5812.25',
+    # As written to the TV_Codes files (outer quotes stripped)
+    'SPX" Put Wall 5700.5, Call Wall 5900, Gamma Flip 5812.25',
+    'SPX: Put Wall 5700.5, Call Wall 5900, Gamma Flip 5812.25',
+])
+def test_parse_tv_line_unquotes_the_ticker(line):
+    ticker, levels = parse_tv_line(line)
+    assert ticker == "SPX"
+    assert levels == {"Put Wall": 5700.5, "Call Wall": 5900.0, "Gamma Flip": 5812.25}
+
+
+def test_parse_tv_line_keeps_thousands_separators():
+    ticker, levels = parse_tv_line('"NDX" Put Wall 19,500, Call Wall: 20,250.5; Max Pain=19,800')
+    assert ticker == "NDX"
+    assert levels == {"Put Wall": 19500.0, "Call Wall": 20250.5, "Max Pain": 19800.0}
+
+
+def test_store_lookups_match_rendered_lines(tmp_path):
+    store = TvCodeStore(str(tmp_path / "tv.db"))
+    try:
+        raw = '"SPX" Put Wall 5700.5, Call Wall 5900, Gamma Flip 5812.25'
+        store.add("std", raw, captured_at="2026-10-17T09:00:00")
+        store.add("std", 'SPX" Put Wall 5750, Call Wall 5950', captured_at="2026-10-17T10:00:00")
+
+        latest = store.latest("std")
+        assert [r["ticker"] for r in latest] == ["SPX"]
+        assert latest[0]["put_wall"] == 5750.0
+        history = store.history("SPX", "std")
+        assert len(history) == 2
+        assert raw in [r["raw"] for r in history]
+    finally:
+        store.close()
+
+
+def test_store_repairs_quoted_tickers(tmp_path):
+    path = str(tmp_path / "tv.db")
+    store = TvCodeStore(path)
+    store.conn.execute("INSERT INTO tv_codes (ticker, platform, captured_at, levels, raw) VALUES ('SPX\"', 'std', '2026-10-16T09:00:00', '{}', 'x')")
+    # As left by a version that stored quoted tickers
+    store.conn.execute("PRAGMA user_version = 0")
+    store.conn.commit()
+    store.close()
+
+    store = TvCodeStore(path)
+    try:
+        assert [r["ticker"] for r in store.history("SPX", "std")] == ["SPX"]
+        # Repaired once: later opens skip the scan
+        assert store.conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        store.close()
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+import re
+import time
+import weakref
+from collections import deque
+from datetime import datetime
+
+from blobstore import format_bytes
+
+# Failure traces go to TRACE_DIR/<run timestamp>/
+TRACE_DIR = "traces"
+# "attempt": capture every failed attempt, "final": only the attempt after which an item is given up
+TRACE_MODES = ("attempt", "final")
+# Events kept per page (ring buffer) and disk budget per run
+TRACE_BUFFER_EVENTS = 200
+TRACE_MAX_BYTES = 100 * 1024 * 1024
+# Requests worth keeping in the buffer (the page itself and the data calls, not assets)
+TRACED_RESOURCE_TYPES = ("document", "xhr", "fetch")
+CAPTURE_TIMEOUT = 10
+
+
+class FailureTracer:
+    """
+    Failure-triggered diagnostics for browser pages.
+
+    While things go well each page only keeps a ring buffer of its last TRACE_BUFFER_EVENTS
+    lightweight events (navigations, data requests and responses, failed requests, console errors,
+    downloads, attempt markers): no screenshots, no snapshots, no disk writes.
+    When an attempt fails (mode "attempt") or an item is given up (mode "final"), capture() writes
+    the buffer with a screenshot and a DOM snapshot of the page as it is at that moment, until
+    max_bytes have been written in the run.
+    """
+    def __init__(self, mode="final", trace_dir=TRACE_DIR, max_bytes=TRACE_MAX_BYTES, buffer_events=TRACE_BUFFER_EVENTS, logger_func=print):
+        self.mode = mode
+        self.trace_dir = trace_dir
+        self.max_bytes = max_bytes
+        self.buffer_events = buffer_events
+        self.log = logger_func
+        self.buffers = weakref.WeakKeyDictionary() # page -> deque of events
+        self.start_run()
+
+    def start_run(self):
+        """New run directory and disk budget (called at the start of each job)."""
+        self.run_dir = os.path.join(self.trace_dir, datetime.now().strftime("%Y%m%d_%H%M%S"))
+        self.bytes_written = 0
+        self.captures = 0
+        self.cap_reached = False
+
+    def should_capture(self, gave_up):
+        return self.mode == "attempt" or gave_up
+
+    def attach(self, page):
+        """Starts buffering the page's events (idempotent)."""
+        if page in self.buffers:
+            return
+        buffer = deque(maxlen=self.buffer_events)
+        self.buffers[page] = buffer
+
+        def add(kind, **fields):
+            buffer.append(dict(t=round(time.time(), 3), kind=kind, **fields))
+
+        def on_request(request):
+            if request.resource_type in TRACED_RESOURCE_TYPES:
+                add("request", method=request.method, url=request.url)
+
+        def on_response(response):
+            if response.request.resource_type in TRACED_RESOURCE_TYPES:
+                add("response", status=response.status, url=response.url)
+
+        def on_console(message):
+            if message.type in ("error", "warning"):
+                add("console", type=message.type, text=message.text[:500])
+
+        page.on("framenavigated", lambda frame: add("navigate", url=frame.url) if frame.parent_frame is None else None)
+        page.on("request", on_request)
+        page.on("response", on_response)
+        page.on("requestfailed", lambda request: add("request_failed", url=request.url, error=request.failure))
+        page.on("console", on_console)
+        page.on("pageerror", lambda error: add("page_error", error=str(error)[:500]))
+        page.on("download", lambda download: add("download", url=download.url, filename=download.suggested_filename))
+        page.on("crash", lambda _: add("crash"))
+
+    def mark(self, page, kind, **fields):
+        """Adds a scraper-side marker (e.g. an attempt start) to the page's buffer."""
+        buffer = self.buffers.get(page) if page is not None else None
+        if buffer is not None:
+            buffer.append(dict(t=round(time.time(), 3), kind=kind, **fields))
+
+    async def capture(self, page, name, meta):
+        """
+        Writes <name>.json (meta + buffered events), <name>.png and <name>.html for the page.
+        Returns the path of the JSON file, or None (no page, or the run's budget is used up).
+        """
+        if self.cap_reached or page is None:
+            return None
+
+        screenshot = dom = None
+        if not page.is_closed():
+            try:
+                screenshot = await asyncio.wait_for(page.screenshot(timeout=CAPTURE_TIMEOUT * 1000), CAPTURE_TIMEOUT)
+            except Exception:
+                pass
+            try:
+                dom = await asyncio.wait_for(page.content(), CAPTURE_TIMEOUT)
+            except Exception:
+                pass
+
+        buffer = self.buffers.get(page)
+        events = list(buffer) if buffer is not None else []
+        record = json.dumps(dict(meta, url=page.url, captured_at=datetime.now().isoformat(timespec="milliseconds"), events=events),
+                            ensure_ascii=False, indent=1, default=str).encode("utf-8")
+        dom_bytes = dom.encode("utf-8") if dom is not None else b""
+        size = len(record) + len(screenshot or b"") + len(dom_bytes)
+        if self.bytes_written + size > self.max_bytes:
+            self.cap_reached = True
+            self.log(f"[Trace] Budget of {format_bytes(self.max_bytes)} reached, no more failure traces this run.")
+            return None
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        base = os.path.join(self.run_dir, re.sub(r"[^A-Za-z0-9._-]+", "_", name))
+        with open(base + ".json", "wb") as f:
+            f.write(record)
+        if screenshot:
+            with open(base + ".png", "wb") as f:
+                f.write(screenshot)
+        if dom is not None:
+            with open(base + ".html", "wb") as f:
+                f.write(dom_bytes)
+
+        self.bytes_written += size
+        self.captures += 1
+        if buffer is not None:
+            # The next capture of this page only shows what happened since
+            buffer.clear()
+        return base + ".json"
@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+TV_CODES_DB_PATH = "tv_codes.db"
+# 1: tickers stored without quotes
+SCHEMA_VERSION = 1
+
+# "Put Wall 5800", "Call Wall: 6,000", "Gamma Flip=5,912.5"
+LEVEL_RE = re.compile(r"([A-Za-z][A-Za-z0-9 /+\-]*?)\s*[:=]?\s*(-?\d[\d,]*(?:\.\d+)?)(?![\d.])")
+
+
+def parse_tv_line(line):
+    """
+    Parses one TV Code line into (ticker, levels), levels being {name: float}, e.g.
+    'SPX: Put Wall 5800, Call Wall 6000' -> ("SPX", {"Put Wall": 5800.0, "Call Wall": 6000.0}).
+    The ticker is the first quoted token, else the text before ":", else the first word, without
+    quotes: the platform renders '"SPX" Put Wall ...' and the TV_Codes files hold 'SPX" Put Wall ...'.
+    """
+    line = line.strip().strip(",")
+    if line.startswith('"') and line.count('"') >= 2:
+        ticker, rest = line[1:].split('"', 1)
+    elif ":" in line.split(" ")[0] or re.match(r"^[^\s:]+\s*:", line):
+        ticker, rest = line.split(":", 1)
+    else:
+        ticker, _, rest = line.partition(" ")
+
+    levels = {}
+    # Commas separate levels, except inside numbers ("6,000")
+    for segment in re.split(r"[;|\n]|,(?=\s*[A-Za-z])", rest):
+        for name, value in LEVEL_RE.findall(segment):
+            name = " ".join(name.split()).strip(" -:")
+            if name:
+                levels[name] = float(value.replace(",", ""))
+    return ticker.strip().strip('"').strip(), levels
+
+
+def find_level(levels, name):
+    """Case-insensitive lookup of a level ("put wall" matches "Put Wall")."""
+    for key, value in levels.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+class TvCodeStore:
+    """
+    Indexed local store of TV Code lines (SQLite), one typed record per extracted line:
+    ticker, platform, capture time, Put Wall, Call Wall, every other level (JSON) and the raw line.
+    Written as codes are extracted; queried by the file viewer and downstream jobs.
+    """
+    def __init__(self, path=TV_CODES_DB_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tv_codes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticker TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                captured_at TEXT NOT NULL,
+                put_wall REAL,
+                call_wall REAL,
+                levels TEXT NOT NULL,
+                raw TEXT NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tv_codes_ticker ON tv_codes (platform, ticker, captured_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tv_codes_time ON tv_codes (platform, captured_at)")
+        # TV_Codes text files already in the store (written by the scraper or imported once)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS imported_files (path TEXT PRIMARY KEY)")
+        # One-time repair of stores written before tickers were unquoted ('SPX"'), tracked in user_version
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            self.conn.execute("""UPDATE tv_codes SET ticker = TRIM(ticker, '" ') WHERE ticker LIKE '%"%'""")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def add(self, platform, line, captured_at=None, commit=True):
+        """Parses and stores one line. Returns the ticker (None for an empty line)."""
+        line = line.strip()
+        if not line:
+            return None
+        ticker, levels = parse_tv_line(line)
+        captured_at = captured_at or datetime.now().isoformat(timespec="seconds")
+        self.conn.execute(
+            "INSERT INTO tv_codes (ticker, platform, captured_at, put_wall, call_wall, levels, raw) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (ticker, platform, captured_at, find_level(levels, "put wall"), find_level(levels, "call wall"),
+             json.dumps(levels, ensure_ascii=False), line)
+        )
+        if commit:
+            self.conn.commit()
+        return ticker
+
+    def mark_imported(self, path):
+        self.conn.execute("INSERT OR IGNORE INTO imported_files (path) VALUES (?)", (os.path.abspath(path),))
+        self.conn.commit()
+
+    def import_file(self, path, platform):
+        """
+        Imports a TV_Codes_YYYYMMDD_HHMMSS.txt file once (e.g. written before the store existed).
+        Returns the number of lines imported (0 if it was already in the store).
+        """
+        key = os.path.abspath(path)
+        if self.conn.execute("SELECT 1 FROM imported_files WHERE path = ?", (key,)).fetchone():
+            return 0
+        match = re.search(r"_(\d{8})_(\d{6})", os.path.basename(path))
+        if match:
+            captured_at = datetime.strptime(match.group(1) + match.group(2), "%Y%m%d%H%M%S").isoformat()
+        else:
+            captured_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds")
+
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if self.add(platform, line, captured_at, commit=False):
+                    count += 1
+        self.conn.execute("INSERT OR IGNORE INTO imported_files (path) VALUES (?)", (key,))
+        self.conn.commit()
+        return count
+
+    def _records(self, cursor):
+        columns = [d[0] for d in cursor.description]
+        records = []
+        for row in cursor:
+            record = dict(zip(columns, row))
+            record["levels"] = json.loads(record["levels"])
+            records.append(record)
+        return records
+
+    def latest(self, platform="std", since=None, until=None):
+        """
+        Latest record per ticker (sorted by ticker). since / until: optional ISO date/time bounds
+        (until exclusive), e.g. since="2026-10-17" for today's codes.
+        """
+        return self._records(self.conn.execute("""
+            SELECT t.* FROM tv_codes t
+            JOIN (SELECT ticker, MAX(id) AS id FROM tv_codes
+                  WHERE platform = ? AND captured_at >= ? AND captured_at < ? GROUP BY ticker) last ON t.id = last.id
+            ORDER BY t.ticker
+        """, (platform, since or "", until or "9999")))
+
+    def history(self, ticker, platform="std", start=None, end=None):
+        """All records of a ticker, oldest first. start / end: optional ISO date/time bounds (end exclusive)."""
+        return self._records(self.conn.execute("""
+            SELECT * FROM tv_codes WHERE platform = ? AND ticker = ? AND captured_at >= ? AND captured_at < ?
+            ORDER BY captured_at, id
+        """, (platform, ticker, start or "", end or "9999")))
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,146 @@
+import tkinter
+
+import customtkinter as ctk
+
+
+class VirtualCheckList(ctk.CTkFrame):
+    """
+    Checkbox list that only materializes the visible rows.
+
+    A fixed pool of CTkCheckBox widgets (as many as fit in the frame) is re-labelled as the
+    list scrolls, so showing 1,000+ tickers costs the same as showing 15. The rows are plain
+    (key, label, payload) tuples and the selection is a set of keys owned by the caller, so
+    it survives switching between lists and filtering.
+    """
+    ROW_HEIGHT = 30
+
+    def __init__(self, master, font=("Consolas", 14), on_change=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.font = font
+        self.on_change = on_change # Called after the selection changed
+        self.rows = []      # (key, label, payload)
+        self.filtered = []  # rows matching the filter
+        self.selected = set()
+        self.filter_text = ""
+        self.offset = 0
+        self.pool = []
+        self.visible_count = 0
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.empty_label = ctk.CTkLabel(self.body, text="", text_color="gray")
+
+        self.body.bind("<Configure>", lambda e: self.resize_pool(e.height))
+        # Mouse wheel only over the list: bound on the list's own widgets (rows are bound as they
+        # are created), never application-wide, so other scrollable widgets keep their bindings
+        self.bind_wheel(self)
+
+    def bind_wheel(self, widget):
+        """Binds the wheel on widget and its Tk descendants (CTk widgets are canvases + labels inside a frame)."""
+        for sequence, func in (("<MouseWheel>", lambda e: self.on_wheel(-3 if e.delta > 0 else 3)),
+                               ("<Button-4>", lambda e: self.on_wheel(-3)),
+                               ("<Button-5>", lambda e: self.on_wheel(3))):
+            # tkinter's own bind (add="+"), not the CTk override: keeps any other handler of the widget
+            tkinter.Misc.bind(widget, sequence, func, add="+")
+        for child in widget.winfo_children():
+            self.bind_wheel(child)
+
+    def on_wheel(self, rows):
+        self.scroll_by(rows)
+        # Handled: the event does not also scroll a scrollable frame around the list
+        return "break"
+
+    def resize_pool(self, height):
+        size = max(1, height // self.ROW_HEIGHT)
+        while len(self.pool) < size:
+            index = len(self.pool)
+            chk = ctk.CTkCheckBox(self.body, text="", font=self.font, height=self.ROW_HEIGHT - 4,
+                                  command=lambda i=index: self.on_toggle(i))
+            self.bind_wheel(chk)
+            self.pool.append(chk)
+        self.visible_count = size
+        self.render()
+
+    def set_rows(self, rows, selected, empty_text="No files found."):
+        """Shows a new list. selected: the caller's set of selected keys (updated in place)."""
+        self.rows = rows
+        self.selected = selected
+        self.empty_label.configure(text=empty_text)
+        self.apply_filter(reset=True)
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().lower()
+        self.apply_filter(reset=True)
+
+    def apply_filter(self, reset=False):
+        if self.filter_text:
+            self.filtered = [r for r in self.rows if self.filter_text in r[1].lower()]
+        else:
+            self.filtered = self.rows
+        if reset:
+            self.offset = 0
+        self.render()
+
+    def render(self):
+        count = self.visible_count
+        self.offset = max(0, min(self.offset, len(self.filtered) - count))
+
+        if not self.filtered:
+            self.empty_label.place(relx=0.5, rely=0.2, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        for i, chk in enumerate(self.pool):
+            index = self.offset + i
+            if i >= count or index >= len(self.filtered):
+                chk.grid_remove()
+                continue
+            key, label, _ = self.filtered[index]
+            chk.configure(text=label)
+            if key in self.selected:
+                chk.select()
+            else:
+                chk.deselect()
+            chk.grid(row=i, column=0, sticky="w", padx=10, pady=2)
+
+        total = len(self.filtered)
+        if total > count:
+            self.scrollbar.set(self.offset / total, (self.offset + count) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def on_toggle(self, pool_index):
+        key = self.filtered[self.offset + pool_index][0]
+        if self.pool[pool_index].get():
+            self.selected.add(key)
+        else:
+            self.selected.discard(key)
+        if self.on_change:
+            self.on_change()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.filtered))
+            self.render()
+        elif action == "scroll":
+            step = self.visible_count if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def scroll_by(self, rows):
+        self.offset += rows
+        self.render()
+
+    def set_all(self, selected):
+        """Selects / deselects every row matching the current filter."""
+        keys = {r[0] for r in self.filtered}
+        if selected:
+            self.selected |= keys
+        else:
+            self.selected -= keys
+        self.render()
+        if self.on_change:
+            self.on_change()